@@ -0,0 +1,92 @@
+"""自适应轮询间隔与固定间隔的对比
+
+单个房间，最短间隔 0.05 秒、最长间隔 1 秒（按比例缩短了实际的时间）。分别在三种场景下运行 4 秒：
+每 0.5 秒切歌一次且一直有人使用命令的活跃房间、一直播放同一首歌的安静房间，以及超过暂停时间无人使用的房间。
+比较固定间隔与自适应间隔时服务器收到的请求数，以及活跃房间中发现切歌的平均延迟。
+
+用法：python benchmarks/bench_adaptive_poll.py
+"""
+
+import asyncio
+import json
+import statistics
+import time
+
+from common import init_plugin, make_api
+from server import StandInServer
+
+BASE = 0.05
+LONGEST = 1.0
+IDLE = 2.0
+DURATION = 4.0
+CHANGE_EVERY = 0.5
+
+
+def current(index: int) -> bytes:
+    return json.dumps(
+        {"name": f"歌曲 {index}", "source": "wy", "id": str(index), "user": {"name": "user", "email": "a@a.com"}}
+    ).encode()
+
+
+async def run(server: StandInServer, scenario: str, adaptive: bool) -> tuple[int, list[float]]:
+    from nonebot_plugin_alisten.config import plugin_config
+    from nonebot_plugin_alisten.poller import bind, close_pollers, get_poller
+
+    plugin_config.alisten_poll_interval_max = LONGEST if adaptive else BASE
+    plugin_config.alisten_poll_idle = IDLE if adaptive else 0
+    server.routes["/music/sync"] = current(0)
+    server.requests = 0
+
+    api = make_api(server.url)
+    bind(api.config)
+    poller = get_poller(api.config)
+    assert poller
+    # 房间在有群组使用命令之前不轮询
+    poller.touch()
+    if scenario == "idle":
+        poller.active_at -= IDLE
+
+    delays: list[float] = []
+    start = time.monotonic()
+    index = 0
+    while time.monotonic() - start < DURATION:
+        await asyncio.sleep(CHANGE_EVERY)
+        if scenario != "busy":
+            continue
+        # 群组里一直有人在使用命令
+        poller.touch()
+        index += 1
+        server.routes["/music/sync"] = current(index)
+        changed_at = time.monotonic()
+        while poller.current is None or poller.current.id != str(index):
+            await asyncio.sleep(0.005)
+        delays.append(time.monotonic() - changed_at)
+
+    close_pollers()
+    return server.requests, delays
+
+
+async def main() -> None:
+    from nonebot_plugin_alisten import transport
+    from nonebot_plugin_alisten.config import plugin_config
+
+    plugin_config.alisten_poll_interval = BASE
+    server = StandInServer({})
+    await server.start()
+    try:
+        for scenario in ("busy", "quiet", "idle"):
+            for adaptive in (False, True):
+                requests, delays = await run(server, scenario, adaptive)
+                name = f"{scenario} {'adaptive' if adaptive else 'fixed'}"
+                line = f"{name:<32} requests={requests:<5}"
+                if delays:
+                    line += f" detect={statistics.mean(delays) * 1000:6.1f}ms"
+                print(line)  # noqa: T201
+    finally:
+        await transport.close_sessions()
+        await server.stop()
+
+
+if __name__ == "__main__":
+    init_plugin()
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+"""切歌通知的发送调度
+
+300 个群组通过同一个 Bot 开启切歌通知，房间在 0 秒和 1 秒时各切歌一次。比较每次切歌时立即向所有群组发送与
+通过发送调度器在窗口内分散发送时的发送总数、被取代而未发送的通知数，以及每秒发送数的峰值。
+发送本身只记录时间，不经过适配器。
+
+用法：python benchmarks/bench_announce.py
+"""
+
+import asyncio
+from collections import Counter
+
+from common import init_plugin
+
+GROUPS = 300
+WINDOW = 2.0
+CHANGES = (0.0, 1.0)
+
+
+def summarize(name: str, sent_at: list[float], dropped: int) -> None:
+    peak = max(Counter(int(t) for t in sent_at).values())
+    duration = max(sent_at) if sent_at else 0.0
+    print(  # noqa: T201
+        f"{name:<32} sent={len(sent_at):<5} dropped={dropped:<5} peak={peak:>5}/s last={duration:.2f}s"
+    )
+
+
+async def main() -> None:
+    from nonebot_plugin_alconna import Target
+
+    from nonebot_plugin_alisten.announce import Announcement, SendScheduler
+    from nonebot_plugin_alisten.config import plugin_config
+
+    plugin_config.alisten_announce_window = WINDOW
+    plugin_config.alisten_announce_interval = 0.0
+    loop = asyncio.get_running_loop()
+    targets = [Target(str(i), self_id="bot", adapter="OneBot V11") for i in range(GROUPS)]
+
+    start = loop.time()
+    sent_at: list[float] = []
+
+    async def send(announcement: Announcement) -> None:
+        sent_at.append(loop.time() - start)
+
+    async def change_at(delay: float, submit) -> None:
+        await asyncio.sleep(delay)
+        for i, target in enumerate(targets):
+            submit(f"QQClient_{i}", Announcement(target, f"第 {delay} 秒的歌曲"))
+
+    # 立即向所有群组发送
+    tasks: set[asyncio.Task[None]] = set()
+
+    def submit_naive(session_id: str, announcement: Announcement) -> None:
+        tasks.add(asyncio.create_task(send(announcement)))
+
+    await asyncio.gather(*(change_at(delay, submit_naive) for delay in CHANGES))
+    await asyncio.gather(*tasks)
+    summarize("send immediately", sent_at, 0)
+
+    # 通过发送调度器
+    scheduler = SendScheduler()
+    scheduler._send = send  # type: ignore[method-assign]
+    start = loop.time()
+    sent_at.clear()
+    await asyncio.gather(*(change_at(delay, scheduler.submit) for delay in CHANGES))
+    while len(scheduler):
+        await asyncio.sleep(0.05)
+    summarize("send scheduler", sent_at, scheduler.dropped)
+    scheduler.close()
+
+
+if __name__ == "__main__":
+    init_plugin()
+    asyncio.run(main())
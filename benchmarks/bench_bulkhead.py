@@ -0,0 +1,70 @@
+"""服务器并发限制在突发请求下的效果
+
+300 个群组同时搜索，替身服务器每次搜索耗时 50 毫秒，比较不限制并发、限制并发并排队，
+以及排队已满时直接回复服务繁忙三种配置下的延迟分布、服务器收到的请求数与建立的连接数。
+
+用法：python benchmarks/bench_bulkhead.py
+"""
+
+import asyncio
+import time
+
+from common import init_plugin, make_api, report
+from server import StandInServer
+
+GROUPS = 300
+
+SEARCH = {
+    "list": [{"id": str(i), "name": f"Song {i}", "artist": f"Artist {i}"} for i in range(10)],
+    "totalSize": 10,
+}
+
+
+async def main() -> None:
+    from nonebot_plugin_alisten import transport
+    from nonebot_plugin_alisten.alisten_api import ErrorResponse
+    from nonebot_plugin_alisten.bulkhead import _bulkheads
+    from nonebot_plugin_alisten.config import plugin_config
+
+    plugin_config.alisten_search_cache_ttl = 0
+    server = StandInServer.from_json({"/music/search": SEARCH}, delay=0.05)
+    await server.start()
+    apis = [make_api(server.url, house_id=f"room{i}") for i in range(GROUPS)]
+
+    async def search(i: int) -> tuple[float, bool]:
+        start = time.perf_counter()
+        result = await apis[i].music_search(f"歌曲 {i}", "wy")
+        return (time.perf_counter() - start) * 1000, isinstance(result, ErrorResponse)
+
+    try:
+        for name, concurrency, queue in (
+            ("unbounded", 0, 0),
+            ("limit 8 queue 512", 8, 512),
+            ("limit 8 queue 32", 8, 32),
+        ):
+            plugin_config.alisten_server_concurrency = concurrency
+            plugin_config.alisten_server_queue = queue
+            _bulkheads.clear()
+            await transport.close_sessions()
+            server.requests = server.connections = 0
+
+            results = await asyncio.gather(*(search(i) for i in range(GROUPS)))
+            report(name, [timing for timing, busy in results if not busy])
+            busy = [timing for timing, busy in results if busy]
+            print(  # noqa: T201
+                f"{'':<32} requests={server.requests} connections={server.connections} "
+                f"busy={len(busy)} busy_max={max(busy, default=0):.3f}ms"
+            )
+            if bulkhead := _bulkheads.get(server.url):
+                print(  # noqa: T201
+                    f"{'':<32} queued={bulkhead.queued} max_depth={bulkhead.max_depth} "
+                    f"avg_wait={bulkhead.wait_total / max(bulkhead.queued, 1) * 1000:.1f}ms"
+                )
+    finally:
+        await transport.close_sessions()
+        await server.stop()
+
+
+if __name__ == "__main__":
+    init_plugin()
+    asyncio.run(main())
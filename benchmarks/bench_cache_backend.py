@@ -0,0 +1,74 @@
+"""缓存后端的读写延迟与序列化后的大小
+
+比较内存、SQLite 与 Redis 后端读写一个 50 首歌的播放列表的延迟，以及压缩前后的大小。
+内存后端直接保存对象，SQLite 与 Redis 后端的读写包括序列化与反序列化。
+设置环境变量 ALISTEN_BENCH_REDIS_URL 时才测试 Redis 后端。
+
+用法：python benchmarks/bench_cache_backend.py
+"""
+
+import asyncio
+import os
+import tempfile
+from pathlib import Path
+
+from common import init_plugin, measure, report
+
+ROUNDS = 2000
+
+PLAYLIST = {
+    "playlist": [
+        {
+            "id": str(i),
+            "name": f"Song {i}",
+            "source": "wy",
+            "user": {"name": f"user{i % 5}", "email": f"user{i % 5}@example.com"},
+            "likes": i,
+        }
+        for i in range(50)
+    ]
+}
+
+
+async def main() -> None:
+    from nonebot_plugin_alisten.alisten_api import PlaylistResponse
+    from nonebot_plugin_alisten.backend import CacheBackend, MemoryBackend, RedisBackend, SQLiteBackend
+    from nonebot_plugin_alisten.codec import estimate_size, pack, unpack
+
+    playlist = PlaylistResponse.model_validate(PLAYLIST)
+    value = pack(PlaylistResponse, playlist)
+    print(  # noqa: T201
+        f"{'json size':<32} {len(playlist.model_dump_json(by_alias=True))}B\n{'packed size':<32} {len(value)}B"
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends: dict[str, CacheBackend] = {
+            "memory": MemoryBackend(max_entries=1000, max_bytes=8 * 1024 * 1024),
+            "sqlite": SQLiteBackend(Path(tmp) / "cache.db"),
+        }
+        if url := os.environ.get("ALISTEN_BENCH_REDIS_URL"):
+            backends["redis"] = RedisBackend(url)
+
+        for name, backend in backends.items():
+
+            async def set_value(key: str) -> None:
+                if isinstance(backend, MemoryBackend):
+                    await backend.set(key, playlist, 60, estimate_size(PlaylistResponse, playlist))
+                else:
+                    await backend.set(key, pack(PlaylistResponse, playlist), 60)
+
+            async def get_value(key: str) -> PlaylistResponse:
+                data = await backend.get(key)
+                return data if isinstance(backend, MemoryBackend) else unpack(PlaylistResponse, data)
+
+            counter = iter(range(ROUNDS))
+            report(f"{name} set", await measure(lambda: set_value(f"alisten:bench:{next(counter)}"), ROUNDS))
+            counter = iter(range(ROUNDS))
+            report(f"{name} get", await measure(lambda: get_value(f"alisten:bench:{next(counter)}"), ROUNDS))
+            await backend.clear("alisten:bench:")
+            await backend.close()
+
+
+if __name__ == "__main__":
+    init_plugin()
+    asyncio.run(main())
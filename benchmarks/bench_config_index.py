@@ -0,0 +1,58 @@
+"""配置索引与逐条查询数据库的对比
+
+在临时 SQLite 数据库中写入 10000 个群组的配置，比较每条命令查询数据库与从内存索引读取配置的耗时，
+以及启动时一次性加载所有配置的耗时。
+
+用法：python benchmarks/bench_config_index.py
+"""
+
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from common import init_plugin, measure, report
+
+GROUPS = 10_000
+ROUNDS = 2000
+
+
+async def main() -> None:
+    from nonebot_plugin_orm import get_session, init_orm
+    from sqlalchemy import select
+
+    from nonebot_plugin_alisten.config_index import config_index
+    from nonebot_plugin_alisten.models import AlistenConfig
+
+    await init_orm()
+    async with get_session() as session:
+        session.add_all(
+            AlistenConfig(session_id=f"QQClient_{i}", server_url="http://localhost:8080", house_id=f"room{i}")
+            for i in range(GROUPS)
+        )
+        await session.commit()
+
+    rng = random.Random(0)
+
+    async def query() -> None:
+        session_id = f"QQClient_{rng.randrange(GROUPS)}"
+        async with get_session() as session:
+            result = await session.execute(select(AlistenConfig).where(AlistenConfig.session_id == session_id))
+            assert result.scalar_one_or_none()
+
+    async def lookup() -> None:
+        assert await config_index.get(f"QQClient_{rng.randrange(GROUPS)}")
+
+    start = time.perf_counter()
+    await config_index.load()
+    print(f"{'load':<32} groups={len(config_index)} {(time.perf_counter() - start) * 1000:.1f}ms")  # noqa: T201
+
+    report("db query", await measure(query, ROUNDS))
+    report("index lookup", await measure(lookup, ROUNDS))
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        init_plugin(sqlalchemy_database_url=f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        asyncio.run(main())
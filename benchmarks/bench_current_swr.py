@@ -0,0 +1,57 @@
+"""当前音乐 stale-while-revalidate 缓存的效果
+
+服务器每个请求延迟 50 毫秒，每隔 10 毫秒查询一次当前音乐，共 500 次。比较每次都请求服务器、
+只按新鲜期缓存以及允许返回旧数据并在后台刷新三种方式的延迟与服务器请求数。
+新鲜期与过期时间按比例缩小为 0.1 秒与 1 秒。
+
+用法：python benchmarks/bench_current_swr.py
+"""
+
+import asyncio
+import time
+
+from common import init_plugin, make_api, report
+from server import StandInServer
+
+ROUNDS = 500
+INTERVAL = 0.01
+
+CURRENT = {"name": "Song", "source": "wy", "id": "1", "user": {"name": "u", "email": "u@u.com"}}
+
+
+async def main() -> None:
+    from nonebot_plugin_alisten import transport
+    from nonebot_plugin_alisten.alisten_api import current_cache
+    from nonebot_plugin_alisten.config import plugin_config
+
+    server = StandInServer.from_json({"/music/sync": CURRENT}, delay=0.05)
+    await server.start()
+    api = make_api(server.url)
+
+    try:
+        for name, fresh, stale in (
+            ("no cache", 0.0, 0.0),
+            ("fresh only", 0.1, 0.0),
+            ("stale-while-revalidate", 0.1, 1.0),
+        ):
+            plugin_config.alisten_current_fresh = fresh
+            plugin_config.alisten_current_stale = stale
+            await current_cache.clear()
+            server.requests = 0
+            timings = []
+            for _ in range(ROUNDS):
+                start = time.perf_counter()
+                await api.music_current()
+                timings.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(INTERVAL)
+            report(name, timings)
+            print(f"{'':<32} requests={server.requests}")  # noqa: T201
+    finally:
+        await current_cache.clear()
+        await transport.close_sessions()
+        await server.stop()
+
+
+if __name__ == "__main__":
+    init_plugin()
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+"""响应解码的微基准测试
+
+用法：python benchmarks/bench_decode.py
+"""
+
+import json
+import timeit
+from datetime import UTC, datetime
+from typing import Any
+
+from common import init_plugin
+
+
+def playlist_payload(n: int) -> bytes:
+    return json.dumps(
+        {
+            "playlist": [
+                {
+                    "id": str(1000000 + i),
+                    "name": f"歌曲名称 {i} (Live Version)",
+                    "source": ("wy", "qq", "db")[i % 3],
+                    "likes": i % 7,
+                    "user": {"name": f"用户{i % 50}", "email": f"user{i % 50}@example.com"},
+                }
+                for i in range(n)
+            ]
+        }
+    ).encode()
+
+
+def search_payload(n: int) -> bytes:
+    return json.dumps(
+        {
+            "list": [{"id": str(2000000 + i), "name": f"搜索结果 {i}", "artist": f"歌手 {i % 30}"} for i in range(n)],
+            "totalSize": n,
+        }
+    ).encode()
+
+
+def house_payload(n: int) -> bytes:
+    created = datetime(2025, 1, 1, tzinfo=UTC).isoformat()
+    return json.dumps(
+        [
+            {
+                "createTime": created,
+                "desc": f"房间描述 {i}",
+                "enableStatus": True,
+                "id": f"room{i}",
+                "name": f"房间 {i}",
+                "needPwd": i % 2 == 0,
+                "population": i % 100,
+            }
+            for i in range(n)
+        ]
+    ).encode()
+
+
+def main() -> None:
+    import msgspec
+    import orjson
+
+    from nonebot_plugin_alisten.alisten_api import HouseSearchResponse, PlaylistResponse, SearchMusicResponse
+    from nonebot_plugin_alisten.codec import get_adapter
+
+    backends: dict[str, Any] = {
+        "model_validate_json": lambda tp, content: tp.model_validate_json(content),
+        "pydantic (TypeAdapter)": lambda tp, content: get_adapter(tp).validate_json(content),
+        "orjson": lambda tp, content: get_adapter(tp).validate_python(orjson.loads(content)),
+        "msgspec": lambda tp, content: get_adapter(tp).validate_python(msgspec.json.decode(content)),
+    }
+    cases = [
+        ("playlist", PlaylistResponse, playlist_payload),
+        ("search", SearchMusicResponse, search_payload),
+        ("house", HouseSearchResponse, house_payload),
+    ]
+
+    for name, tp, payload in cases:
+        for n in (10, 100, 1000):
+            content = payload(n)
+            expected = tp.model_validate_json(content)
+            number = max(10, 20000 // n)
+            for backend, func in backends.items():
+                assert func(tp, content) == expected
+                seconds = min(timeit.repeat(lambda: func(tp, content), number=number, repeat=5)) / number
+                print(f"{name:<9} n={n:<5} {backend:<24} {seconds * 1e6:10.1f}us")  # noqa: T201
+            print()  # noqa: T201
+
+
+if __name__ == "__main__":
+    init_plugin()
+    main()
@@ -0,0 +1,48 @@
+"""确定性错误缓存的效果
+
+模拟配置错误的房间：服务器对 /music/sync 始终返回 404，每个请求延迟 20 毫秒。
+每隔 10 毫秒查询一次当前音乐，共 500 次，比较关闭与开启错误缓存时的延迟与服务器请求数。
+
+用法：python benchmarks/bench_error_cache.py
+"""
+
+import asyncio
+import time
+
+from common import init_plugin, make_api, report
+from server import StandInServer
+
+ROUNDS = 500
+INTERVAL = 0.01
+
+
+async def main() -> None:
+    from nonebot_plugin_alisten import transport
+    from nonebot_plugin_alisten.alisten_api import error_cache
+    from nonebot_plugin_alisten.config import plugin_config
+
+    server = StandInServer.from_json({}, delay=0.02)
+    await server.start()
+    api = make_api(server.url)
+
+    try:
+        for name, ttl in (("no cache", 0.0), ("ttl=10s", 10.0)):
+            plugin_config.alisten_error_cache_ttl = ttl
+            await error_cache.clear()
+            server.requests = 0
+            timings = []
+            for _ in range(ROUNDS):
+                start = time.perf_counter()
+                await api.music_sync()
+                timings.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(INTERVAL)
+            report(name, timings)
+            print(f"{'':<32} requests={server.requests}")  # noqa: T201
+    finally:
+        await transport.close_sessions()
+        await server.stop()
+
+
+if __name__ == "__main__":
+    init_plugin()
+    asyncio.run(main())
@@ -0,0 +1,45 @@
+"""对冲请求对长尾延迟的影响
+
+替身服务器 2% 的请求额外延迟 500 毫秒，依次获取当前音乐，比较开启对冲前后的延迟分布与服务器收到的请求数。
+
+用法：python benchmarks/bench_hedge.py
+"""
+
+import asyncio
+import random
+
+from common import init_plugin, make_api, measure, report
+from server import StandInServer
+
+ROUNDS = 2000
+
+CURRENT = {"id": "1", "name": "Song 1", "source": "wy", "user": {"name": "u", "email": "u@u.com"}}
+
+
+async def main() -> None:
+    from nonebot_plugin_alisten import hedge, transport
+    from nonebot_plugin_alisten.config import plugin_config
+
+    server = StandInServer.from_json({"/music/sync": CURRENT}, delay=0.005)
+    server.tail_ratio = 0.02
+    server.tail_delay = 0.5
+    await server.start()
+    api = make_api(server.url)
+
+    try:
+        for name, enabled in (("no hedge", False), ("hedge", True)):
+            random.seed(0)
+            plugin_config.alisten_hedge = enabled
+            hedge._policies.clear()
+            server.requests = 0
+            timings = await measure(api.music_sync, ROUNDS)
+            report(name, timings)
+            print(f"{'':<32} requests={server.requests} extra={server.requests / ROUNDS - 1:.1%}")  # noqa: T201
+    finally:
+        await transport.close_sessions()
+        await server.stop()
+
+
+if __name__ == "__main__":
+    init_plugin()
+    asyncio.run(main())
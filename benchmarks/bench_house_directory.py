@@ -0,0 +1,74 @@
+"""房间目录与逐次搜索的对比
+
+替身服务器返回 5000 个房间，比较每次搜索并线性查找、从房间目录查询，以及后台刷新时内容未变化与变化时的耗时。
+
+用法：python benchmarks/bench_house_directory.py
+"""
+
+import asyncio
+
+from common import init_plugin, make_api, measure, report
+from server import StandInServer
+
+ROUNDS = 200
+HOUSES = 5000
+
+HOUSE_LIST = [
+    {
+        "createTime": 1755320090631,
+        "desc": f"房间 {i} 的描述",
+        "enableStatus": True,
+        "id": f"room{i}",
+        "name": f"房间 {i}",
+        "needPwd": i % 2 == 0,
+        "population": i % 50,
+    }
+    for i in range(HOUSES)
+]
+
+
+async def main() -> None:
+    from nonebot_plugin_alisten import transport
+    from nonebot_plugin_alisten.alisten_api import ErrorResponse
+    from nonebot_plugin_alisten.directory import close_directories, get_house_directory
+
+    server = StandInServer.from_json({"/house/search": HOUSE_LIST})
+    await server.start()
+    house_id = f"room{HOUSES - 1}"
+    api = make_api(server.url, house_id=house_id)
+
+    async def search_and_scan() -> None:
+        result = await api.house_search()
+        assert not isinstance(result, ErrorResponse)
+        next(house for house in result if house.id == house_id)
+
+    directory = get_house_directory(server.url)
+
+    async def lookup() -> None:
+        await directory.ensure_loaded(api)
+        assert directory.get(house_id)
+
+    async def refresh_changed() -> None:
+        directory.digest = None
+        await directory.refresh(api)
+
+    try:
+        server.requests = 0
+        report("search + scan", await measure(search_and_scan, ROUNDS))
+        print(f"{'':<32} requests={server.requests}")  # noqa: T201
+
+        server.requests = 0
+        report("directory lookup", await measure(lookup, ROUNDS))
+        print(f"{'':<32} requests={server.requests}")  # noqa: T201
+
+        report("refresh (unchanged)", await measure(lambda: directory.refresh(api), ROUNDS))
+        report("refresh (changed)", await measure(refresh_changed, ROUNDS))
+    finally:
+        await close_directories()
+        await transport.close_sessions()
+        await server.stop()
+
+
+if __name__ == "__main__":
+    init_plugin()
+    asyncio.run(main())
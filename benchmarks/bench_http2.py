@@ -0,0 +1,150 @@
+"""HTTP/2 多路复用与 HTTP/1.1 的负载对比
+
+在独立进程中启动支持 HTTP/2 的 TLS 替身服务器，同时发出 200 个命令，统计服务器看到的连接数与延迟分布。
+hypercorn 默认最多允许 100 个并发流，替身服务器将上限调高到并发数，所有命令可以在同一个连接上同时进行。
+服务器并发限制会让超出的命令直接回复服务繁忙，测试时关闭，只比较连接方式的差别。
+
+依赖：pip install hypercorn trustme
+用法：python benchmarks/bench_http2.py
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+import trustme
+from common import init_plugin, make_api, report
+from hypercorn.asyncio import serve
+from hypercorn.config import Config
+from pydantic import BaseModel
+
+CONCURRENCY = 200
+ROUNDS = 5
+DELAY = 0.02
+
+
+class StatsResponse(BaseModel):
+    connections: int
+    versions: dict[str, int]
+
+
+CURRENT = json.dumps({"id": "1", "name": "Song 1", "source": "wy", "user": {"name": "u", "email": "u@u.com"}}).encode()
+
+
+class StandInApp:
+    """记录客户端连接与 HTTP 版本的 ASGI 应用"""
+
+    def __init__(self) -> None:
+        self.connections: set[tuple[str, int]] = set()
+        self.versions: Counter[str] = Counter()
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await receive()
+            await send({"type": "lifespan.startup.complete"})
+            await receive()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+        while (await receive()).get("more_body"):
+            pass
+
+        if scope["path"] == "/stats":
+            body = json.dumps({"connections": len(self.connections), "versions": self.versions}).encode()
+            self.connections.clear()
+            self.versions.clear()
+        else:
+            self.connections.add(tuple(scope["client"]))
+            self.versions[scope["http_version"]] += 1
+            await asyncio.sleep(DELAY)
+            body = CURRENT
+
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": body})
+
+
+def run_server(port: int, certfile: str) -> None:
+    config = Config()
+    config.bind = [f"127.0.0.1:{port}"]
+    config.certfile = config.keyfile = certfile
+    config.loglevel = "WARNING"
+    config.h2_max_concurrent_streams = CONCURRENCY
+    # 默认在一个连接上处理 1000 个请求后断开，所有轮次的请求都会经过同一个 HTTP/2 连接
+    config.keep_alive_max_requests = CONCURRENCY * (ROUNDS + 1) + 2
+    asyncio.run(serve(StandInApp(), config))  # type: ignore[arg-type]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_round(server_url: str) -> tuple[list[float], int]:
+    """同时发出 CONCURRENCY 个命令，返回成功的命令的延迟与失败的命令数"""
+    from nonebot_plugin_alisten.alisten_api import ErrorResponse
+
+    async def command(i: int) -> tuple[float, bool]:
+        # 使用不同的房间，避免相同请求被合并
+        api = make_api(server_url, house_id=f"room{i}")
+        start = time.perf_counter()
+        result = await api.music_sync()
+        return (time.perf_counter() - start) * 1000, isinstance(result, ErrorResponse)
+
+    results = await asyncio.gather(*(command(i) for i in range(CONCURRENCY)))
+    return [timing for timing, failed in results if not failed], sum(failed for _, failed in results)
+
+
+async def main(tmp: Path) -> None:
+    from nonebot_plugin_alisten import breaker, transport
+    from nonebot_plugin_alisten.config import plugin_config
+
+    plugin_config.alisten_server_concurrency = 0
+    ca = trustme.CA()
+    cert = ca.issue_cert("127.0.0.1")
+    cert.private_key_and_cert_chain_pem.write_to_path(tmp / "server.pem")
+    ca.cert_pem.write_to_path(tmp / "ca.pem")
+    os.environ["SSL_CERT_FILE"] = str(tmp / "ca.pem")
+
+    port = free_port()
+    server = multiprocessing.Process(target=run_server, args=(port, str(tmp / "server.pem")), daemon=True)
+    server.start()
+    await asyncio.sleep(1)
+    server_url = f"https://127.0.0.1:{port}"
+    stats_api = make_api(server_url)
+
+    for name, pooled, http2 in (
+        ("unpooled HTTP/1.1", False, False),
+        ("pooled HTTP/1.1", True, False),
+        ("pooled HTTP/2", True, True),
+    ):
+        breaker._breakers.clear()
+        transport._session_supported = pooled
+        plugin_config.alisten_http2 = http2
+
+        await run_round(server_url)  # 预热
+        await stats_api._make_request("GET", "/stats", StatsResponse, "获取统计失败")
+        timings, failures = [], 0
+        for _ in range(ROUNDS):
+            round_timings, round_failures = await run_round(server_url)
+            timings += round_timings
+            failures += round_failures
+        stats = await stats_api._make_request("GET", "/stats", StatsResponse, "获取统计失败")
+
+        report(name, timings)
+        print(f"{'':<32} {stats} failures={failures}")  # noqa: T201
+        await transport.close_sessions()
+
+    server.terminate()
+
+
+if __name__ == "__main__":
+    init_plugin()
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(main(Path(tmp)))
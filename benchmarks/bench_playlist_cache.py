@@ -0,0 +1,63 @@
+"""播放列表缓存对服务器请求数的影响
+
+20 个房间随机执行 2000 条命令，其中 90% 查看播放列表，10% 点赞，比较开启缓存前后服务器收到的播放列表请求数。
+
+用法：python benchmarks/bench_playlist_cache.py
+"""
+
+import asyncio
+import random
+import time
+
+from common import init_plugin, make_api, report
+from server import StandInServer
+
+ROUNDS = 2000
+ROOMS = 20
+
+PLAYLIST = {
+    "playlist": [
+        {"id": str(i), "name": f"Song {i}", "source": "wy", "likes": i, "user": {"name": "u", "email": "u@u.com"}}
+        for i in range(10)
+    ]
+}
+
+
+async def main() -> None:
+    from nonebot_plugin_alisten import transport
+    from nonebot_plugin_alisten.alisten_api import playlist_cache
+    from nonebot_plugin_alisten.config import plugin_config
+
+    server = StandInServer.from_json(
+        {"/music/playlist": PLAYLIST, "/music/good": {"name": "Song 1", "likes": 2}}, delay=0.002
+    )
+    await server.start()
+    apis = [make_api(server.url, house_id=f"room{i}") for i in range(ROOMS)]
+
+    try:
+        for name, ttl in (("no cache", 0.0), ("ttl=3s", 3.0)):
+            rng = random.Random(0)
+            plugin_config.alisten_playlist_ttl = ttl
+            await playlist_cache.clear()
+            server.requests = 0
+            timings = []
+            writes = 0
+            for _ in range(ROUNDS):
+                api = rng.choice(apis)
+                if rng.random() < 0.1:
+                    await api.music_good(1, "Song 1")
+                    writes += 1
+                    continue
+                start = time.perf_counter()
+                await api.music_playlist()
+                timings.append((time.perf_counter() - start) * 1000)
+            report(name, timings)
+            print(f"{'':<32} playlist requests={server.requests - writes} reads={len(timings)}")  # noqa: T201
+    finally:
+        await transport.close_sessions()
+        await server.stop()
+
+
+if __name__ == "__main__":
+    init_plugin()
+    asyncio.run(main())
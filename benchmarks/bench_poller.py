@@ -0,0 +1,77 @@
+"""共享轮询与逐群组轮询的对比
+
+200 个群组绑定 10 个房间，各群组轮询的时间互相错开，替身服务器每次获取当前音乐耗时 20 毫秒。比较每个群组各自轮询与
+每个房间共享一个轮询时服务器收到的请求数，以及查看当前音乐时读取轮询结果的耗时。
+
+用法：python benchmarks/bench_poller.py
+"""
+
+import asyncio
+import contextlib
+import random
+
+from common import init_plugin, make_api, measure, report
+from server import StandInServer
+
+GROUPS = 200
+HOUSES = 10
+INTERVAL = 0.5
+DURATION = 3.0
+
+CURRENT = {"name": "测试歌曲", "source": "wy", "id": "123456", "user": {"name": "user", "email": "a@a.com"}}
+
+
+async def main() -> None:
+    from nonebot_plugin_alisten import transport
+    from nonebot_plugin_alisten.config import plugin_config
+    from nonebot_plugin_alisten.poller import close_pollers, get_poller, sync_pollers
+
+    server = StandInServer.from_json({"/music/sync": CURRENT}, delay=0.02)
+    await server.start()
+    apis = [make_api(server.url, house_id=f"room{i % HOUSES}") for i in range(GROUPS)]
+    for i, api in enumerate(apis):
+        api.config.session_id = f"QQClient_{i}"
+    plugin_config.alisten_poll_interval = INTERVAL
+    plugin_config.alisten_poll_stagger = INTERVAL
+    # 房间默认在有群组使用命令之前不轮询，这里假设所有群组都在使用
+    plugin_config.alisten_poll_idle = 0
+
+    try:
+
+        async def poll_group(api) -> None:
+            # 各群组的轮询时间错开，不会被合并为同一个请求
+            await asyncio.sleep(random.uniform(0, INTERVAL))
+            while True:
+                await api.music_sync()
+                await asyncio.sleep(INTERVAL)
+
+        server.requests = 0
+        tasks = [asyncio.create_task(poll_group(api)) for api in apis]
+        await asyncio.sleep(DURATION)
+        for task in tasks:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        print(f"{'per-group polling':<32} requests={server.requests}")  # noqa: T201
+
+        server.requests = 0
+        sync_pollers(api.config for api in apis)
+        await asyncio.sleep(DURATION)
+        print(f"{'shared poller':<32} requests={server.requests}")  # noqa: T201
+
+        poller = get_poller(apis[0].config)
+        assert poller
+
+        async def read() -> None:
+            assert poller.get()
+
+        report("read poller", await measure(read, 2000))
+        close_pollers()
+    finally:
+        await transport.close_sessions()
+        await server.stop()
+
+
+if __name__ == "__main__":
+    init_plugin()
+    asyncio.run(main())
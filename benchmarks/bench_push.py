@@ -0,0 +1,102 @@
+"""推送与轮询的对比
+
+10 个房间，替身服务器每 0.3 秒切换一次各房间的当前音乐，持续 6 秒。比较按 2 秒间隔轮询与订阅推送时
+服务器收到的请求数，以及切歌后插件看到新歌曲的延迟。
+
+用法：python benchmarks/bench_push.py
+"""
+
+import asyncio
+import json
+import statistics
+import time
+
+from common import init_plugin
+from server import StandInServer
+
+HOUSES = 10
+CHANGE_INTERVAL = 0.3
+DURATION = 6.0
+
+
+def music(i: int) -> dict[str, object]:
+    return {"name": f"Song {i}", "source": "wy", "id": str(i), "user": {"name": "user", "email": "a@a.com"}}
+
+
+async def main() -> None:
+    from websockets.asyncio.server import broadcast, serve
+
+    from nonebot_plugin_alisten import transport
+    from nonebot_plugin_alisten.config import plugin_config
+    from nonebot_plugin_alisten.models import AlistenConfig
+    from nonebot_plugin_alisten.poller import close_pollers, get_poller, sync_pollers
+
+    http = StandInServer.from_json({"/music/sync": music(0)})
+    await http.start()
+    clients = set()
+
+    async def handle(websocket) -> None:
+        await websocket.recv()
+        clients.add(websocket)
+        try:
+            await websocket.wait_closed()
+        finally:
+            clients.discard(websocket)
+
+    ws_server = await serve(handle, "127.0.0.1", 0)
+    ws_url = "http://{}:{}".format(*next(iter(ws_server.sockets)).getsockname()[:2])
+
+    try:
+        for name, push in (("polling, interval=2s", False), ("push", True)):
+            # 推送的替身服务器只提供 WebSocket，连接时获取完整状态的请求会失败，不影响结果
+            server_url = ws_url if push else http.url
+            configs = [
+                AlistenConfig(session_id=f"QQClient_{i}", server_url=server_url, house_id=f"room{i}", house_password="")
+                for i in range(HOUSES)
+            ]
+            plugin_config.alisten_push = push
+            plugin_config.alisten_poll_interval = 2.0
+            plugin_config.alisten_poll_stagger = 0
+            plugin_config.alisten_poll_idle = 0
+            http.routes["/music/sync"] = json.dumps(music(0)).encode()
+            sync_pollers(configs)
+            await asyncio.sleep(0.5)
+            http.requests = 0
+
+            delays = []
+            start = time.monotonic()
+            song = 0
+            while time.monotonic() - start < DURATION:
+                song += 1
+                changed_at = time.monotonic()
+                http.routes["/music/sync"] = json.dumps(music(song)).encode()
+                broadcast(clients, json.dumps({"type": "music", "data": music(song)}))
+                # 记录每个房间看到新歌曲的延迟，切歌前仍未看到的按切歌间隔计
+                seen: set[int] = set()
+                while time.monotonic() - changed_at < CHANGE_INTERVAL:
+                    for i in range(HOUSES):
+                        poller = get_poller(configs[i])
+                        if i not in seen and poller and poller.current and poller.current.id == str(song):
+                            seen.add(i)
+                            delays.append((time.monotonic() - changed_at) * 1000)
+                    await asyncio.sleep(0.001)
+                delays.extend([CHANGE_INTERVAL * 1000] * (HOUSES - len(seen)))
+
+            close_pollers()
+            print(  # noqa: T201
+                f"{name:<32} requests={http.requests} "
+                f"seen={sum(d < CHANGE_INTERVAL * 1000 for d in delays)}/{len(delays)} "
+                f"median delay={statistics.median(delays):.1f}ms"
+            )
+            await asyncio.sleep(0.1)
+    finally:
+        close_pollers()
+        await transport.close_sessions()
+        ws_server.close()
+        await ws_server.wait_closed()
+        await http.stop()
+
+
+if __name__ == "__main__":
+    init_plugin(driver="~httpx+~websockets")
+    asyncio.run(main())
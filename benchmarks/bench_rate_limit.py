@@ -0,0 +1,47 @@
+"""命令频率限制的开销
+
+模拟 1000 个群组中的 10 万个用户发送命令，统计每次检查频率限制的耗时，
+以及用户闲置后令牌桶被淘汰、内存中保留的桶数。为了统计用户级别的桶，不限制服务器的频率。
+
+用法：python benchmarks/bench_rate_limit.py
+"""
+
+import random
+import time
+
+from common import init_plugin, report
+
+USERS = 100_000
+GROUPS = 1000
+CALLS = 200_000
+
+
+def main() -> None:
+    from nonebot_plugin_alisten.config import plugin_config
+    from nonebot_plugin_alisten.ratelimit import acquire, get_limiter
+
+    plugin_config.alisten_rate_server = 0
+    keys = [(str(user), f"QQClient_{user % GROUPS}") for user in range(USERS)]
+    timings = []
+    limited = 0
+    for _ in range(CALLS):
+        user_id, session_id = random.choice(keys)
+        start = time.perf_counter()
+        if acquire(user_id, session_id, "http://localhost:8080"):
+            limited += 1
+        timings.append((time.perf_counter() - start) * 1000)
+
+    report("acquire", timings)
+    print(f"{'limited':<32} {limited}/{CALLS}")  # noqa: T201
+    print(f"{'user buckets':<32} {len(get_limiter('user'))}")  # noqa: T201
+    print(f"{'group buckets':<32} {len(get_limiter('group'))}")  # noqa: T201
+
+    # 闲置足够长的时间后，下一次使用时淘汰所有已恢复满令牌的桶
+    user = get_limiter("user")
+    user.consume("late", time.monotonic() + user.burst / user.rate)
+    print(f"{'user buckets after idle':<32} {len(user)}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    init_plugin()
+    main()
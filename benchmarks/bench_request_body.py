@@ -0,0 +1,86 @@
+"""请求体构造的前后对比
+
+旧方式：每次构造 pydantic 请求模型，model_dump 后由 HTTP 客户端序列化为 JSON。
+新方式：拼接缓存的房间与用户信息字节串。
+
+用法：python benchmarks/bench_request_body.py
+"""
+
+import json
+import timeit
+
+from common import init_plugin
+from pydantic import BaseModel
+
+
+class User(BaseModel):
+    name: str
+    email: str
+
+
+class PlaylistRequest(BaseModel):
+    houseId: str
+    password: str = ""
+
+
+class PickMusicRequest(BaseModel):
+    houseId: str
+    password: str = ""
+    user: User
+    id: str = ""
+    name: str = ""
+    source: str
+
+
+def legacy_dumps(data: dict) -> bytes:
+    # 与 httpx 处理 json= 参数的方式一致
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), allow_nan=False).encode()
+
+
+def main() -> None:
+    from nonebot_plugin_alisten.envelope import house_envelope, request_body, user_field
+
+    def legacy_playlist() -> bytes:
+        return legacy_dumps(PlaylistRequest(houseId="room123", password="password123").model_dump())
+
+    def legacy_pick() -> bytes:
+        return legacy_dumps(
+            PickMusicRequest(
+                houseId="room123",
+                password="password123",
+                user=User(name="nickname", email="nickname@example.com"),
+                id="",
+                name="青花瓷",
+                source="wy",
+            ).model_dump()
+        )
+
+    def playlist() -> bytes:
+        return request_body(house_envelope("room123", "password123"))
+
+    def pick() -> bytes:
+        return request_body(
+            house_envelope("room123", "password123"),
+            user_field("nickname", "nickname@example.com"),
+            id="",
+            name="青花瓷",
+            source="wy",
+        )
+
+    assert json.loads(legacy_playlist()) == json.loads(playlist())
+    assert json.loads(legacy_pick()) == json.loads(pick())
+
+    number = 100000
+    for name, func in (
+        ("playlist (before)", legacy_playlist),
+        ("playlist (after)", playlist),
+        ("pick (before)", legacy_pick),
+        ("pick (after)", pick),
+    ):
+        seconds = min(timeit.repeat(func, number=number, repeat=5)) / number
+        print(f"{name:<20} {seconds * 1e6:8.2f}us")  # noqa: T201
+
+
+if __name__ == "__main__":
+    init_plugin()
+    main()
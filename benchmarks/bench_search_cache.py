@@ -0,0 +1,60 @@
+"""搜索结果缓存的效果
+
+50 个群组按 Zipf 分布搜索 200 个关键词，替身服务器每次搜索耗时 50 毫秒，比较开启缓存前后的延迟与服务器请求数。
+
+用法：python benchmarks/bench_search_cache.py
+"""
+
+import asyncio
+import random
+import time
+
+from common import init_plugin, make_api, report
+from server import StandInServer
+
+ROUNDS = 500
+GROUPS = 50
+KEYWORDS = [f"歌曲 {i}" for i in range(200)]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(KEYWORDS))]
+
+SEARCH = {
+    "list": [{"id": str(i), "name": f"Song {i}", "artist": f"Artist {i}"} for i in range(10)],
+    "totalSize": 10,
+}
+
+
+async def main() -> None:
+    from nonebot_plugin_alisten import transport
+    from nonebot_plugin_alisten.alisten_api import search_cache
+    from nonebot_plugin_alisten.config import plugin_config
+
+    server = StandInServer.from_json({"/music/search": SEARCH}, delay=0.05)
+    await server.start()
+    apis = [make_api(server.url, house_id=f"room{i}") for i in range(GROUPS)]
+
+    try:
+        for name, ttl in (("no cache", 0.0), ("lru+ttl", 600.0)):
+            rng = random.Random(0)
+            plugin_config.alisten_search_cache_ttl = ttl
+            await search_cache.clear()
+            search_cache.hits = search_cache.misses = 0
+            server.requests = 0
+            timings = []
+            for keyword in rng.choices(KEYWORDS, WEIGHTS, k=ROUNDS):
+                start = time.perf_counter()
+                await rng.choice(apis).music_search(keyword, "wy")
+                timings.append((time.perf_counter() - start) * 1000)
+            report(name, timings)
+            entries, size = await search_cache.stats() or (0, 0)
+            print(  # noqa: T201
+                f"{'':<32} requests={server.requests} entries={entries} "
+                f"size={size}B hits={search_cache.hits} misses={search_cache.misses}"
+            )
+    finally:
+        await transport.close_sessions()
+        await server.stop()
+
+
+if __name__ == "__main__":
+    init_plugin()
+    asyncio.run(main())
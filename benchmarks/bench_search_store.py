@@ -0,0 +1,82 @@
+"""搜索结果持久化对重启后首批搜索的影响
+
+按 Zipf 分布搜索 200 个关键词，替身服务器每次搜索耗时 50 毫秒。先搜索一轮预热缓存，
+然后模拟重启（丢弃内存中的缓存），比较不持久化与从数据库载入搜索结果时重启后的延迟与服务器请求数，
+以及写入队列对命令处理耗时的影响。
+
+用法：python benchmarks/bench_search_store.py
+"""
+
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from common import init_plugin, make_api, measure, report
+from server import StandInServer
+
+ROUNDS = 300
+KEYWORDS = [f"歌曲 {i}" for i in range(200)]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(KEYWORDS))]
+
+SEARCH = {
+    "list": [{"id": str(i), "name": f"Song {i}", "artist": f"Artist {i}"} for i in range(10)],
+    "totalSize": 10,
+}
+
+
+async def main() -> None:
+    from nonebot_plugin_orm import init_orm
+
+    from nonebot_plugin_alisten import transport
+    from nonebot_plugin_alisten.alisten_api import search_cache, search_store
+    from nonebot_plugin_alisten.backend import close_backend
+    from nonebot_plugin_alisten.config import plugin_config
+
+    await init_orm()
+    server = StandInServer.from_json({"/music/search": SEARCH}, delay=0.05)
+    await server.start()
+    api = make_api(server.url)
+
+    async def search_round(seed: int) -> list[float]:
+        rng = random.Random(seed)
+        timings = []
+        for keyword in rng.choices(KEYWORDS, WEIGHTS, k=ROUNDS):
+            start = time.perf_counter()
+            await api.music_search(keyword, "wy")
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
+
+    try:
+        for name, entries in (("restart, not persisted", 0), ("restart, persisted", 5000)):
+            plugin_config.alisten_search_persist_entries = entries
+            await search_cache.clear()
+            await search_store.clear()
+            await search_round(0)
+            await search_store.flush()
+
+            await close_backend()
+            start = time.perf_counter()
+            loaded = await search_store.load()
+            load_ms = (time.perf_counter() - start) * 1000
+            server.requests = 0
+            report(name, await search_round(1))
+            print(f"{'':<32} requests={server.requests} loaded={loaded} load={load_ms:.1f}ms")  # noqa: T201
+
+        # 未命中缓存时的命令处理耗时，持久化只是将结果加入写入队列
+        keys = iter(range(10**9))
+        for name, entries in (("miss, not persisted", 0), ("miss, persisted", 5000)):
+            plugin_config.alisten_search_persist_entries = entries
+            server.delay = 0
+            report(name, await measure(lambda: api.music_search(f"新歌 {next(keys)}", "wy"), 1000))
+        await search_store.close()
+    finally:
+        await transport.close_sessions()
+        await server.stop()
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        init_plugin(sqlalchemy_database_url=f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        asyncio.run(main())
@@ -0,0 +1,44 @@
+"""长连接会话池与单次请求的对比
+
+用法：python benchmarks/bench_session_pool.py
+"""
+
+import asyncio
+
+from common import init_plugin, make_api, measure, report
+from server import StandInServer
+
+ROUNDS = 500
+
+PLAYLIST = {
+    "playlist": [
+        {"id": str(i), "name": f"Song {i}", "source": "wy", "likes": i, "user": {"name": "u", "email": "u@u.com"}}
+        for i in range(10)
+    ]
+}
+CURRENT = {"id": "1", "name": "Song 1", "source": "wy", "user": {"name": "u", "email": "u@u.com"}}
+
+
+async def main() -> None:
+    from nonebot_plugin_alisten import transport
+
+    server = StandInServer.from_json({"/music/playlist": PLAYLIST, "/music/sync": CURRENT})
+    await server.start()
+    api = make_api(server.url)
+
+    try:
+        for name, supported in (("unpooled", False), ("pooled", True)):
+            transport._session_supported = supported
+            server.connections = server.requests = 0
+            timings = await measure(api.music_sync, ROUNDS)
+            timings += await measure(api.music_playlist, ROUNDS)
+            report(name, timings)
+            print(f"{'':<32} connections={server.connections} requests={server.requests}")  # noqa: T201
+            await transport.close_sessions()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    init_plugin()
+    asyncio.run(main())
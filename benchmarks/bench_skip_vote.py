@@ -0,0 +1,89 @@
+"""切歌投票汇总
+
+同一群组的 20 个人同时投票，替身服务器每次投票耗时 20 毫秒。比较每次投票单独提交并回复与在 0.5 秒的窗口内汇总时
+服务器同时处理的请求数、群组收到的回复数、第一条回复的耗时，以及所有投票提交完成的耗时。
+
+用法：python benchmarks/bench_skip_vote.py
+"""
+
+import asyncio
+import time
+
+from common import init_plugin, make_api
+from server import StandInServer
+
+VOTERS = 20
+WINDOW = 0.5
+
+
+class CountingServer(StandInServer):
+    """记录同时处理的最大请求数"""
+
+    in_flight = 0
+    max_in_flight = 0
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        original = reader.readline
+
+        async def readline() -> bytes:
+            line = await original()
+            if line.startswith(b"POST"):
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            return line
+
+        reader.readline = readline  # type: ignore[method-assign]
+        drain = writer.drain
+
+        async def drained() -> None:
+            await drain()
+            self.in_flight -= 1
+
+        writer.drain = drained  # type: ignore[method-assign]
+        await super()._handle(reader, writer)
+
+
+async def main() -> None:
+    from nonebot_plugin_alisten import transport
+    from nonebot_plugin_alisten.config import plugin_config
+    from nonebot_plugin_alisten.skipvote import vote
+
+    server = CountingServer.from_json({"/music/skip/vote": {"current_votes": 1, "required_votes": 30}}, delay=0.02)
+    await server.start()
+    try:
+        apis = [make_api(server.url) for _ in range(VOTERS)]
+
+        start = time.perf_counter()
+        await asyncio.gather(*(api.music_skip_vote() for api in apis))
+        elapsed = time.perf_counter() - start
+        print(  # noqa: T201
+            f"{'reply per vote':<32} replies={VOTERS:<3} max_in_flight={server.max_in_flight:<3} "
+            f"submitted={elapsed * 1000:.0f}ms"
+        )
+
+        plugin_config.alisten_skip_window = WINDOW
+        server.max_in_flight = 0
+        first = 0.0
+
+        async def first_vote():
+            nonlocal first
+            result = await vote(apis[0])
+            first = time.perf_counter() - start
+            return result
+
+        start = time.perf_counter()
+        results = await asyncio.gather(first_vote(), *(vote(api) for api in apis[1:]))
+        elapsed = time.perf_counter() - start
+        replies = sum(result is not None for result in results)
+        print(  # noqa: T201
+            f"{'aggregated':<32} replies={replies:<3} max_in_flight={server.max_in_flight:<3} "
+            f"first={first * 1000:.0f}ms replied={elapsed * 1000:.0f}ms"
+        )
+    finally:
+        await transport.close_sessions()
+        await server.stop()
+
+
+if __name__ == "__main__":
+    init_plugin()
+    asyncio.run(main())
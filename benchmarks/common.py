@@ -0,0 +1,55 @@
+"""基准测试公共工具"""
+
+import statistics
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, cast
+
+import nonebot
+
+if TYPE_CHECKING:
+    from nonebot_plugin_alisten.alisten_api import AlistenAPI
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+
+def init_plugin(**config: Any) -> None:
+    """初始化 NoneBot 并加载插件（不触发启动钩子）"""
+    config.setdefault("driver", "~httpx")
+    nonebot.init(alembic_startup_check=False, log_level="WARNING", **config)
+    nonebot.load_plugin("nonebot_plugin_alisten")
+
+
+def make_api(server_url: str, house_id: str = "room123", house_password: str = "password123") -> "AlistenAPI":
+    from nonebot_plugin_alisten.alisten_api import AlistenAPI
+    from nonebot_plugin_alisten.models import AlistenConfig
+
+    config = AlistenConfig(
+        session_id="QQClient_10000",
+        server_url=server_url,
+        house_id=house_id,
+        house_password=house_password,
+    )
+    user_session = SimpleNamespace(user_name="nickname", user_email="nickname@example.com")
+    return AlistenAPI(config=config, user_session=cast("Any", user_session))
+
+
+async def measure(func: Callable[[], Awaitable[object]], rounds: int) -> list[float]:
+    """依次执行 rounds 次，返回每次耗时（毫秒）"""
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name: str, timings: list[float]) -> None:
+    timings = sorted(timings)
+    p50 = statistics.median(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    print(f"{name:<32} n={len(timings):<6} p50={p50:8.3f}ms p95={p95:8.3f}ms p99={p99:8.3f}ms")  # noqa: T201
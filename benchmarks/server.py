@@ -0,0 +1,79 @@
+"""本地 Alisten 替身服务器
+
+仅实现基准测试需要的最小 HTTP/1.1 子集：支持 keep-alive，按路径返回预设的 JSON，
+并统计连接数与请求数。
+"""
+
+import asyncio
+import json
+import random
+from dataclasses import dataclass, field
+
+
+@dataclass
+class StandInServer:
+    routes: dict[str, bytes]
+    """路径 -> 响应体"""
+    delay: float = 0.0
+    """每个请求的处理延迟（秒）"""
+    tail_ratio: float = 0.0
+    """慢响应的比例"""
+    tail_delay: float = 0.0
+    """慢响应额外的延迟（秒）"""
+    connections: int = 0
+    requests: int = 0
+    _server: asyncio.Server | None = field(default=None, repr=False)
+
+    @classmethod
+    def from_json(cls, routes: dict[str, object], delay: float = 0.0) -> "StandInServer":
+        return cls({path: json.dumps(body).encode() for path, body in routes.items()}, delay)
+
+    @property
+    def url(self) -> str:
+        assert self._server
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while request_line := await reader.readline():
+                _, path, _ = request_line.decode().split(" ", 2)
+                headers: dict[str, str] = {}
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    key, value = line.decode().split(":", 1)
+                    headers[key.strip().lower()] = value.strip()
+                if length := int(headers.get("content-length", 0)):
+                    await reader.readexactly(length)
+
+                self.requests += 1
+                delay = self.delay
+                if random.random() < self.tail_ratio:
+                    delay += self.tail_delay
+                if delay:
+                    await asyncio.sleep(delay)
+
+                body = self.routes.get(path, b'{"error": "not found"}')
+                status = "200 OK" if path in self.routes else "404 Not Found"
+                writer.write(
+                    f"HTTP/1.1 {status}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    "\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
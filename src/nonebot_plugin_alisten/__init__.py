@@ -8,6 +8,8 @@ require("nonebot_plugin_alconna")
 require("nonebot_plugin_user")
 require("nonebot_plugin_orm")
 
+from .config import Config
+
 __plugin_meta__ = PluginMetadata(
     name="Alisten",
     description="NoneBot 听歌房插件",
@@ -37,6 +39,9 @@ __plugin_meta__ = PluginMetadata(
 /alisten config set <server_url> <house_id> [house_password]  # 设置或更新配置
 /alisten config show        # 查看当前配置
 /alisten config delete      # 删除当前配置
+/alisten config announce <开启/关闭>  # 切歌时在当前群组发送通知
+/alisten status             # 查看服务器状态
+/alisten cache clear        # 清空搜索结果缓存
 
 支持的音乐源：
 • wy: 网易云音乐（默认）
@@ -44,6 +49,7 @@ __plugin_meta__ = PluginMetadata(
 • db: Bilibili
 """,
     type="application",
+    config=Config,
     homepage="https://github.com/bihua-university/nonebot-plugin-alisten",
     supported_adapters=inherit_supported_adapters("nonebot_plugin_alconna", "nonebot_plugin_user"),
 )
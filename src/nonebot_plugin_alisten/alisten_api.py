@@ -1,19 +1,44 @@
 """Alisten 服务器 API 客户端"""
 
+import asyncio
+import hashlib
+import time
+from collections.abc import Callable
 from datetime import datetime
 from typing import TypeVar, cast
 
 from nonebot import get_driver
-from nonebot.drivers import HTTPClientMixin, Request
+from nonebot.drivers import Request, Response
 from nonebot.log import logger
 from nonebot_plugin_user import UserSession
 from pydantic import BaseModel, Field, RootModel
 
+from .breaker import BreakerState, get_breaker
+from .bulkhead import get_bulkhead
+from .cache import SWRCache, TTLCache
+from .codec import decode
+from .compression import ACCEPT_ENCODING, decode_content, record_transfer
+from .config import plugin_config
+from .envelope import house_envelope, request_body, user_field
+from .hedge import hedged
 from .models import AlistenConfig
+from .retry import RETRYABLE_STATUS_CODES, backoff, get_retry_budget
+from .search_store import SearchStore
+from .singleflight import single_flight
+from .transport import send
 
 # 定义泛型类型
 T = TypeVar("T", bound=BaseModel)
 
+driver = get_driver()
+
+SEARCH_PAGE_SIZE = 10
+"""搜索音乐时每页的数量"""
+
+
+TRANSIENT_CLIENT_ERRORS = frozenset({408, 425, 429})
+"""请求超时、请求过早、请求过多等临时的 4xx 状态码，不缓存"""
+
 
 class ErrorResponse(BaseModel):
     """错误响应"""
@@ -26,17 +51,6 @@ class User(BaseModel):
     email: str
 
 
-class PickMusicRequest(BaseModel):
-    """点歌请求"""
-
-    houseId: str
-    password: str = ""
-    user: User
-    id: str = ""
-    name: str = ""
-    source: str
-
-
 class PickMusicResponse(BaseModel):
     """点歌响应"""
 
@@ -57,19 +71,18 @@ class HouseInfo(BaseModel):
     population: int
 
 
-class HouseSearchResponse(RootModel):
-    """房间搜索响应"""
+class RawResponse(BaseModel):
+    """未解析的响应，由调用方决定是否需要解析"""
 
-    root: list[HouseInfo] = []
+    status_code: int
+    content: bytes
+    etag: str | None = None
 
 
-class DeleteMusicRequest(BaseModel):
-    """删除音乐请求"""
+class HouseSearchResponse(RootModel):
+    """房间搜索响应"""
 
-    houseId: str
-    password: str = ""
-    id: str
-    """虽然叫 ID 但其实是音乐名称"""
+    root: list[HouseInfo] = []
 
 
 class DeleteMusicResponse(BaseModel):
@@ -78,13 +91,6 @@ class DeleteMusicResponse(BaseModel):
     name: str
 
 
-class PlaylistRequest(BaseModel):
-    """获取播放列表请求"""
-
-    houseId: str
-    password: str = ""
-
-
 class PlaylistItem(BaseModel):
     """播放列表项"""
 
@@ -101,27 +107,12 @@ class PlaylistResponse(BaseModel):
     playlist: list[PlaylistItem] | None = None
 
 
-class HouseUserRequest(BaseModel):
-    """获取房间用户请求"""
-
-    houseId: str
-    password: str = ""
-
-
 class HouseUserResponse(RootModel):
     """房间用户列表响应"""
 
     root: list[User] = []
 
 
-class VoteSkipRequest(BaseModel):
-    """投票跳过请求"""
-
-    houseId: str
-    password: str = ""
-    user: User
-
-
 class VoteSkipResponse(BaseModel):
     """投票跳过响应"""
 
@@ -129,15 +120,6 @@ class VoteSkipResponse(BaseModel):
     required_votes: int | None = None
 
 
-class GoodMusicRequest(BaseModel):
-    """点赞音乐请求"""
-
-    houseId: str
-    password: str = ""
-    index: int
-    name: str
-
-
 class GoodMusicResponse(BaseModel):
     """点赞音乐响应"""
 
@@ -145,30 +127,12 @@ class GoodMusicResponse(BaseModel):
     likes: int
 
 
-class PlayModeRequest(BaseModel):
-    """设置播放模式请求"""
-
-    houseId: str
-    password: str = ""
-    mode: str
-
-
 class PlayModeResponse(BaseModel):
     """设置播放模式响应"""
 
     mode: str
 
 
-class SearchMusicRequest(BaseModel):
-    """搜索音乐请求"""
-
-    houseId: str
-    password: str = ""
-    name: str
-    source: str
-    pageSize: int = 10
-
-
 class SearchMusicItem(BaseModel):
     """搜索音乐结果项"""
 
@@ -184,13 +148,6 @@ class SearchMusicResponse(BaseModel):
     totalSize: int
 
 
-class CurrentMusicRequest(BaseModel):
-    """获取当前音乐请求"""
-
-    houseId: str
-    password: str = ""
-
-
 class CurrentMusicResponse(BaseModel):
     """当前音乐响应"""
 
@@ -200,15 +157,136 @@ class CurrentMusicResponse(BaseModel):
     user: User
 
 
+def is_deterministic(status_code: int) -> bool:
+    """错误是否与服务器的临时状态无关，重新请求也会得到相同的结果"""
+    return 400 <= status_code < 500 and status_code not in TRANSIENT_CLIENT_ERRORS
+
+
+# 播放列表缓存一小段时间，通过同一插件发出的写操作会立即使对应房间的缓存失效，用户总能马上看到自己的修改
+playlist_cache = TTLCache("playlist", PlaylistResponse)
+"""(服务器地址, 房间 ID, 房间密码的摘要) -> 播放列表"""
+search_cache = TTLCache("search", SearchMusicResponse)
+"""(服务器地址, 音乐源, 关键词, 每页数量) -> 搜索结果，在所有群组间共享"""
+current_cache = SWRCache("current", CurrentMusicResponse)
+"""(服务器地址, 房间 ID, 房间密码的摘要) -> 当前音乐"""
+error_cache = TTLCache("error", dict[str, ErrorResponse])
+"""(服务器地址, 房间 ID) -> {API 端点与房间密码的摘要: 确定性的错误响应}"""
+search_store = SearchStore(search_cache)
+"""搜索结果的持久化存储"""
+
+_house_digests: dict[tuple[str, str], set[str]] = {}
+"""(服务器地址, 房间 ID) -> 用过的房间密码的摘要，房间失效时清除每个密码的缓存"""
+
+
+def password_digest(password: str) -> str:
+    """房间密码的摘要，不同密码的结果分别缓存，且不保存密码原文"""
+    return hashlib.blake2b(password.encode(), digest_size=8).hexdigest()
+
+
+def house_cache_key(server_url: str, house_id: str, house_password: str) -> tuple[str, str, str]:
+    """播放列表与当前音乐的缓存键
+
+    密码错误的群组不能读到其他群组缓存的结果，因此键中包含房间密码的摘要
+    """
+    digest = password_digest(house_password)
+    _house_digests.setdefault((server_url, house_id), set()).add(digest)
+    return server_url, house_id, digest
+
+
+house_invalidated: list[Callable[[str, str], None]] = []
+"""房间的状态可能已经改变时依次调用，参数为服务器地址与房间 ID"""
+
+
+async def invalidate_house(server_url: str, house_id: str) -> None:
+    """房间的状态可能已经改变，清除房间相关的缓存"""
+    for digest in _house_digests.get((server_url, house_id), ()):
+        key = (server_url, house_id, digest)
+        await playlist_cache.invalidate(key)
+        await current_cache.invalidate(key)
+    await error_cache.invalidate((server_url, house_id))
+    for callback in house_invalidated:
+        callback(server_url, house_id)
+
+
+@driver.on_startup
+async def _() -> None:
+    try:
+        await search_store.load()
+    except Exception:
+        logger.exception("载入搜索结果失败")
+
+
+@driver.on_shutdown
+async def _() -> None:
+    current_cache.cancel_refreshes()
+    try:
+        await search_store.close()
+    except Exception:
+        logger.exception("写入搜索结果失败")
+
+
 class AlistenAPI:
     """Alisten API 客户端"""
 
-    def __init__(self, config: AlistenConfig, user_session: UserSession):
+    def __init__(
+        self,
+        config: AlistenConfig,
+        user_session: UserSession | None = None,
+        deadline: float | None = None,
+        background: bool = False,
+    ):
         self.config = config
         self.user_session = user_session
+        """发出命令的用户，后台任务只发送不需要用户信息的请求，此时为 None"""
+        self.deadline = deadline
+        """命令的截止时间（time.monotonic），同一命令内的所有请求共享"""
+        self.background = background
+        """是否为后台轮询等可以放弃的请求：不排队、不重试，服务器熔断或没有空闲名额时直接放弃，
+        失败不计入熔断器，不占用用户命令的名额"""
+
+    @property
+    def _envelope(self) -> bytes:
+        """请求体中的房间信息部分"""
+        return house_envelope(self.config.house_id, self.config.house_password)
+
+    @property
+    def _user(self) -> bytes:
+        """请求体中的用户信息字段"""
+        assert self.user_session is not None, "该请求需要用户信息"
+        return user_field(self.user_session.user_name, self.user_session.user_email or "")
+
+    @property
+    def _house_key(self) -> tuple[str, str]:
+        """房间的键，同一服务器的同一房间共享"""
+        return self.config.server_url, self.config.house_id
+
+    @property
+    def _cache_key(self) -> tuple[str, str, str]:
+        """播放列表与当前音乐的缓存键，同一房间使用相同密码的群组共享"""
+        return house_cache_key(self.config.server_url, self.config.house_id, self.config.house_password)
+
+    def _error_key(self, endpoint: str) -> str:
+        """错误缓存中的键，不同密码分别缓存"""
+        return f"{endpoint}:{password_digest(self.config.house_password)}"
+
+    def _get_timeout(self, endpoint: str) -> float:
+        """获取本次请求的超时时间，不超过命令剩余的时间"""
+        timeout = plugin_config.endpoint_timeout(endpoint)
+        if self.deadline is not None:
+            timeout = min(timeout, self.deadline - time.monotonic())
+        return timeout
 
     async def _make_request(
-        self, method: str, endpoint: str, response_type: type[T], error_msg: str, json_data: dict | None = None
+        self,
+        method: str,
+        endpoint: str,
+        response_type: type[T],
+        error_msg: str,
+        content: bytes | None = None,
+        headers: dict[str, str] | None = None,
+        idempotent: bool = False,
+        hedge: bool = False,
+        cache_errors: bool = False,
     ) -> T | ErrorResponse:
         """通用的API请求处理方法
 
@@ -217,30 +295,193 @@ class AlistenAPI:
             endpoint: API端点
             response_type: 期望的响应类型
             error_msg: 错误时的提示信息
-            json_data: POST请求的JSON数据
+            content: POST请求的JSON请求体
+            headers: 额外的请求头
+            idempotent: 是否为幂等请求，幂等请求遇到网络错误、超时或网关错误时会重试，
+                且相同的并发请求会合并为一次
+            hedge: 是否在响应较慢时发送对冲请求，仅对幂等请求生效，需开启 alisten_hedge
+            cache_errors: 是否短时间缓存房间不存在等确定性的错误，仅对幂等且请求体只包含房间信息的请求生效
 
         Returns:
             成功时返回指定类型的响应，失败时返回ErrorResponse
         """
+        if not idempotent:
+            # 写操作无论成功与否都可能改变了播放列表和当前音乐
+            try:
+                return await self._send_request(method, endpoint, response_type, error_msg, content, headers)
+            finally:
+                await invalidate_house(*self._house_key)
+
+        if cache_errors:
+            errors = await error_cache.get(self._house_key) or {}
+            if (error := errors.get(self._error_key(endpoint))) is not None:
+                return error
+
+        key = (
+            self.config.server_url,
+            method,
+            endpoint,
+            content,
+            frozenset(headers.items()) if headers else None,
+            response_type,
+            # 后台请求可能被直接放弃，不与用户命令的请求合并
+            self.background,
+        )
+        # 合并的请求只受端点超时时间的限制，每个调用者按自己命令剩余的时间等待结果，
+        # 后加入的调用者不会受先发起请求的命令剩余时间的影响
+        remaining = None if self.deadline is None else self.deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            return ErrorResponse(error="命令处理超时，请稍后重试")
+        shared = AlistenAPI(config=self.config, user_session=self.user_session, background=self.background)
         try:
-            driver = cast("HTTPClientMixin", get_driver())
-
-            headers = {"Content-Type": "application/json"}
-            request = Request(
-                method=method,
-                url=f"{self.config.server_url}{endpoint}",
-                headers=headers,
-                json=json_data,
-            )
-
-            response = await driver.request(request)
-            if not response.content:
+            async with asyncio.timeout(remaining):
+                return await single_flight(
+                    key,
+                    lambda: shared._send_request(
+                        method,
+                        endpoint,
+                        response_type,
+                        error_msg,
+                        content,
+                        headers,
+                        retry=not self.background,
+                        hedge=hedge and not self.background,
+                        cache_errors=cache_errors,
+                    ),
+                )
+        except TimeoutError:
+            return ErrorResponse(error="命令处理超时，请稍后重试")
+
+    async def _send_request(
+        self,
+        method: str,
+        endpoint: str,
+        response_type: type[T],
+        error_msg: str,
+        content: bytes | None = None,
+        headers: dict[str, str] | None = None,
+        retry: bool = False,
+        hedge: bool = False,
+        cache_errors: bool = False,
+    ) -> T | ErrorResponse:
+        """发送请求，失败时按需重试"""
+        server_url = self.config.server_url
+        house = self._house_key
+        error_version = error_cache.version(house)
+        breaker = get_breaker(server_url)
+        bulkhead = get_bulkhead(server_url)
+        budget = get_retry_budget(server_url)
+        hedge = hedge and plugin_config.alisten_hedge
+        attempt = 0
+
+        def record_failure(error: str) -> None:
+            if not self.background:
+                breaker.record_failure(error)
+
+        while True:
+            timeout = self._get_timeout(endpoint)
+            if timeout <= 0:
+                return ErrorResponse(error="命令处理超时，请稍后重试")
+            # 后台请求不作为熔断后的探测请求，也不排队
+            available = breaker.state == BreakerState.CLOSED if self.background else breaker.allow()
+            if not available:
+                return ErrorResponse(error=f"{error_msg}，服务器暂时不可用，请稍后重试")
+            acquired = bulkhead.try_acquire() if self.background else await bulkhead.acquire(timeout)
+            if not acquired:
+                return ErrorResponse(error=f"{error_msg}，服务繁忙，请稍后再试")
+
+            try:
+                # 排队的时间计入命令的总时限
+                timeout = self._get_timeout(endpoint)
+                if timeout <= 0:
+                    return ErrorResponse(error="命令处理超时，请稍后重试")
+                request = Request(
+                    method=method,
+                    url=f"{server_url}{endpoint}",
+                    headers={
+                        "Content-Type": "application/json",
+                        "Accept-Encoding": ACCEPT_ENCODING if plugin_config.alisten_compression else "identity",
+                        **(headers or {}),
+                    },
+                    content=content,
+                    timeout=timeout,
+                )
+
+                async with asyncio.timeout(timeout):
+                    if hedge:
+                        response = await hedged(server_url, endpoint, lambda: send(server_url, request))
+                    else:
+                        response = await send(server_url, request)
+                body = decode_content(response)
+                record_transfer(server_url, endpoint, response, body)
+            except TimeoutError:
+                logger.warning(f"Alisten API {error_msg}: {endpoint} 超过 {timeout:.1f} 秒未响应")
+                # 命令剩余的时间不足时超时不代表服务器有问题，只有端点的超时时间用完才计入失败
+                if timeout >= plugin_config.endpoint_timeout(endpoint):
+                    record_failure(f"{endpoint} 请求超时")
+                error = ErrorResponse(error=f"{error_msg}，服务器响应超时，请稍后重试")
+            except Exception as e:
+                logger.exception(f"Alisten API {error_msg}")
+                record_failure(f"{endpoint} {type(e).__name__}: {e}")
+                error = ErrorResponse(error=f"{error_msg}，请稍后重试")
+            else:
+                result = self._parse_response(response, body, response_type, error_msg)
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    if not self.background:
+                        breaker.record_success()
+                        budget.deposit()
+                    # 响应内容为空时无法确定是服务器给出的错误，不缓存
+                    if (
+                        cache_errors
+                        and body
+                        and isinstance(result, ErrorResponse)
+                        and is_deterministic(response.status_code)
+                    ):
+                        errors = await error_cache.get(house) or {}
+                        await error_cache.set(
+                            house,
+                            {**errors, self._error_key(endpoint): result},
+                            plugin_config.alisten_error_cache_ttl,
+                            error_version,
+                        )
+                    return result
+                record_failure(f"{endpoint} HTTP {response.status_code}")
+                error = cast("ErrorResponse", result)
+            finally:
+                bulkhead.release()
+
+            if not retry or attempt >= plugin_config.alisten_retry_attempts:
+                return error
+            delay = backoff(attempt)
+            if self.deadline is not None and time.monotonic() + delay >= self.deadline:
+                return error
+            if not budget.withdraw():
+                logger.debug(f"Alisten API {server_url} 重试额度已耗尽")
+                return error
+
+            attempt += 1
+            logger.debug(f"Alisten API {endpoint} 将在 {delay:.2f} 秒后进行第 {attempt} 次重试")
+            await asyncio.sleep(delay)
+
+    def _parse_response(
+        self, response: Response, body: bytes, response_type: type[T], error_msg: str
+    ) -> T | ErrorResponse:
+        """解析解压后的响应内容"""
+        status_code = response.status_code
+        etag = response.headers.get("ETag")
+        try:
+            if response_type is RawResponse and status_code == 304:
+                return cast("T", RawResponse(status_code=status_code, content=b"", etag=etag))
+
+            if not body:
                 return ErrorResponse(error="响应内容为空，请稍后重试")
 
-            if response.status_code == 200:
-                return response_type.model_validate_json(response.content)
+            if status_code == 200:
+                if response_type is RawResponse:
+                    return cast("T", RawResponse(status_code=status_code, content=body, etag=etag))
+                return decode(response_type, body)
             else:
-                return ErrorResponse.model_validate_json(response.content)
+                return decode(ErrorResponse, body)
 
         except Exception:
             logger.exception(f"Alisten API {error_msg}")
@@ -252,17 +493,14 @@ class AlistenAPI:
         Returns:
             房间用户列表或错误信息
         """
-        request_data = HouseUserRequest(
-            houseId=self.config.house_id,
-            password=self.config.house_password,
-        )
-
         result = await self._make_request(
             method="POST",
             endpoint="/house/houseuser",
             response_type=HouseUserResponse,
             error_msg="获取房间用户请求失败",
-            json_data=request_data.model_dump(),
+            content=request_body(self._envelope),
+            idempotent=True,
+            cache_errors=True,
         )
 
         if isinstance(result, ErrorResponse):
@@ -281,6 +519,7 @@ class AlistenAPI:
             endpoint="/house/search",
             response_type=HouseSearchResponse,
             error_msg="房间搜索请求失败",
+            idempotent=True,
         )
 
         if isinstance(result, ErrorResponse):
@@ -288,6 +527,24 @@ class AlistenAPI:
 
         return result.root
 
+    async def house_search_raw(self, etag: str | None = None) -> RawResponse | ErrorResponse:
+        """获取未解析的房间列表
+
+        Args:
+            etag: 上次响应的 ETag，房间列表未变化时服务器返回 304
+
+        Returns:
+            房间列表的原始响应或错误信息
+        """
+        return await self._make_request(
+            method="GET",
+            endpoint="/house/search",
+            response_type=RawResponse,
+            error_msg="房间搜索请求失败",
+            headers={"If-None-Match": etag} if etag else None,
+            idempotent=True,
+        )
+
     async def music_delete(self, id: str) -> DeleteMusicResponse | ErrorResponse:
         """从播放列表中删除指定音乐
 
@@ -297,18 +554,12 @@ class AlistenAPI:
         Returns:
             删除操作结果
         """
-        request_data = DeleteMusicRequest(
-            houseId=self.config.house_id,
-            password=self.config.house_password,
-            id=id,
-        )
-
         return await self._make_request(
             method="POST",
             endpoint="/music/delete",
             response_type=DeleteMusicResponse,
             error_msg="删除音乐请求失败",
-            json_data=request_data.model_dump(),
+            content=request_body(self._envelope, id=id),
         )
 
     async def music_good(self, index: int, name: str) -> GoodMusicResponse | ErrorResponse:
@@ -321,19 +572,12 @@ class AlistenAPI:
         Returns:
             点赞结果
         """
-        request_data = GoodMusicRequest(
-            houseId=self.config.house_id,
-            password=self.config.house_password,
-            index=index,
-            name=name,
-        )
-
         return await self._make_request(
             method="POST",
             endpoint="/music/good",
             response_type=GoodMusicResponse,
             error_msg="点赞音乐请求失败",
-            json_data=request_data.model_dump(),
+            content=request_body(self._envelope, index=index, name=name),
         )
 
     async def music_pick(self, id: str, name: str, source: str) -> PickMusicResponse | ErrorResponse:
@@ -347,21 +591,12 @@ class AlistenAPI:
         Returns:
             点歌结果
         """
-        request_data = PickMusicRequest(
-            houseId=self.config.house_id,
-            password=self.config.house_password,
-            user=User(name=self.user_session.user_name, email=self.user_session.user_email or ""),
-            id=id,
-            name=name,
-            source=source,
-        )
-
         return await self._make_request(
             method="POST",
             endpoint="/music/pick",
             response_type=PickMusicResponse,
             error_msg="点歌请求失败",
-            json_data=request_data.model_dump(),
+            content=request_body(self._envelope, self._user, id=id, name=name, source=source),
         )
 
     async def music_playlist(self) -> PlaylistResponse | ErrorResponse:
@@ -370,18 +605,24 @@ class AlistenAPI:
         Returns:
             播放列表详情，包含歌曲信息和点赞数
         """
-        request_data = PlaylistRequest(
-            houseId=self.config.house_id,
-            password=self.config.house_password,
-        )
+        key = self._cache_key
+        if (cached := await playlist_cache.get(key)) is not None:
+            return cached
 
-        return await self._make_request(
+        version = playlist_cache.version(key)
+        result = await self._make_request(
             method="POST",
             endpoint="/music/playlist",
             response_type=PlaylistResponse,
             error_msg="获取播放列表请求失败",
-            json_data=request_data.model_dump(),
+            content=request_body(self._envelope),
+            idempotent=True,
+            hedge=True,
+            cache_errors=True,
         )
+        if isinstance(result, PlaylistResponse):
+            await playlist_cache.set(key, result, plugin_config.alisten_playlist_ttl, version)
+        return result
 
     async def music_playmode(self, mode: str) -> PlayModeResponse | ErrorResponse:
         """设置房间播放模式
@@ -392,18 +633,12 @@ class AlistenAPI:
         Returns:
             设置结果
         """
-        request_data = PlayModeRequest(
-            houseId=self.config.house_id,
-            password=self.config.house_password,
-            mode=mode,
-        )
-
         return await self._make_request(
             method="POST",
             endpoint="/music/playmode",
             response_type=PlayModeResponse,
             error_msg="设置播放模式请求失败",
-            json_data=request_data.model_dump(),
+            content=request_body(self._envelope, mode=mode),
         )
 
     async def music_search(self, name: str, source: str) -> SearchMusicResponse | ErrorResponse:
@@ -416,20 +651,22 @@ class AlistenAPI:
         Returns:
             搜索结果列表
         """
-        request_data = SearchMusicRequest(
-            houseId=self.config.house_id,
-            password=self.config.house_password,
-            name=name,
-            source=source,
-        )
+        key = (self.config.server_url, source, " ".join(name.split()).casefold(), SEARCH_PAGE_SIZE)
+        if (cached := await search_cache.get(key)) is not None:
+            return cached
 
-        return await self._make_request(
+        result = await self._make_request(
             method="POST",
             endpoint="/music/search",
             response_type=SearchMusicResponse,
             error_msg="搜索音乐请求失败",
-            json_data=request_data.model_dump(),
+            content=request_body(self._envelope, name=name, source=source, pageSize=SEARCH_PAGE_SIZE),
+            idempotent=True,
         )
+        if isinstance(result, SearchMusicResponse):
+            await search_cache.set(key, result, plugin_config.alisten_search_cache_ttl)
+            search_store.put(key, result, plugin_config.alisten_search_cache_ttl)
+        return result
 
     async def music_skip_vote(self) -> VoteSkipResponse | ErrorResponse:
         """投票跳过当前播放的歌曲
@@ -437,18 +674,12 @@ class AlistenAPI:
         Returns:
             投票结果，包含当前票数和所需票数
         """
-        request_data = VoteSkipRequest(
-            houseId=self.config.house_id,
-            password=self.config.house_password,
-            user=User(name=self.user_session.user_name, email=self.user_session.user_email or ""),
-        )
-
         return await self._make_request(
             method="POST",
             endpoint="/music/skip/vote",
             response_type=VoteSkipResponse,
             error_msg="投票跳过请求失败",
-            json_data=request_data.model_dump(),
+            content=request_body(self._envelope, self._user),
         )
 
     async def music_sync(self) -> CurrentMusicResponse | ErrorResponse:
@@ -457,15 +688,45 @@ class AlistenAPI:
         Returns:
             当前音乐详细信息
         """
-        request_data = CurrentMusicRequest(
-            houseId=self.config.house_id,
-            password=self.config.house_password,
-        )
-
         return await self._make_request(
             method="POST",
             endpoint="/music/sync",
             response_type=CurrentMusicResponse,
             error_msg="获取当前音乐请求失败",
-            json_data=request_data.model_dump(),
+            content=request_body(self._envelope),
+            idempotent=True,
+            hedge=True,
+            cache_errors=True,
         )
+
+    async def music_current(self) -> tuple[CurrentMusicResponse, float] | ErrorResponse:
+        """获取当前正在播放的音乐信息，允许使用稍旧的数据
+
+        缓存超过新鲜期但未超过最长过期时间时直接返回，同时在后台刷新
+
+        Returns:
+            (当前音乐详细信息, 数据的时长（秒）)
+        """
+        key = self._cache_key
+        fresh = plugin_config.alisten_current_fresh
+        max_age = fresh + plugin_config.alisten_current_stale
+        if (cached := await current_cache.get_with_age(key, max_age)) is not None:
+            if cached[1] >= fresh:
+                # 后台刷新不受命令时限的限制
+                background_api = AlistenAPI(config=self.config, user_session=self.user_session)
+                current_cache.refresh(key, background_api._fetch_current, max_age)
+            return cached
+
+        version = current_cache.version(key)
+        result = await self.music_sync()
+        if isinstance(result, ErrorResponse):
+            return result
+        await current_cache.store(key, result, max_age, version)
+        return result, 0.0
+
+    async def _fetch_current(self) -> CurrentMusicResponse | None:
+        result = await self.music_sync()
+        if isinstance(result, ErrorResponse):
+            logger.warning(f"刷新当前音乐失败: {self.config.server_url} {result.error}")
+            return None
+        return result
@@ -0,0 +1,125 @@
+"""切歌通知
+
+开启切歌通知的群组在房间的当前音乐变化时收到一条消息。变化由房间的轮询发现（见 poller 模块），
+绑定同一房间的所有群组共用一次检测。
+
+通知通过发送调度器发出：同一个 Bot 的通知依次发送，一批通知在 alisten_announce_window 秒内分散发出，
+避免大量群组同时发送触发平台的频率限制。通知发出前房间再次切歌时，该群组只发送最新的一条。
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from nonebot import get_driver
+from nonebot.log import logger
+from nonebot_plugin_alconna import Target, UniMessage
+
+from .alisten_api import CurrentMusicResponse
+from .config import plugin_config
+from .constants import SOURCE_NAMES_FULL
+from .models import AlistenConfig
+
+driver = get_driver()
+
+
+@dataclass
+class Announcement:
+    """待发送的通知"""
+
+    target: Target
+    message: str
+
+
+class SendScheduler:
+    """按 Bot 分组的通知发送队列"""
+
+    def __init__(self) -> None:
+        self._pending: dict[str, OrderedDict[str, Announcement]] = {}
+        """Bot ID -> (群组会话 ID -> 通知)，按提交顺序排列"""
+        self._deadlines: dict[str, float] = {}
+        """Bot ID -> 窗口的结束时间（time.monotonic）"""
+        self._tasks: dict[str, asyncio.Task[None]] = {}
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        """被更新的通知取代而未发送的数量"""
+
+    def __len__(self) -> int:
+        return sum(map(len, self._pending.values()))
+
+    def submit(self, session_id: str, announcement: Announcement) -> None:
+        """提交通知，该群组尚未发出的通知会被取代，但保留原来的发送顺序
+
+        每次提交都会将窗口的结束时间推迟到 alisten_announce_window 秒后，新一批通知同样在整个窗口内分散发出。
+        """
+        bot_id = announcement.target.self_id or ""
+        pending = self._pending.setdefault(bot_id, OrderedDict())
+        if session_id in pending:
+            self.dropped += 1
+        pending[session_id] = announcement
+        self._deadlines[bot_id] = time.monotonic() + plugin_config.alisten_announce_window
+        if bot_id not in self._tasks:
+            self._tasks[bot_id] = asyncio.create_task(self._run(bot_id, pending))
+
+    async def _run(self, bot_id: str, pending: OrderedDict[str, Announcement]) -> None:
+        # 第一条立即发送，剩下的在窗口内均匀分散，窗口已过时按最短间隔发送
+        try:
+            while pending:
+                _, announcement = pending.popitem(last=False)
+                await self._send(announcement)
+                if not pending:
+                    break
+                remaining = self._deadlines[bot_id] - time.monotonic()
+                await asyncio.sleep(max(plugin_config.alisten_announce_interval, remaining / len(pending)))
+        finally:
+            if self._tasks.get(bot_id) is asyncio.current_task():
+                del self._tasks[bot_id]
+                if not pending:
+                    del self._pending[bot_id]
+                    del self._deadlines[bot_id]
+
+    async def _send(self, announcement: Announcement) -> None:
+        try:
+            await UniMessage.text(announcement.message).send(target=announcement.target)
+        except Exception as e:
+            self.failed += 1
+            logger.warning(f"发送切歌通知失败: {announcement.target.id} {type(e).__name__}: {e}")
+        else:
+            self.sent += 1
+
+    def close(self) -> None:
+        """停止发送并丢弃所有未发送的通知"""
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+        self._pending.clear()
+        self._deadlines.clear()
+
+
+scheduler = SendScheduler()
+
+
+def format_announcement(current: CurrentMusicResponse) -> str:
+    source_name = SOURCE_NAMES_FULL.get(current.source, current.source)
+    msg = f"切歌啦，正在播放：{current.name}\n来源：{source_name}"
+    if current.user.name:
+        msg += f"\n点歌者：{current.user.name}"
+    return msg
+
+
+def announce(configs: Iterable[AlistenConfig], current: CurrentMusicResponse) -> None:
+    """向开启了切歌通知的群组发送当前音乐"""
+    message = None
+    for config in configs:
+        if config.announce_target is None:
+            continue
+        message = message or format_announcement(current)
+        scheduler.submit(config.session_id, Announcement(Target.load(config.announce_target), message))
+
+
+@driver.on_shutdown
+def close_scheduler() -> None:
+    scheduler.close()
@@ -0,0 +1,430 @@
+"""缓存后端
+
+插件缓存的上游数据（播放列表、当前音乐、搜索结果、房间目录等）都通过缓存后端存取。
+sqlite 与 redis 后端存入的值是 codec.pack 序列化后的字节，memory 后端直接保存对象。
+
+- memory: 进程内存，每个命名空间分别按最近使用淘汰（默认）
+- sqlite: 插件缓存目录下的 SQLite 文件，同一台机器上的多个进程共享
+- redis: Redis 协议的服务器，多台机器上的多个进程共享
+
+缓存后端出错时由调用方记录日志并视为未命中，不影响命令的处理。
+"""
+
+import asyncio
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+from urllib.parse import unquote, urlsplit
+
+from nonebot import get_driver
+from nonebot_plugin_localstore import get_plugin_cache_dir
+
+from .config import plugin_config
+
+KEY_PREFIX = "alisten:"
+"""所有缓存键的前缀"""
+
+driver = get_driver()
+
+
+class CacheBackend(ABC):
+    """缓存后端"""
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None:
+        """获取未过期的值"""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        """写入值，ttl 秒后过期"""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """删除值"""
+
+    @abstractmethod
+    async def clear(self, prefix: str) -> int:
+        """删除以 prefix 开头的所有键，返回删除的数量"""
+
+    @abstractmethod
+    async def stats(self, prefix: str) -> tuple[int, int]:
+        """以 prefix 开头的键的数量与值的总字节数"""
+
+    async def close(self) -> None:
+        """释放连接等资源"""
+
+
+class MemoryBackend(CacheBackend):
+    """进程内存后端
+
+    值按原样保存，不经过序列化，读取时返回的是写入的同一个对象。
+    每个命名空间（键中最后一个冒号之前的部分）分别限制条目数与总字节数，
+    超出上限时淘汰该命名空间中最久未使用的条目，条目过期后视为不存在。
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._namespaces: dict[str, OrderedDict[str, tuple[float, Any, int]]] = {}
+        """命名空间 -> {键 -> (过期时间, 值, 字节数)}，按使用时间从旧到新排列"""
+        self._sizes: dict[str, int] = {}
+        """命名空间 -> 所有值的总字节数"""
+
+    def __len__(self) -> int:
+        return sum(map(len, self._namespaces.values()))
+
+    @property
+    def size(self) -> int:
+        """所有值的总字节数"""
+        return sum(self._sizes.values())
+
+    async def get(self, key: str) -> Any:
+        entries = self._namespaces.get(namespace_of(key))
+        if entries is None or (entry := entries.get(key)) is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self._remove(key)
+            return None
+        entries.move_to_end(key)
+        return entry[1]
+
+    async def set(self, key: str, value: Any, ttl: float, size: int | None = None) -> None:
+        """写入值，ttl 秒后过期
+
+        Args:
+            size: 值占用的字节数，不提供时按 len(value) 计算
+        """
+        await self.delete(key)
+        if size is None:
+            size = len(value)
+        if ttl <= 0 or size > self.max_bytes or self.max_entries <= 0:
+            return
+
+        namespace = namespace_of(key)
+        entries = self._namespaces.setdefault(namespace, OrderedDict())
+        entries[key] = (time.monotonic() + ttl, value, size)
+        self._sizes[namespace] = self._sizes.get(namespace, 0) + size
+        while len(entries) > self.max_entries or self._sizes[namespace] > self.max_bytes:
+            self._remove(next(iter(entries)))
+
+    async def delete(self, key: str) -> None:
+        entries = self._namespaces.get(namespace_of(key))
+        if entries is not None and key in entries:
+            self._remove(key)
+
+    async def clear(self, prefix: str) -> int:
+        keys = [key for entries in self._namespaces.values() for key in entries if key.startswith(prefix)]
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    async def stats(self, prefix: str) -> tuple[int, int]:
+        now = time.monotonic()
+        sizes = [
+            size
+            for entries in self._namespaces.values()
+            for key, (expires_at, _, size) in entries.items()
+            if key.startswith(prefix) and expires_at > now
+        ]
+        return len(sizes), sum(sizes)
+
+    def _remove(self, key: str) -> None:
+        namespace = namespace_of(key)
+        entries = self._namespaces[namespace]
+        *_, size = entries.pop(key)
+        self._sizes[namespace] -= size
+        if not entries:
+            del self._namespaces[namespace]
+            del self._sizes[namespace]
+
+
+def namespace_of(key: str) -> str:
+    """键所在的命名空间"""
+    return key.rpartition(":")[0]
+
+
+class SQLiteBackend(CacheBackend):
+    """SQLite 文件后端
+
+    使用 WAL 模式，多个进程可以同时读写同一个文件。数据库操作在线程池中执行，
+    同一进程内的操作依次进行。
+    """
+
+    PRUNE_EVERY = 100
+    """每写入多少次清理一次过期的条目"""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = asyncio.Lock()
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    async def _run[T](self, func: Callable[[sqlite3.Connection], T]) -> T:
+        async with self._lock:
+            return await asyncio.to_thread(lambda: func(self._connect()))
+
+    async def get(self, key: str) -> bytes | None:
+        row = await self._run(
+            lambda conn: conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        )
+        return row[0] if row else None
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        if ttl <= 0:
+            await self.delete(key)
+            return
+
+        self._writes += 1
+        prune = self._writes % self.PRUNE_EVERY == 0
+
+        def write(conn: sqlite3.Connection) -> None:
+            now = time.time()
+            conn.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?)", (key, value, now + ttl))
+            if prune:
+                conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+
+        await self._run(write)
+
+    async def delete(self, key: str) -> None:
+        await self._run(lambda conn: conn.execute("DELETE FROM cache WHERE key = ?", (key,)))
+
+    async def clear(self, prefix: str) -> int:
+        cursor = await self._run(
+            lambda conn: conn.execute(
+                "DELETE FROM cache WHERE substr(key, 1, ?) = ? AND expires_at > ?", (len(prefix), prefix, time.time())
+            )
+        )
+        return cursor.rowcount
+
+    async def stats(self, prefix: str) -> tuple[int, int]:
+        count, size = await self._run(
+            lambda conn: conn.execute(
+                "SELECT count(*), coalesce(sum(length(value)), 0) FROM cache "
+                "WHERE substr(key, 1, ?) = ? AND expires_at > ?",
+                (len(prefix), prefix, time.time()),
+            ).fetchone()
+        )
+        return count, size
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class RedisError(Exception):
+    """Redis 服务器返回的错误"""
+
+
+class RedisBackend(CacheBackend):
+    """Redis 协议后端
+
+    只使用 GET、SET、DEL、SCAN、STRLEN 等基本命令，兼容 Redis 及实现了 RESP 协议的其他服务器。
+    使用单个连接依次发送命令，统计时用流水线批量发送，连接断开后下次使用时重新连接。
+
+    Args:
+        url: 形如 redis://[[用户名]:密码@]主机[:端口][/数据库]
+        timeout: 单条命令的超时时间（秒）
+    """
+
+    SCAN_COUNT = 500
+
+    def __init__(self, url: str, timeout: float = 1.0) -> None:
+        parts = urlsplit(url)
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 6379
+        self.username = unquote(parts.username) if parts.username else None
+        self.password = unquote(parts.password) if parts.password else None
+        self.db = int(parts.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._lock = asyncio.Lock()
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            if self.password is not None:
+                if self.username:
+                    await self._call("AUTH", self.username, self.password)
+                else:
+                    await self._call("AUTH", self.password)
+            if self.db:
+                await self._call("SELECT", self.db)
+        except BaseException:
+            await self._disconnect()
+            raise
+
+    async def _disconnect(self) -> None:
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def _call(self, *args: str | bytes | float) -> Any:
+        assert self._reader
+        assert self._writer
+        self._writer.write(encode_command(args))
+        await self._writer.drain()
+        return await read_reply(self._reader)
+
+    async def execute(self, *args: str | bytes | float) -> Any:
+        """发送一条命令并返回结果"""
+        return (await self.pipeline([args]))[0]
+
+    async def pipeline(self, commands: list[tuple[str | bytes | float, ...]]) -> list[Any]:
+        """一次发送多条命令，再依次读取结果
+
+        命令出错时读完所有回复后抛出第一个错误，连接仍可继续使用。
+        """
+        async with self._lock:
+            try:
+                async with asyncio.timeout(self.timeout):
+                    if self._writer is None:
+                        await self._connect()
+                    assert self._reader
+                    assert self._writer
+                    self._writer.write(b"".join(map(encode_command, commands)))
+                    await self._writer.drain()
+                    replies = []
+                    for _ in commands:
+                        try:
+                            replies.append(await read_reply(self._reader))
+                        except RedisError as e:
+                            replies.append(e)
+            except BaseException:
+                # 回复没有读完（包括任务被取消）时连接的状态未知，之后的命令可能读到这次的回复
+                await self._disconnect()
+                raise
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+
+    async def _scan(self, prefix: str) -> list[bytes]:
+        keys: list[bytes] = []
+        cursor = b"0"
+        while True:
+            cursor, batch = await self.execute("SCAN", cursor, "MATCH", f"{prefix}*", "COUNT", self.SCAN_COUNT)
+            keys.extend(batch)
+            if cursor == b"0":
+                return keys
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.execute("GET", key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        if ttl <= 0:
+            await self.delete(key)
+            return
+        await self.execute("SET", key, value, "PX", max(1, int(ttl * 1000)))
+
+    async def delete(self, key: str) -> None:
+        await self.execute("DEL", key)
+
+    async def clear(self, prefix: str) -> int:
+        keys = await self._scan(prefix)
+        count = 0
+        for i in range(0, len(keys), self.SCAN_COUNT):
+            count += await self.execute("DEL", *keys[i : i + self.SCAN_COUNT])
+        return count
+
+    async def stats(self, prefix: str) -> tuple[int, int]:
+        keys = await self._scan(prefix)
+        size = 0
+        for i in range(0, len(keys), self.SCAN_COUNT):
+            size += sum(await self.pipeline([("STRLEN", key) for key in keys[i : i + self.SCAN_COUNT]]))
+        return len(keys), size
+
+    async def close(self) -> None:
+        async with self._lock:
+            await self._disconnect()
+
+
+def encode_command(args: tuple[str | bytes | int | float, ...]) -> bytes:
+    """将命令编码为 RESP 数组"""
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(b"$%d\r\n%b\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader) -> Any:
+    """读取一条 RESP 回复"""
+    line = await reader.readuntil(b"\r\n")
+    kind, data = line[:1], line[1:-2]
+    if kind == b"+":
+        return data
+    if kind == b"-":
+        raise RedisError(data.decode(errors="replace"))
+    if kind == b":":
+        return int(data)
+    if kind == b"$":
+        length = int(data)
+        if length < 0:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        length = int(data)
+        if length < 0:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+    raise RedisError(f"无法解析的回复: {line!r}")
+
+
+_backend: CacheBackend | None = None
+
+
+def create_backend() -> CacheBackend:
+    """按配置创建缓存后端"""
+    match plugin_config.alisten_cache_backend:
+        case "sqlite":
+            return SQLiteBackend(get_plugin_cache_dir() / "cache.db")
+        case "redis":
+            return RedisBackend(plugin_config.alisten_cache_redis_url)
+        case _:
+            return MemoryBackend(
+                max_entries=plugin_config.alisten_cache_max_entries,
+                max_bytes=plugin_config.alisten_cache_max_bytes,
+            )
+
+
+def get_backend() -> CacheBackend:
+    """获取缓存后端，首次使用时创建"""
+    global _backend
+
+    if _backend is None:
+        _backend = create_backend()
+    return _backend
+
+
+@driver.on_shutdown
+async def close_backend() -> None:
+    """关闭缓存后端"""
+    global _backend
+
+    backend, _backend = _backend, None
+    if backend is not None:
+        await backend.close()
@@ -0,0 +1,126 @@
+"""服务器熔断器
+
+服务器连续失败或错误率过高时熔断，熔断期间的请求直接失败，不再等待连接超时。
+冷却时间过后放行一个探测请求，探测成功则恢复，失败则继续熔断。
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import StrEnum
+
+from nonebot.log import logger
+
+from .config import plugin_config
+
+
+class BreakerState(StrEnum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+BREAKER_STATE_NAMES: dict[BreakerState, str] = {
+    BreakerState.CLOSED: "正常",
+    BreakerState.OPEN: "熔断中",
+    BreakerState.HALF_OPEN: "探测中",
+}
+
+
+def _new_outcomes() -> deque[bool]:
+    return deque(maxlen=plugin_config.alisten_breaker_window)
+
+
+@dataclass
+class CircuitBreaker:
+    """单个服务器的熔断器"""
+
+    server_url: str
+    consecutive_failures: int = 0
+    outcomes: deque[bool] = field(default_factory=_new_outcomes)
+    """最近请求是否成功"""
+    opened_at: float | None = None
+    """熔断开始的时间"""
+    probe_started_at: float | None = None
+    """探测请求开始的时间"""
+    last_error: str = ""
+    """最近一次失败的原因"""
+
+    @property
+    def state(self) -> BreakerState:
+        if self.opened_at is None:
+            return BreakerState.CLOSED
+        if time.monotonic() - self.opened_at < plugin_config.alisten_breaker_cooldown:
+            return BreakerState.OPEN
+        return BreakerState.HALF_OPEN
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    @property
+    def retry_after(self) -> float:
+        """距离下次探测的秒数"""
+        if self.opened_at is None:
+            return 0
+        return max(0, self.opened_at + plugin_config.alisten_breaker_cooldown - time.monotonic())
+
+    def allow(self) -> bool:
+        """是否允许发送请求
+
+        半开状态下同一时间只放行一个探测请求，探测请求没有结果（如被取消）时冷却后再放行下一个
+        """
+        state = self.state
+        if state == BreakerState.CLOSED:
+            return True
+        if state == BreakerState.OPEN:
+            return False
+
+        now = time.monotonic()
+        if self.probe_started_at is not None and now - self.probe_started_at < plugin_config.alisten_breaker_cooldown:
+            return False
+        self.probe_started_at = now
+        return True
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            logger.info(f"Alisten 服务器 {self.server_url} 已恢复")
+            self.outcomes.clear()
+        self.consecutive_failures = 0
+        self.outcomes.append(True)
+        self.opened_at = None
+        self.probe_started_at = None
+
+    def record_failure(self, error: str) -> None:
+        self.consecutive_failures += 1
+        self.outcomes.append(False)
+        self.last_error = error
+
+        if self.opened_at is not None:
+            # 探测失败，重新开始冷却
+            self.opened_at = time.monotonic()
+            self.probe_started_at = None
+            return
+
+        if self.consecutive_failures >= plugin_config.alisten_breaker_failures or (
+            len(self.outcomes) == self.outcomes.maxlen and self.error_rate >= plugin_config.alisten_breaker_error_rate
+        ):
+            logger.warning(
+                f"Alisten 服务器 {self.server_url} 连续失败 {self.consecutive_failures} 次，"
+                f"错误率 {self.error_rate:.0%}，熔断 {plugin_config.alisten_breaker_cooldown} 秒"
+            )
+            self.opened_at = time.monotonic()
+            self.probe_started_at = None
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+"""服务器地址 -> 熔断器"""
+
+
+def get_breaker(server_url: str) -> CircuitBreaker:
+    """获取服务器对应的熔断器"""
+    if (breaker := _breakers.get(server_url)) is None:
+        breaker = _breakers[server_url] = CircuitBreaker(server_url)
+    return breaker
@@ -0,0 +1,117 @@
+"""服务器并发限制
+
+每个服务器同时进行的请求数不超过 alisten_server_concurrency，超出的请求按先后顺序排队等待。
+排队的请求数达到 alisten_server_queue 时，新的请求直接失败，回复服务繁忙，不再增加服务器的负担；
+排队时间超过请求的超时时间也视为服务繁忙。两者都不计入熔断器的失败次数。
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+from .config import plugin_config
+
+
+@dataclass
+class Bulkhead:
+    """单个服务器的并发限制"""
+
+    limit: int
+    """同时进行的最大请求数，不大于 0 时不限制"""
+    max_queue: int
+    """排队的最大请求数"""
+    active: int = 0
+    """正在进行的请求数"""
+    queued: int = 0
+    """排队过的请求数"""
+    rejected: int = 0
+    """队列已满而失败的请求数"""
+    timeouts: int = 0
+    """排队超时的请求数"""
+    wait_total: float = 0.0
+    """排队过的请求的总等待时间（秒）"""
+    max_wait: float = 0.0
+    """最长的等待时间（秒）"""
+    max_depth: int = 0
+    """最长的队列长度"""
+    _waiters: deque[asyncio.Future[None]] = field(default_factory=deque, repr=False)
+
+    @property
+    def waiting(self) -> int:
+        """正在排队的请求数"""
+        return len(self._waiters)
+
+    async def acquire(self, timeout: float) -> bool:
+        """获取一个并发名额
+
+        Args:
+            timeout: 最长的排队时间（秒）
+
+        Returns:
+            是否获取成功，成功后需要调用 release 归还
+        """
+        if self.try_acquire():
+            return True
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self.queued += 1
+        self.max_depth = max(self.max_depth, len(self._waiters))
+        start = time.monotonic()
+        try:
+            async with asyncio.timeout(timeout):
+                await future
+        except TimeoutError:
+            # 超时的同时可能已经拿到了名额
+            if not future.done() or future.cancelled():
+                self.timeouts += 1
+                return False
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+        finally:
+            if future in self._waiters:
+                self._waiters.remove(future)
+            wait = time.monotonic() - start
+            self.wait_total += wait
+            self.max_wait = max(self.max_wait, wait)
+        return True
+
+    def try_acquire(self) -> bool:
+        """不排队获取一个名额，没有空闲的名额时返回 False"""
+        if self.limit <= 0:
+            return True
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return True
+        return False
+
+    def release(self) -> None:
+        """归还名额，有请求在排队时直接交给最早的一个"""
+        if self.limit <= 0:
+            return
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+
+_bulkheads: dict[str, Bulkhead] = {}
+"""服务器地址 -> 并发限制"""
+
+
+def get_bulkhead(server_url: str) -> Bulkhead:
+    """获取服务器对应的并发限制"""
+    if (bulkhead := _bulkheads.get(server_url)) is None:
+        bulkhead = _bulkheads[server_url] = Bulkhead(
+            limit=plugin_config.alisten_server_concurrency,
+            max_queue=plugin_config.alisten_server_queue,
+        )
+    return bulkhead
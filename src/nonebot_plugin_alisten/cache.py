@@ -0,0 +1,186 @@
+"""读取结果缓存
+
+缓存的值存放在配置的缓存后端中，多个进程使用共享的后端时看到的是同一份数据。
+sqlite 与 redis 后端中的值序列化为字节，memory 后端直接保存对象，命中时不必反序列化。
+缓存后端出错时记录日志并视为未命中。
+
+每次失效都会增加键的版本号。读取前记下版本号，写入缓存时若版本号已变化，
+说明读取期间发生过写操作，读到的结果可能已经过时，不再缓存。版本号只在进程内有效。
+"""
+
+import asyncio
+import hashlib
+import time
+from collections.abc import Awaitable, Callable
+
+from nonebot.log import logger
+
+from .backend import KEY_PREFIX, MemoryBackend, get_backend
+from .codec import estimate_size, pack, unpack
+
+
+class TTLCache[V]:
+    """带过期时间的缓存
+
+    Args:
+        namespace: 命名空间，不同的缓存互不影响
+        tp: 缓存值的类型，用于序列化
+    """
+
+    def __init__(self, namespace: str, tp: type[V]) -> None:
+        self.prefix = f"{KEY_PREFIX}{namespace}:"
+        self.tp = tp
+        self._versions: dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def encode_key(self, key: tuple[object, ...]) -> str:
+        """将键编码为后端中的字符串键，长度固定"""
+        digest = hashlib.blake2b("\x1f".join(map(str, key)).encode(), digest_size=16).hexdigest()
+        return self.prefix + digest
+
+    async def get(self, key: tuple[object, ...]) -> V | None:
+        """获取未过期的缓存值，并记录命中情况"""
+        try:
+            backend = get_backend()
+            value = await backend.get(self.encode_key(key))
+            if value is not None and not isinstance(backend, MemoryBackend):
+                value = unpack(self.tp, value)
+        except Exception as e:
+            logger.warning(f"读取缓存失败: {type(e).__name__}: {e}")
+            value = None
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def version(self, key: tuple[object, ...]) -> int:
+        return self._versions.get(self.encode_key(key), 0)
+
+    async def set(self, key: tuple[object, ...], value: V, ttl: float, version: int | None = None) -> None:
+        """写入缓存
+
+        Args:
+            key: 键
+            value: 值
+            ttl: 缓存时间（秒），不大于 0 时不缓存
+            version: 读取前的版本号，与当前版本号不同时不缓存
+        """
+        if ttl <= 0 or (version is not None and version != self.version(key)):
+            return
+        try:
+            backend = get_backend()
+            if isinstance(backend, MemoryBackend):
+                await backend.set(self.encode_key(key), value, ttl, estimate_size(self.tp, value))
+            else:
+                await backend.set(self.encode_key(key), pack(self.tp, value), ttl)
+        except Exception as e:
+            logger.warning(f"写入缓存失败: {type(e).__name__}: {e}")
+
+    async def restore(self, encoded: str, data: bytes, ttl: float) -> None:
+        """写入 pack 序列化后的值，用于从其他存储载入缓存
+
+        Args:
+            encoded: encode_key 编码后的键
+            data: 序列化后的值
+            ttl: 缓存时间（秒）
+        """
+        backend = get_backend()
+        if isinstance(backend, MemoryBackend):
+            value = unpack(self.tp, data)
+            await backend.set(encoded, value, ttl, estimate_size(self.tp, value))
+        else:
+            await backend.set(encoded, data, ttl)
+
+    async def invalidate(self, key: tuple[object, ...]) -> None:
+        encoded = self.encode_key(key)
+        self._versions[encoded] = self._versions.get(encoded, 0) + 1
+        try:
+            await get_backend().delete(encoded)
+        except Exception as e:
+            logger.warning(f"删除缓存失败: {type(e).__name__}: {e}")
+
+    async def stats(self) -> tuple[int, int] | None:
+        """缓存的条目数与占用的字节数，缓存后端出错时返回 None"""
+        try:
+            return await get_backend().stats(self.prefix)
+        except Exception as e:
+            logger.warning(f"获取缓存统计失败: {type(e).__name__}: {e}")
+            return None
+
+    async def clear(self) -> int:
+        """清空缓存，返回清除的条目数"""
+        self._versions.clear()
+        return await get_backend().clear(self.prefix)
+
+
+class SWRCache[V](TTLCache[tuple[float, V]]):
+    """过期后仍可继续使用一段时间的缓存（stale-while-revalidate）
+
+    读取时返回缓存值及其时长，由调用方决定是否需要刷新。后台刷新同一个键时只运行一个任务。
+    写入时间使用系统时间，多个进程共享缓存时也能算出数据的时长。
+    """
+
+    def __init__(self, namespace: str, tp: type[V]) -> None:
+        super().__init__(namespace, tuple[float, tp])  # type: ignore[arg-type]
+        self._tasks: dict[str, asyncio.Task[None]] = {}
+
+    async def get_with_age(self, key: tuple[object, ...], max_age: float) -> tuple[V, float] | None:
+        """获取不超过 max_age 秒的缓存值
+
+        Returns:
+            (缓存值, 写入后经过的秒数)
+        """
+        entry = await self.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        age = max(0.0, time.time() - stored_at)
+        if age > max_age:
+            return None
+        return value, age
+
+    async def store(self, key: tuple[object, ...], value: V, max_age: float, version: int | None = None) -> None:
+        """写入缓存，max_age 秒后过期"""
+        await self.set(key, (time.time(), value), max_age, version)
+
+    def refreshing(self, key: tuple[object, ...]) -> bool:
+        """键的后台刷新是否正在进行"""
+        task = self._tasks.get(self.encode_key(key))
+        return task is not None and not task.done()
+
+    def refresh(self, key: tuple[object, ...], fetch: Callable[[], Awaitable[V | None]], max_age: float) -> None:
+        """在后台刷新，已有刷新正在进行时不再启动
+
+        Args:
+            key: 键
+            fetch: 获取新值，失败时返回 None
+            max_age: 新值的过期时间（秒）
+        """
+        if not self.refreshing(key):
+            self._tasks[self.encode_key(key)] = asyncio.create_task(self._refresh(key, fetch, max_age))
+
+    async def _refresh(self, key: tuple[object, ...], fetch: Callable[[], Awaitable[V | None]], max_age: float) -> None:
+        version = self.version(key)
+        try:
+            value = await fetch()
+            if value is not None:
+                await self.store(key, value, max_age, version)
+        except Exception:
+            logger.exception("后台刷新缓存失败")
+        finally:
+            if self._tasks.get(self.encode_key(key)) is asyncio.current_task():
+                del self._tasks[self.encode_key(key)]
+
+    def cancel_refreshes(self) -> None:
+        """停止所有后台刷新"""
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+
+    async def clear(self) -> int:
+        """清空缓存并停止所有后台刷新"""
+        self.cancel_refreshes()
+        return await super().clear()
@@ -0,0 +1,97 @@
+"""响应解码与缓存值的序列化
+
+默认直接由 pydantic 解析 JSON。安装了 orjson 或 msgspec 时可以通过配置改用它们先解析 JSON，
+再交给 pydantic 校验，得到的对象与默认方式完全相同。这样多了一步构建中间对象，
+比默认方式慢（见 benchmarks/bench_decode.py），不是性能优化选项。
+
+缓存值序列化为一个格式字节加上 JSON，较长时用 zlib 压缩。只依赖标准库，
+不同进程无论安装了哪些可选依赖，都能读取彼此写入的值。
+"""
+
+import zlib
+from collections.abc import Callable
+from functools import cache
+from typing import Any
+
+from nonebot.log import logger
+from pydantic import TypeAdapter
+
+from .config import plugin_config
+
+
+@cache
+def get_adapter[T](tp: type[T]) -> TypeAdapter[T]:
+    """获取类型对应的 TypeAdapter，同一类型只创建一次"""
+    return TypeAdapter(tp)
+
+
+def _load_json_loader(backend: str) -> Callable[[bytes], Any] | None:
+    """获取第三方 JSON 解析函数，未安装时返回 None"""
+    if backend == "orjson":
+        try:
+            import orjson
+        except ImportError:
+            logger.warning("未安装 orjson，使用 pydantic 解析响应")
+            return None
+        return orjson.loads
+
+    if backend == "msgspec":
+        try:
+            import msgspec
+        except ImportError:
+            logger.warning("未安装 msgspec，使用 pydantic 解析响应")
+            return None
+        return msgspec.json.decode
+
+    return None
+
+
+_json_loader = _load_json_loader(plugin_config.alisten_json_backend)
+
+
+def decode[T](tp: type[T], content: bytes) -> T:
+    """将 JSON 响应内容解码为指定类型
+
+    Args:
+        tp: 目标类型
+        content: 响应内容
+
+    Returns:
+        解码后的对象
+    """
+    adapter = get_adapter(tp)
+    if _json_loader is None:
+        return adapter.validate_json(content)
+    return adapter.validate_python(_json_loader(content))
+
+
+FORMAT_JSON = b"\x00"
+FORMAT_ZLIB = b"\x01"
+COMPRESS_THRESHOLD = 256
+"""序列化后超过多少字节时尝试压缩"""
+
+
+def pack[T](tp: type[T], value: T) -> bytes:
+    """将缓存值序列化为字节"""
+    # 响应模型按服务器返回的字段名（别名）校验，序列化时同样使用别名
+    data = get_adapter(tp).dump_json(value, by_alias=True)
+    if len(data) > COMPRESS_THRESHOLD:
+        compressed = zlib.compress(data)
+        if len(compressed) < len(data):
+            return FORMAT_ZLIB + compressed
+    return FORMAT_JSON + data
+
+
+def estimate_size[T](tp: type[T], value: T) -> int:
+    """缓存值序列化为 JSON 后的字节数，用于估算占用的内存"""
+    return len(get_adapter(tp).dump_json(value, by_alias=True))
+
+
+def unpack[T](tp: type[T], data: bytes) -> T:
+    """将 pack 序列化的字节还原为缓存值"""
+    fmt, payload = data[:1], data[1:]
+    if fmt == FORMAT_ZLIB:
+        payload = zlib.decompress(payload)
+    elif fmt != FORMAT_JSON:
+        raise ValueError(f"未知的缓存值格式: {fmt!r}")
+    return get_adapter(tp).validate_json(payload)
@@ -0,0 +1,104 @@
+"""响应压缩与传输统计
+
+请求时声明可接受的压缩格式，收到响应后按需解压，并按端点统计传输与解压后的字节数。
+部分驱动器（如 httpx）会自动解压，此时响应内容已经解压，解压失败时直接使用原内容。
+"""
+
+import gzip
+import zlib
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from nonebot.drivers import Response
+
+_decoders: dict[str, Callable[[bytes], bytes]] = {
+    "gzip": gzip.decompress,
+    "deflate": zlib.decompress,
+}
+
+try:
+    import zstandard
+
+    _decoders["zstd"] = lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data)
+except ImportError:
+    pass
+
+try:
+    import brotli
+
+    _decoders["br"] = brotli.decompress
+except ImportError:
+    pass
+
+ACCEPT_ENCODING = ", ".join(encoding for encoding in ("zstd", "br", "gzip") if encoding in _decoders)
+"""按优先级排列的可接受压缩格式"""
+
+
+def decode_content(response: Response) -> bytes:
+    """获取解压后的响应内容"""
+    content = response.content
+    if not content:
+        return b""
+    if isinstance(content, str):
+        return content.encode()
+
+    decoder = _decoders.get(_content_encoding(response))
+    if decoder is None:
+        return content
+    try:
+        return decoder(content)
+    except Exception:
+        # 驱动器已经解压
+        return content
+
+
+def _content_encoding(response: Response) -> str:
+    encoding = response.headers.get("Content-Encoding", "").strip().lower()
+    return "" if encoding == "identity" else encoding
+
+
+@dataclass
+class TransferStats:
+    """单个端点的传输统计"""
+
+    requests: int = 0
+    wire_bytes: int = 0
+    """实际传输的字节数"""
+    body_bytes: int = 0
+    """解压后的字节数"""
+    unmeasured: int = 0
+    """传输字节数未知的请求数，不计入 wire_bytes 与 body_bytes"""
+
+
+_stats: dict[str, dict[str, TransferStats]] = {}
+"""服务器地址 -> 端点 -> 传输统计"""
+
+
+def record_transfer(server_url: str, endpoint: str, response: Response, body: bytes) -> None:
+    """记录一次响应的传输量
+
+    驱动器自动解压时响应内容已是解压后的数据，此时以 Content-Length 作为传输字节数，
+    没有 Content-Length（如分块传输）时传输字节数未知，只记录请求数
+    """
+    stats = _stats.setdefault(server_url, {}).setdefault(endpoint, TransferStats())
+    stats.requests += 1
+
+    content = response.content or b""
+    if isinstance(content, str):
+        content = content.encode()
+    content_length = response.headers.get("Content-Length", "")
+    if not _content_encoding(response) or content != body:
+        # 响应内容就是传输的内容
+        wire_bytes = len(content)
+    elif content_length.isdigit():
+        wire_bytes = int(content_length)
+    else:
+        stats.unmeasured += 1
+        return
+    stats.wire_bytes += wire_bytes
+    stats.body_bytes += len(body)
+
+
+def get_transfer_stats(server_url: str) -> dict[str, TransferStats]:
+    """获取服务器各端点的传输统计"""
+    return _stats.get(server_url, {})
@@ -0,0 +1,125 @@
+"""插件配置"""
+
+from fnmatch import fnmatchcase
+from typing import Literal
+
+from nonebot import get_plugin_config
+from pydantic import BaseModel
+
+
+class Config(BaseModel):
+    alisten_timeout: float = 5.0
+    """请求 Alisten 服务器的默认超时时间（秒）"""
+    alisten_endpoint_timeout: dict[str, float] = {
+        "/music/search": 15.0,
+        "/music/pick": 15.0,
+    }
+    """按 API 端点覆盖超时时间（秒），键支持通配符，如 `/house/*`"""
+    alisten_command_timeout: float = 30.0
+    """单条命令内所有请求的总时限（秒）"""
+    alisten_retry_attempts: int = 2
+    """读取类请求失败后的最大重试次数"""
+    alisten_retry_backoff: float = 0.2
+    """重试退避的初始时间（秒）"""
+    alisten_retry_backoff_max: float = 2.0
+    """重试退避的最长时间（秒）"""
+    alisten_retry_budget: float = 10.0
+    """每个服务器的重试额度上限"""
+    alisten_retry_budget_ratio: float = 0.2
+    """每个正常响应积攒的重试额度"""
+    alisten_server_concurrency: int = 8
+    """每个服务器同时进行的最大请求数，为 0 时不限制"""
+    alisten_server_queue: int = 32
+    """每个服务器排队等待的最大请求数，超出时直接回复服务繁忙"""
+    alisten_breaker_failures: int = 5
+    """连续失败多少次后熔断"""
+    alisten_breaker_error_rate: float = 0.5
+    """最近请求的错误率达到多少后熔断"""
+    alisten_breaker_window: int = 20
+    """计算错误率的最近请求数"""
+    alisten_breaker_cooldown: float = 30.0
+    """熔断后多久放行探测请求（秒）"""
+    alisten_skip_window: float = 2.0
+    """同一群组的第一个切歌投票之后多少秒内的投票合并为一条回复，为 0 时每次投票单独回复"""
+    alisten_rate_user: float = 0.0
+    """每个用户每秒恢复的命令次数，为 0 时不限制"""
+    alisten_rate_user_burst: int = 5
+    """每个用户连续发送命令的最大次数"""
+    alisten_rate_group: float = 0.0
+    """每个群组每秒恢复的命令次数，为 0 时不限制"""
+    alisten_rate_group_burst: int = 20
+    """每个群组连续发送命令的最大次数"""
+    alisten_rate_server: float = 0.0
+    """每个服务器每秒恢复的命令次数，为 0 时不限制"""
+    alisten_rate_server_burst: int = 50
+    """每个服务器连续接收命令的最大次数"""
+    alisten_hedge: bool = False
+    """获取当前音乐和播放列表响应较慢时，是否再发送一次相同的请求"""
+    alisten_hedge_ratio: float = 0.05
+    """对冲请求占总请求数的最大比例"""
+    alisten_playlist_ttl: float = 3.0
+    """播放列表的缓存时间（秒），为 0 时不缓存"""
+    alisten_current_fresh: float = 3.0
+    """当前音乐在多少秒内视为最新，直接使用缓存"""
+    alisten_current_stale: float = 60.0
+    """超过新鲜期后还可以继续使用多少秒旧的当前音乐，期间在后台刷新；两者都为 0 时不缓存"""
+    alisten_poll_interval: float = 2.0
+    """已配置的房间在后台轮询当前音乐的最短间隔（秒），绑定同一房间的群组共享轮询结果，为 0 时不轮询；
+    轮询不排队，服务器没有空闲的并发名额时跳过"""
+    alisten_poll_interval_max: float = 30.0
+    """当前音乐长时间没有变化时，轮询间隔逐渐延长到的最长间隔（秒）"""
+    alisten_poll_idle: float = 600.0
+    """绑定房间的群组超过多少秒没有使用命令时暂停轮询（开启了切歌通知的房间除外），
+    启动后有群组使用命令前同样暂停，为 0 时不暂停"""
+    alisten_poll_stagger: float = 10.0
+    """启动时各房间的第一次轮询在多少秒内随机分散开始，为 0 时立即开始"""
+    alisten_push: bool = False
+    """是否通过 WebSocket 订阅服务器推送的当前音乐与播放列表，需要驱动器支持 WebSocket 客户端"""
+    alisten_push_endpoint: str = "/house/events"
+    """推送的 WebSocket 端点"""
+    alisten_push_timeout: float = 60.0
+    """超过多少秒没有收到推送消息（包括心跳）视为连接断开"""
+    alisten_push_backoff_max: float = 60.0
+    """推送连接断开后重连退避的最长时间（秒），等待期间改为轮询"""
+    alisten_announce_window: float = 10.0
+    """一次切歌的通知在多少秒内分散发送给各个群组"""
+    alisten_announce_interval: float = 0.5
+    """同一个 Bot 连续发送两条切歌通知的最短间隔（秒）"""
+    alisten_error_cache_ttl: float = 10.0
+    """房间不存在等确定性错误的缓存时间（秒），为 0 时不缓存"""
+    alisten_house_refresh_interval: float = 30.0
+    """房间目录的后台刷新间隔（秒），为 0 时每次查询都重新获取"""
+    alisten_search_cache_ttl: float = 600.0
+    """搜索结果的缓存时间（秒），为 0 时不缓存"""
+    alisten_search_persist_entries: int = 5000
+    """持久化到数据库的搜索结果的最大条目数，为 0 时不持久化"""
+    alisten_search_persist_interval: float = 5.0
+    """搜索结果批量写入数据库的间隔（秒）"""
+    alisten_cache_backend: Literal["memory", "sqlite", "redis"] = "memory"
+    """缓存后端，多进程部署时使用 sqlite（同一台机器）或 redis 共享缓存"""
+    alisten_cache_redis_url: str = "redis://localhost:6379/0"
+    """redis 缓存后端的地址"""
+    alisten_cache_max_entries: int = 1000
+    """memory 缓存后端中每种缓存（搜索结果、播放列表等）的最大条目数"""
+    alisten_cache_max_bytes: int = 8 * 1024 * 1024
+    """memory 缓存后端中每种缓存占用的最大字节数，按序列化为 JSON 后的大小估算"""
+    alisten_config_check_interval: float = 0.0
+    """多进程部署时检查其他进程是否修改过配置的间隔（秒），为 0 时不检查"""
+    alisten_http2: bool = False
+    """是否使用 HTTP/2 连接服务器（需要 TLS 且驱动器支持）"""
+    alisten_compression: bool = True
+    """是否请求服务器压缩响应"""
+    alisten_json_backend: Literal["pydantic", "orjson", "msgspec"] = "pydantic"
+    """解析响应 JSON 使用的库，orjson 与 msgspec 需要另行安装，且比默认的 pydantic 慢"""
+
+    def endpoint_timeout(self, endpoint: str) -> float:
+        """获取 API 端点对应的超时时间"""
+        if endpoint in self.alisten_endpoint_timeout:
+            return self.alisten_endpoint_timeout[endpoint]
+        for pattern, timeout in self.alisten_endpoint_timeout.items():
+            if fnmatchcase(endpoint, pattern):
+                return timeout
+        return self.alisten_timeout
+
+
+plugin_config = get_plugin_config(Config)
@@ -0,0 +1,124 @@
+"""群组配置索引
+
+所有群组的配置一次性加载到内存中，命令处理时直接读取，不再逐条查询数据库。
+设置或删除配置时在事务提交后更新索引，并相应地启动或停止房间的当前音乐轮询。
+
+多进程部署时可以开启版本检查：每次修改配置都会递增数据库中的版本号，
+索引定期比较版本号，发现其他进程修改过配置时重新加载。
+"""
+
+import asyncio
+import time
+
+from nonebot import get_driver
+from nonebot.log import logger
+from nonebot_plugin_orm import get_session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import plugin_config
+from .models import AlistenConfig, AlistenConfigVersion
+from .poller import bind, sync_pollers, unbind
+
+driver = get_driver()
+
+
+def snapshot(config: AlistenConfig) -> AlistenConfig:
+    """复制一份不关联数据库会话的配置"""
+    return AlistenConfig(
+        id=config.id,
+        session_id=config.session_id,
+        server_url=config.server_url,
+        house_id=config.house_id,
+        house_password=config.house_password,
+        announce_target=config.announce_target,
+    )
+
+
+async def bump_version(db_session: AsyncSession) -> None:
+    """在当前事务中递增配置版本号"""
+    result = await db_session.execute(update(AlistenConfigVersion).values(version=AlistenConfigVersion.version + 1))
+    if not result.rowcount:  # type: ignore[attr-defined]
+        db_session.add(AlistenConfigVersion(id=1, version=1))
+
+
+class ConfigIndex:
+    """群组会话 ID -> 配置"""
+
+    def __init__(self) -> None:
+        self._configs: dict[str, AlistenConfig] = {}
+        self._loaded = False
+        self._version: int | None = None
+        """加载时数据库中的版本号"""
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._configs)
+
+    async def load(self) -> None:
+        """从数据库加载所有配置"""
+        async with get_session() as db_session:
+            configs = (await db_session.scalars(select(AlistenConfig))).all()
+            version = await db_session.scalar(select(AlistenConfigVersion.version))
+            self._configs = {config.session_id: snapshot(config) for config in configs}
+
+        self._version = version
+        self._loaded = True
+        sync_pollers(self._configs.values())
+        self._checked_at = time.monotonic()
+        logger.debug(f"已加载 {len(self._configs)} 个群组的 Alisten 配置")
+
+    async def _check_version(self) -> None:
+        """数据库中的版本号变化时重新加载"""
+        async with get_session() as db_session:
+            version = await db_session.scalar(select(AlistenConfigVersion.version))
+        self._checked_at = time.monotonic()
+        if version != self._version:
+            logger.debug("Alisten 配置已被修改，重新加载")
+            await self.load()
+
+    async def get(self, session_id: str) -> AlistenConfig | None:
+        """获取群组的配置
+
+        首次调用时加载所有配置；开启版本检查时，每隔一段时间检查一次是否需要重新加载
+        """
+        interval = plugin_config.alisten_config_check_interval
+        if not self._loaded or (interval > 0 and time.monotonic() - self._checked_at >= interval):
+            async with self._lock:
+                if not self._loaded:
+                    await self.load()
+                elif interval > 0 and time.monotonic() - self._checked_at >= interval:
+                    await self._check_version()
+        return self._configs.get(session_id)
+
+    def put(self, config: AlistenConfig) -> None:
+        """写入已提交的配置
+
+        提交后数据库会话中的对象会过期，因此需要在提交前用 snapshot 复制一份
+        """
+        old = self._configs.get(config.session_id)
+        self._configs[config.session_id] = config
+        house = (config.server_url, config.house_id, config.house_password)
+        if old is not None and (old.server_url, old.house_id, old.house_password) != house:
+            unbind(old)
+        bind(config)
+
+    def remove(self, session_id: str) -> None:
+        """移除已删除的配置"""
+        if (config := self._configs.pop(session_id, None)) is not None:
+            unbind(config)
+
+    def clear(self) -> None:
+        """清空索引，下次读取时重新加载"""
+        self._configs.clear()
+        self._loaded = False
+        self._version = None
+
+
+config_index = ConfigIndex()
+
+
+@driver.on_startup
+async def _() -> None:
+    await config_index.load()
@@ -1,23 +1,57 @@
+import math
+import time
+
+from nonebot.matcher import Matcher
 from nonebot.params import Depends
 from nonebot_plugin_orm import async_scoped_session
 from nonebot_plugin_user import UserSession
 from sqlalchemy import select
 
 from .alisten_api import AlistenAPI
+from .config import plugin_config
+from .config_index import config_index
 from .models import AlistenConfig
+from .poller import get_poller
+from .ratelimit import acquire
+
+RATE_LIMITED_KEY = "_alisten_rate_limited"
+"""会话状态中的键，表示本次命令已经计过频率限制"""
+RATE_LIMIT_MESSAGES = {
+    "user": "你的操作太频繁了，请 {} 秒后再试",
+    "group": "本群的操作太频繁了，请 {} 秒后再试",
+    "server": "服务器繁忙，请 {} 秒后再试",
+}
 
 
-async def get_config(user_session: UserSession, db_session: async_scoped_session) -> AlistenConfig | None:
+async def get_config(user_session: UserSession) -> AlistenConfig | None:
     """获取 Alisten 配置"""
+    return await config_index.get(user_session.session_id)
+
+
+async def get_db_config(user_session: UserSession, db_session: async_scoped_session) -> AlistenConfig | None:
+    """从数据库获取 Alisten 配置，用于修改配置"""
     stmt = select(AlistenConfig).where(AlistenConfig.session_id == user_session.session_id)
     result = await db_session.execute(stmt)
     return result.scalar_one_or_none()
 
 
 async def get_alisten_api(
+    matcher: Matcher,
     session: UserSession,
     config: AlistenConfig | None = Depends(get_config),
 ) -> AlistenAPI | None:
-    """获取 Alisten API 实例"""
+    """获取 Alisten API 实例
+
+    依赖在同一事件的处理过程中会被缓存，所以同一命令的多个处理函数共享同一个截止时间。
+    等待用户回复（如点歌时选择歌曲）后依赖会在回复的事件中重新执行，频率限制记录在会话状态中，同一命令只计一次
+    """
     if config:
-        return AlistenAPI(config=config, user_session=session)
+        if not matcher.state.get(RATE_LIMITED_KEY):
+            if limited := acquire(str(session.user_id), config.session_id, config.server_url):
+                scope, wait = limited
+                await matcher.finish(RATE_LIMIT_MESSAGES[scope].format(math.ceil(wait)), at_sender=True)
+            matcher.state[RATE_LIMITED_KEY] = True
+        if poller := get_poller(config):
+            poller.touch()
+        deadline = time.monotonic() + plugin_config.alisten_command_timeout
+        return AlistenAPI(config=config, user_session=session, deadline=deadline)
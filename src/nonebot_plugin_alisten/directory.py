@@ -0,0 +1,171 @@
+"""房间目录
+
+每个服务器的房间列表按房间 ID 建立索引，查询房间信息时直接从索引中读取。
+首次查询时同步加载，之后在后台定期刷新，一段时间无人查询后停止刷新。
+
+刷新时若服务器支持 ETag 则带上 If-None-Match，未变化时服务器返回 304；
+否则比较响应内容的哈希，内容未变化时跳过解析。
+
+刷新得到的房间列表同时写入缓存后端，多个进程共享缓存后端时，
+一个刷新间隔内只有一个进程需要请求服务器。
+"""
+
+import asyncio
+import hashlib
+import time
+import uuid
+from dataclasses import dataclass, field
+
+from nonebot import get_driver
+from nonebot.log import logger
+from pydantic import BaseModel
+
+from .alisten_api import AlistenAPI, ErrorResponse, HouseInfo, HouseSearchResponse
+from .cache import TTLCache
+from .codec import decode
+from .config import plugin_config
+
+IDLE_ROUNDS = 10
+"""连续多少个刷新间隔无人查询后停止后台刷新"""
+WRITER_ID = uuid.uuid4().hex
+"""当前进程的标识，区分缓存后端中的房间目录是否由当前进程写入"""
+
+driver = get_driver()
+
+
+class DirectorySnapshot(BaseModel):
+    """写入缓存后端的房间目录"""
+
+    writer: str
+    """写入的进程"""
+    etag: str | None
+    digest: str
+    """响应内容哈希的十六进制表示"""
+    houses: list[HouseInfo]
+
+
+directory_cache = TTLCache("directory", DirectorySnapshot)
+"""(服务器地址,) -> 房间目录"""
+
+
+@dataclass
+class HouseDirectory:
+    """单个服务器的房间目录"""
+
+    server_url: str
+    houses: dict[str, HouseInfo] = field(default_factory=dict)
+    """房间 ID -> 房间信息"""
+    etag: str | None = None
+    digest: bytes | None = None
+    """上次解析的响应内容的哈希"""
+    updated_at: float | None = None
+    """上次成功刷新的时间（time.monotonic）"""
+    accessed_at: float = 0.0
+    """上次查询的时间（time.monotonic）"""
+    _task: asyncio.Task[None] | None = field(default=None, repr=False)
+
+    @property
+    def refreshing(self) -> bool:
+        """后台刷新是否正在进行"""
+        return self._task is not None and not self._task.done()
+
+    def get(self, house_id: str) -> HouseInfo | None:
+        return self.houses.get(house_id)
+
+    async def refresh(self, api: AlistenAPI) -> ErrorResponse | None:
+        """从服务器刷新房间列表
+
+        Returns:
+            刷新失败时返回错误信息
+        """
+        key = (self.server_url,)
+        snapshot = await directory_cache.get(key)
+        if snapshot is not None and snapshot.writer != WRITER_ID:
+            # 其他进程刚刚刷新过
+            digest = bytes.fromhex(snapshot.digest)
+            if digest != self.digest:
+                self.houses = {house.id: house for house in snapshot.houses}
+                self.digest = digest
+            self.etag = snapshot.etag
+            self.updated_at = time.monotonic()
+            return None
+
+        result = await api.house_search_raw(self.etag)
+        if isinstance(result, ErrorResponse):
+            return result
+
+        if result.status_code != 304:
+            digest = hashlib.blake2b(result.content, digest_size=16).digest()
+            if digest != self.digest:
+                try:
+                    houses = decode(HouseSearchResponse, result.content).root
+                except Exception:
+                    logger.exception("Alisten API 房间搜索请求失败")
+                    return ErrorResponse(error="房间搜索请求失败，请稍后重试")
+                self.houses = {house.id: house for house in houses}
+                self.digest = digest
+            self.etag = result.etag
+
+        self.updated_at = time.monotonic()
+        if self.digest is not None:
+            snapshot = DirectorySnapshot(
+                writer=WRITER_ID, etag=self.etag, digest=self.digest.hex(), houses=list(self.houses.values())
+            )
+            await directory_cache.set(key, snapshot, plugin_config.alisten_house_refresh_interval)
+        return None
+
+    async def ensure_loaded(self, api: AlistenAPI) -> ErrorResponse | None:
+        """确保房间目录是最新的
+
+        后台刷新正在进行时直接使用索引，否则同步刷新一次并启动后台刷新。
+
+        Args:
+            api: 当前命令的 API 客户端
+
+        Returns:
+            刷新失败时返回错误信息
+        """
+        self.accessed_at = time.monotonic()
+        if self.refreshing:
+            return None
+
+        if error := await self.refresh(api):
+            return error
+        self.accessed_at = time.monotonic()
+
+        if plugin_config.alisten_house_refresh_interval > 0 and not self.refreshing:
+            # 后台刷新不受命令时限的限制
+            background_api = AlistenAPI(config=api.config, user_session=api.user_session)
+            self._task = asyncio.create_task(self._refresh_loop(background_api))
+        return None
+
+    async def _refresh_loop(self, api: AlistenAPI) -> None:
+        interval = plugin_config.alisten_house_refresh_interval
+        while time.monotonic() - self.accessed_at < interval * IDLE_ROUNDS:
+            await asyncio.sleep(interval)
+            if error := await self.refresh(api):
+                logger.warning(f"刷新 Alisten 房间目录失败: {self.server_url} {error.error}")
+
+    def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+_directories: dict[str, HouseDirectory] = {}
+"""服务器地址 -> 房间目录"""
+
+
+def get_house_directory(server_url: str) -> HouseDirectory:
+    """获取服务器对应的房间目录"""
+    if (directory := _directories.get(server_url)) is None:
+        directory = _directories[server_url] = HouseDirectory(server_url)
+    return directory
+
+
+@driver.on_shutdown
+async def close_directories() -> None:
+    """停止所有后台刷新"""
+    for directory in _directories.values():
+        directory.close()
+    _directories.clear()
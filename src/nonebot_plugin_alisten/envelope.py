@@ -0,0 +1,44 @@
+"""请求体构造
+
+所有请求都带有相同的房间信息（houseId/password），点歌和投票还带有用户信息。
+这两部分按取值缓存为序列化好的字节串，每次请求只需拼接少量额外字段。
+"""
+
+import json
+from functools import lru_cache
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def dumps(obj: object) -> bytes:
+    """序列化为紧凑的 JSON 字节串"""
+    return _encoder.encode(obj).encode()
+
+
+@lru_cache(maxsize=1024)
+def house_envelope(house_id: str, password: str) -> bytes:
+    """房间信息部分，不含结尾的右花括号"""
+    return dumps({"houseId": house_id, "password": password})[:-1]
+
+
+@lru_cache(maxsize=4096)
+def user_field(name: str, email: str) -> bytes:
+    """用户信息字段，以逗号开头"""
+    return b',"user":' + dumps({"name": name, "email": email})
+
+
+def request_body(envelope: bytes, user: bytes = b"", **fields: object) -> bytes:
+    """拼接请求体
+
+    Args:
+        envelope: 房间信息部分，见 house_envelope
+        user: 用户信息字段，见 user_field
+        fields: 其余字段
+
+    Returns:
+        JSON 请求体
+    """
+    body = envelope + user
+    if fields:
+        body += b"," + dumps(fields)[1:-1]
+    return body + b"}"
@@ -0,0 +1,116 @@
+"""对冲请求
+
+对延迟敏感的读取请求，若超过该端点近期的 p95 延迟仍未收到响应，就再发送一次相同的请求，
+先返回的响应胜出，另一个请求被取消。对冲请求会消耗额度，每个请求只积攒少量额度，
+因此对冲请求占总请求数的比例有上限，不会明显增加服务器负载。
+对冲请求同样占用服务器的一个并发名额，没有空闲的名额时不对冲，也不排队等待。
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+from .bulkhead import get_bulkhead
+from .config import plugin_config
+from .retry import RetryBudget
+
+WINDOW = 100
+"""计算 p95 使用的最近样本数"""
+MIN_SAMPLES = 20
+"""样本不足时不发送对冲请求"""
+MAX_TOKENS = 5.0
+"""对冲额度上限，即最多连续对冲的次数"""
+
+
+@dataclass
+class HedgePolicy:
+    """单个服务器端点的对冲策略"""
+
+    budget: RetryBudget
+    latencies: deque[float] = field(default_factory=lambda: deque(maxlen=WINDOW))
+    """最近成功请求的延迟（秒）"""
+    hedges: int = 0
+    """已发送的对冲请求数"""
+
+    @property
+    def delay(self) -> float | None:
+        """发送对冲请求前的等待时间，即最近延迟的 p95，样本不足时为 None"""
+        if len(self.latencies) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[math.ceil(len(ordered) * 0.95) - 1]
+
+    def record(self, latency: float) -> None:
+        self.latencies.append(latency)
+
+
+_policies: dict[tuple[str, str], HedgePolicy] = {}
+"""(服务器地址, 端点) -> 对冲策略"""
+
+
+def get_hedge_policy(server_url: str, endpoint: str) -> HedgePolicy:
+    """获取服务器端点对应的对冲策略"""
+    key = (server_url, endpoint)
+    if (policy := _policies.get(key)) is None:
+        budget = RetryBudget(ratio=plugin_config.alisten_hedge_ratio, max_tokens=MAX_TOKENS, tokens=0)
+        policy = _policies[key] = HedgePolicy(budget=budget)
+    return policy
+
+
+async def _timed[T](policy: HedgePolicy, func: Callable[[], Awaitable[T]]) -> T:
+    """执行 func 并记录成功时的延迟"""
+    start = time.monotonic()
+    result = await func()
+    policy.record(time.monotonic() - start)
+    return result
+
+
+async def hedged[T](server_url: str, endpoint: str, func: Callable[[], Awaitable[T]]) -> T:
+    """执行 func，响应慢于 p95 且有额度时再执行一次，返回先成功的结果
+
+    调用方已经为第一次执行占用了并发名额，第二次执行另外占用一个。
+    两次都失败时抛出先失败的那次的异常。
+
+    Args:
+        server_url: 服务器地址
+        endpoint: API 端点
+        func: 实际发送请求的函数
+
+    Returns:
+        请求结果
+    """
+    policy = get_hedge_policy(server_url, endpoint)
+    policy.budget.deposit()
+    delay = policy.delay
+
+    tasks = {asyncio.ensure_future(_timed(policy, func))}
+    try:
+        if delay is not None:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            bulkhead = get_bulkhead(server_url)
+            if not done and bulkhead.try_acquire():
+                if policy.budget.withdraw():
+                    policy.hedges += 1
+                    task = asyncio.ensure_future(_timed(policy, func))
+                    # 任务在开始运行前就被取消时不会执行 finally，因此在完成回调中归还名额
+                    task.add_done_callback(lambda _: bulkhead.release())
+                    tasks.add(task)
+                else:
+                    bulkhead.release()
+
+        error: BaseException | None = None
+        pending = tasks
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = error or task.exception()
+        assert error is not None
+        raise error
+    finally:
+        for task in tasks:
+            task.cancel()
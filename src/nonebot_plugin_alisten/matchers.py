@@ -1,3 +1,4 @@
+import math
 import re
 
 from arclet.alconna import AllParam, config
@@ -15,6 +16,7 @@ from nonebot_plugin_alconna import (
     Check,
     CommandMeta,
     Match,
+    MsgTarget,
     Namespace,
     Option,
     Query,
@@ -31,20 +33,32 @@ from nonebot_plugin_localstore import get_plugin_cache_dir
 from nonebot_plugin_orm import async_scoped_session
 from nonebot_plugin_user import UserSession
 
+from . import skipvote
 from .alisten_api import (
     AlistenAPI,
     ErrorResponse,
     PickMusicResponse,
     PlaylistItem,
+    invalidate_house,
+    search_cache,
+    search_store,
 )
+from .breaker import BREAKER_STATE_NAMES, BreakerState, get_breaker
+from .bulkhead import get_bulkhead
+from .compression import get_transfer_stats
+from .config import plugin_config
+from .config_index import bump_version, config_index, snapshot
 from .constants import (
     DEFAULT_SOURCE,
     SOURCE_NAMES_FULL,
     SOURCE_NAMES_SHORT,
     PlayMode,
 )
-from .depends import get_alisten_api, get_config
+from .depends import get_alisten_api, get_config, get_db_config
+from .directory import get_house_directory
 from .models import AlistenConfig
+from .poller import enabled as poller_enabled
+from .poller import get_poller
 
 ns = Namespace("alisten", disable_builtin_options=set())
 config.namespaces["alisten"] = ns
@@ -65,6 +79,15 @@ async def _() -> None:
     logger.debug("快捷指令缓存已保存")
 
 
+def format_size(size: int) -> str:
+    """格式化字节数"""
+    if size < 1024:
+        return f"{size} B"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / 1024 / 1024:.1f} MB"
+
+
 async def is_group(user_session: UserSession) -> bool:
     """确保在群组中使用"""
     return not user_session.session.scene.is_private
@@ -105,6 +128,7 @@ alisten_cmd = on_alconna(
             ),
             Subcommand("show", help_text="显示当前群组的配置"),
             Subcommand("delete", help_text="删除当前群组的配置"),
+            Subcommand("announce", Args["switch#开启或关闭", str], help_text="开启或关闭当前群组的切歌通知"),
             help_text="管理服务器配置",
         ),
         Subcommand(
@@ -113,6 +137,8 @@ alisten_cmd = on_alconna(
             Subcommand("user", help_text="显示当前房间的用户列表"),
             help_text="管理房间",
         ),
+        Subcommand("status", help_text="查看服务器状态"),
+        Subcommand("cache", Subcommand("clear", help_text="清空搜索结果缓存"), help_text="管理缓存"),
         meta=CommandMeta(
             description="听歌房管理",
             example="""/alisten music pick 青花瓷                 # 点歌并加入播放列表
@@ -128,11 +154,15 @@ alisten_cmd = on_alconna(
 
 /alisten house info                             # 查看房间信息
 /alisten house user                             # 查看房间用户列表
+/alisten status                                 # 查看服务器状态
+/alisten cache clear                            # 清空搜索结果缓存
 
 /alisten config set http://localhost:8080 room123 password123  # 设置或更新配置
 /alisten config set https://music.example.com myroom          # 设置配置（无密码）
 /alisten config show                                           # 查看当前配置
-/alisten config delete                                         # 删除配置""",
+/alisten config delete                                         # 删除配置
+/alisten config announce 开启                                  # 切歌时在当前群组发送通知
+/alisten config announce 关闭                                  # 关闭切歌通知""",
         ),
         namespace=config.namespaces["alisten"],
     ),
@@ -357,8 +387,22 @@ async def music_good_handle(
 async def music_skip_handle(
     api: AlistenAPI = Depends(get_alisten_api),
 ):
-    """投票跳过"""
-    result = await api.music_skip_vote()
+    """投票跳过
+
+    开启汇总时，第一个投票之后同一时间段内的投票只回复一次，见 skipvote 模块
+    """
+    if plugin_config.alisten_skip_window > 0:
+        result = await skipvote.vote(api)
+        if result is None:
+            # 由这一批中第一个投票的人统一回复
+            await alisten_cmd.finish()
+        if isinstance(result, skipvote.SkipBatch):
+            batch = result
+            if batch.votes + batch.errors.total() > 1:
+                await alisten_cmd.finish(skipvote.format_batch(batch))
+            result = batch.result or ErrorResponse(error=next(iter(batch.errors)))
+    else:
+        result = await api.music_skip_vote()
 
     if isinstance(result, ErrorResponse):
         await alisten_cmd.finish(result.error, at_sender=True)
@@ -409,17 +453,27 @@ async def music_current_handle(
     api: AlistenAPI = Depends(get_alisten_api),
 ):
     """查看当前播放的音乐"""
-    result = await api.music_sync()
+    poller = get_poller(api.config)
+    result = poller.get() if poller else None
+    if result is None or result[1] >= plugin_config.alisten_current_fresh:
+        # 轮询结果不够新时尽快轮询，这次改为读取缓存，缓存过期时在后台刷新
+        if poller:
+            poller.hurry()
+        result = await api.music_current()
 
     if isinstance(result, ErrorResponse):
         await alisten_cmd.finish(result.error, at_sender=True)
 
+    result, age = result
     source_name = SOURCE_NAMES_FULL.get(result.source or "", result.source or "")
 
     msg = f"当前播放：{result.name}\n"
     msg += f"来源：{source_name}\n"
     if result.user:
         msg += f"点歌者：{result.user.name}\n"
+    # 只有读取缓存时才会得到超过新鲜期的数据，此时缓存总是在后台刷新
+    if age > 0 and age >= plugin_config.alisten_current_fresh:
+        msg += f"（{math.ceil(age)} 秒前的数据，正在刷新）\n"
 
     await alisten_cmd.finish(msg.strip(), at_sender=True)
 
@@ -458,7 +512,7 @@ async def config_set_handle(
     server_url: str,
     house_id: str,
     house_password: str = "",
-    existing_config: AlistenConfig | None = Depends(get_config),
+    existing_config: AlistenConfig | None = Depends(get_db_config),
 ):
     """设置 Alisten 配置"""
     if existing_config:
@@ -466,17 +520,23 @@ async def config_set_handle(
         existing_config.server_url = server_url
         existing_config.house_id = house_id
         existing_config.house_password = house_password
+        config = existing_config
     else:
         # 创建新配置
-        new_config = AlistenConfig(
+        config = AlistenConfig(
             session_id=user_session.session_id,
             server_url=server_url,
             house_id=house_id,
             house_password=house_password,
         )
-        db_session.add(new_config)
+        db_session.add(config)
 
+    committed = snapshot(config)
+    await bump_version(db_session)
     await db_session.commit()
+    config_index.put(committed)
+    # 房间可能刚刚创建或修改，不再使用之前缓存的错误
+    await invalidate_house(server_url, house_id)
 
     await alisten_cmd.finish(
         f"Alisten 配置已设置:\n"
@@ -503,41 +563,69 @@ async def config_show_handle(config: AlistenConfig | None = Depends(get_config))
 @alisten_cmd.assign("config.delete", parameterless=[Depends(ensure_superuser)])
 async def config_delete_handle(
     db_session: async_scoped_session,
-    config: AlistenConfig | None = Depends(get_config),
+    config: AlistenConfig | None = Depends(get_db_config),
 ):
     """删除配置"""
     if not config:
         await alisten_cmd.finish("当前群组未配置 Alisten 服务")
 
+    session_id = config.session_id
     await db_session.delete(config)
+    await bump_version(db_session)
     await db_session.commit()
+    config_index.remove(session_id)
 
     await alisten_cmd.finish("Alisten 配置已删除")
 
 
+@alisten_cmd.assign("config.announce", parameterless=[Depends(ensure_superuser)])
+async def config_announce_handle(
+    db_session: async_scoped_session,
+    target: MsgTarget,
+    switch: str,
+    config: AlistenConfig | None = Depends(get_db_config),
+):
+    """开启或关闭切歌通知"""
+    switch_mapping = {"开启": True, "关闭": False, "on": True, "off": False}
+    if switch not in switch_mapping:
+        await alisten_cmd.finish("切歌通知只能设置为 '开启' 或 '关闭'")
+
+    if not config:
+        await alisten_cmd.finish("当前群组未配置 Alisten 服务")
+
+    enabled = switch_mapping[switch]
+    config.announce_target = target.dump() if enabled else None
+    committed = snapshot(config)
+    await bump_version(db_session)
+    await db_session.commit()
+    config_index.put(committed)
+
+    if enabled and not poller_enabled():
+        await alisten_cmd.finish("切歌通知已开启，但未开启轮询或推送，暂时无法发现切歌")
+    await alisten_cmd.finish(f"切歌通知已{'开启' if enabled else '关闭'}")
+
+
 @alisten_cmd.assign("house.info")
 async def house_info_handle(
     api: AlistenAPI = Depends(get_alisten_api),
 ):
     """获取当前房间的信息"""
-    result = await api.house_search()
-    if isinstance(result, ErrorResponse):
-        await alisten_cmd.finish(result.error)
+    directory = get_house_directory(api.config.server_url)
+    if error := await directory.ensure_loaded(api):
+        await alisten_cmd.finish(error.error)
 
     # 检查房间列表是否为空
-    if not result:
+    if not directory.houses:
         await alisten_cmd.finish("未找到任何房间")
 
-    # 在房间列表中查找匹配的房间
-    for house in result:
-        if house.id == api.config.house_id:
-            await alisten_cmd.finish(
-                f"当前房间信息:\n"
-                f"房间ID: {house.id}\n"
-                f"房间名称: {house.name}\n"
-                f"房间描述: {house.desc}\n"
-                f"当前人数: {house.population}"
-            )
+    if house := directory.get(api.config.house_id):
+        await alisten_cmd.finish(
+            f"当前房间信息:\n"
+            f"房间ID: {house.id}\n"
+            f"房间名称: {house.name}\n"
+            f"房间描述: {house.desc}\n"
+            f"当前人数: {house.population}"
+        )
 
     await alisten_cmd.finish(f"未找到房间ID为 {api.config.house_id} 的房间")
 
@@ -561,3 +649,66 @@ async def house_user_handle(
         msg += "\n"
 
     await alisten_cmd.finish(msg.strip(), at_sender=True)
+
+
+@alisten_cmd.assign("status", parameterless=[Depends(ensure_superuser)])
+async def status_handle(config: AlistenConfig | None = Depends(get_config)):
+    """查看服务器状态"""
+    if not config:
+        await alisten_cmd.finish("当前群组未配置 Alisten 服务")
+
+    breaker = get_breaker(config.server_url)
+    state = breaker.state
+
+    msg = f"Alisten 服务器状态:\n服务器地址: {config.server_url}\n"
+    msg += f"熔断状态: {BREAKER_STATE_NAMES[state]}"
+    if state == BreakerState.OPEN:
+        msg += f"（{math.ceil(breaker.retry_after)} 秒后探测）"
+    msg += f"\n连续失败: {breaker.consecutive_failures} 次\n"
+    msg += f"最近错误率: {breaker.error_rate:.0%}（{len(breaker.outcomes)} 次请求）"
+    if breaker.last_error:
+        msg += f"\n最近错误: {breaker.last_error}"
+    bulkhead = get_bulkhead(config.server_url)
+    if bulkhead.queued or bulkhead.rejected:
+        msg += f"\n并发请求: {bulkhead.active}/{bulkhead.limit}，排队 {bulkhead.waiting} 个"
+        if bulkhead.queued:
+            msg += f"\n排队: {bulkhead.queued} 次，平均等待 {bulkhead.wait_total / bulkhead.queued * 1000:.0f} 毫秒，"
+            msg += f"最长 {bulkhead.max_wait * 1000:.0f} 毫秒，队列最长 {bulkhead.max_depth} 个"
+        msg += f"\n服务繁忙: {bulkhead.rejected + bulkhead.timeouts} 次"
+    if poller := get_poller(config):
+        if poller.pushing:
+            msg += "\n房间状态: 接收推送中"
+        elif poller.idle:
+            msg += "\n房间状态: 无人使用，已暂停轮询"
+        else:
+            msg += f"\n房间状态: 每 {poller.interval:.1f} 秒轮询"
+
+    if transfer_stats := get_transfer_stats(config.server_url):
+        msg += "\n\n传输统计:"
+        for endpoint, stats in sorted(transfer_stats.items()):
+            msg += f"\n{endpoint}: {stats.requests} 次，{format_size(stats.wire_bytes)}"
+            if stats.body_bytes != stats.wire_bytes:
+                msg += f"（解压后 {format_size(stats.body_bytes)}）"
+            if stats.unmeasured:
+                msg += f"，其中 {stats.unmeasured} 次传输大小未知"
+
+    if lookups := search_cache.hits + search_cache.misses:
+        msg += "\n\n搜索缓存: "
+        if cache_stats := await search_cache.stats():
+            count, size = cache_stats
+            msg += f"{count} 条，{format_size(size)}，"
+        msg += f"命中率 {search_cache.hits / lookups:.0%}（{search_cache.hits}/{lookups}）"
+
+    await alisten_cmd.finish(msg)
+
+
+@alisten_cmd.assign("cache.clear", parameterless=[Depends(ensure_superuser)])
+async def cache_clear_handle():
+    """清空搜索结果缓存"""
+    try:
+        count = await search_cache.clear()
+        await search_store.clear()
+    except Exception:
+        logger.exception("清空搜索结果缓存失败")
+        await alisten_cmd.finish("清空搜索结果缓存失败，请稍后重试")
+    await alisten_cmd.finish(f"已清空 {count} 条搜索结果缓存")
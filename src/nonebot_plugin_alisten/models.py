@@ -1,4 +1,7 @@
+from typing import Any
+
 from nonebot_plugin_orm import Model
+from sqlalchemy import JSON
 from sqlalchemy.orm import Mapped, mapped_column
 
 
@@ -14,3 +17,26 @@ class AlistenConfig(Model):
     """房间 ID"""
     house_password: Mapped[str] = mapped_column(default="")
     """房间密码"""
+    announce_target: Mapped[dict[str, Any] | None] = mapped_column(JSON, default=None)
+    """切歌通知的发送目标（Target.dump() 的结果），为空时不发送"""
+
+
+class AlistenConfigVersion(Model):
+    """配置版本
+
+    每次设置或删除配置时递增，多进程部署时用于发现其他进程对配置的修改
+    """
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    version: Mapped[int] = mapped_column(default=0)
+
+
+class AlistenSearchResult(Model):
+    """持久化的搜索结果，重启后载入缓存"""
+
+    key: Mapped[str] = mapped_column(primary_key=True)
+    """缓存键"""
+    value: Mapped[bytes]
+    """codec.pack 序列化后的搜索结果"""
+    expires_at: Mapped[float] = mapped_column(index=True)
+    """过期时间（Unix 时间戳）"""
@@ -0,0 +1,352 @@
+"""当前音乐轮询
+
+每个已配置的房间（服务器地址、房间 ID 与房间密码都相同视为同一房间）由一个后台任务定期获取当前音乐，
+绑定该房间的所有群组查看当前音乐时直接读取轮询结果。房间密码不同的群组分别轮询，
+密码错误的群组既读不到其他群组的结果，也不会影响其他群组的轮询。
+房间的第一个群组配置加载或设置时启动轮询，最后一个群组的配置删除时停止。
+启动时加载的房间在 alisten_poll_stagger 秒内随机分散开始，轮询间隔也随机浮动，避免所有房间同时请求服务器。
+
+开启推送时改为订阅服务器推送的变化，见 push 模块。
+当前音乐变化时向开启了切歌通知的群组发送通知，见 announce 模块。
+
+通过插件发出的写操作会使当前音乐缓存的版本号变化，此后在下一次轮询或推送前不使用已有的结果。
+
+轮询间隔随房间的活跃程度调整：当前音乐没有变化时逐次延长，直到 alisten_poll_interval_max；
+当前音乐变化或通过插件修改房间后恢复为 alisten_poll_interval。
+绑定该房间的群组超过 alisten_poll_idle 秒没有使用命令时暂停轮询，有群组开启了切歌通知的房间除外；
+房间在有群组使用命令之前同样视为暂停，启动时不会一次轮询所有已配置的房间。
+
+轮询是后台请求：服务器没有空闲的并发名额或正在熔断时直接跳过这一次，不占用用户命令的排队名额，
+失败也不计入熔断器。
+"""
+
+import asyncio
+import contextlib
+import random
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+from nonebot import get_driver
+from nonebot.log import logger
+
+from .alisten_api import (
+    AlistenAPI,
+    CurrentMusicResponse,
+    ErrorResponse,
+    current_cache,
+    house_cache_key,
+    house_invalidated,
+    playlist_cache,
+)
+from .announce import announce
+from .config import plugin_config
+from .models import AlistenConfig
+from .push import MusicEvent, PushUnsupportedError, connect, receive, reconnect_delay
+
+driver = get_driver()
+
+
+@dataclass
+class HousePoller:
+    """单个房间的当前音乐轮询"""
+
+    BACKOFF = 1.5
+    """当前音乐没有变化时，下次轮询间隔延长的倍数"""
+    JITTER = 0.1
+    """轮询间隔随机浮动的比例"""
+
+    server_url: str
+    house_id: str
+    digest: str
+    """房间密码的摘要"""
+    sessions: dict[str, AlistenConfig] = field(default_factory=dict)
+    """绑定该房间的群组会话 ID -> 配置"""
+    current: CurrentMusicResponse | None = None
+    updated_at: float | None = None
+    """上次成功轮询的时间（time.monotonic）"""
+    version: int = 0
+    """上次轮询开始时当前音乐缓存的版本号"""
+    error: str | None = None
+    """上次轮询的错误，连续失败时只记录一次日志"""
+    pushing: bool = False
+    """推送连接是否正常，此时结果总是最新的"""
+    interval: float = field(default_factory=lambda: plugin_config.alisten_poll_interval)
+    """当前的轮询间隔（秒）"""
+    next_poll_at: float = 0.0
+    """下次轮询的时间（time.monotonic）"""
+    active_at: float = float("-inf")
+    """绑定该房间的群组最近一次使用命令的时间（time.monotonic），启动后还没有群组使用命令时视为暂停"""
+    _wakeup: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+    _task: asyncio.Task[None] | None = field(default=None, repr=False)
+
+    @property
+    def key(self) -> tuple[str, str, str]:
+        """轮询结果对应的缓存键"""
+        return self.server_url, self.house_id, self.digest
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def get(self) -> tuple[CurrentMusicResponse, float] | None:
+        """获取轮询得到的当前音乐
+
+        Returns:
+            (当前音乐, 轮询后经过的秒数)，没有可用的结果时返回 None
+        """
+        if self.current is None or self.updated_at is None or self.version != current_cache.version(self.key):
+            return None
+        if self.pushing:
+            return self.current, 0.0
+        age = time.monotonic() - self.updated_at
+        if age > plugin_config.alisten_current_fresh + plugin_config.alisten_current_stale:
+            return None
+        return self.current, age
+
+    @property
+    def config(self) -> AlistenConfig:
+        """最近绑定的群组的配置，绑定的群组使用相同的房间密码"""
+        return next(reversed(self.sessions.values()))
+
+    @property
+    def idle(self) -> bool:
+        """是否因为长时间无人使用而暂停轮询"""
+        idle = plugin_config.alisten_poll_idle
+        if idle <= 0 or any(config.announce_target is not None for config in self.sessions.values()):
+            return False
+        return time.monotonic() - self.active_at > idle
+
+    def touch(self) -> None:
+        """绑定该房间的群组使用了命令，暂停的轮询在最短间隔后恢复"""
+        now = time.monotonic()
+        idle = self.idle
+        self.active_at = now
+        if idle:
+            self.interval = plugin_config.alisten_poll_interval
+            self.next_poll_at = now + self.interval
+            self._wakeup.set()
+
+    def hurry(self) -> None:
+        """房间的状态可能已经改变，恢复最短的轮询间隔"""
+        now = time.monotonic()
+        self.active_at = now
+        self.interval = plugin_config.alisten_poll_interval
+        self.next_poll_at = min(self.next_poll_at, now + self.interval)
+        self._wakeup.set()
+
+    def _update(self, current: CurrentMusicResponse, version: int) -> bool:
+        """记录获取到的当前音乐
+
+        Returns:
+            当前音乐是否变化，第一次获取时不算作变化
+        """
+        previous = self.current
+        changed = previous is not None and (previous.id, previous.name) != (current.id, current.name)
+        if changed:
+            announce(self.sessions.values(), current)
+        self.error = None
+        self.current = current
+        self.version = version
+        self.updated_at = time.monotonic()
+        return changed
+
+    def _backoff(self, changed: bool) -> None:
+        """按本次轮询的结果调整轮询间隔"""
+        base = plugin_config.alisten_poll_interval
+        if changed:
+            self.interval = base
+        else:
+            self.interval = min(
+                max(self.interval, base) * self.BACKOFF, max(base, plugin_config.alisten_poll_interval_max)
+            )
+
+    async def poll(self) -> None:
+        """获取一次当前音乐"""
+        version = current_cache.version(self.key)
+        result = await AlistenAPI(config=self.config, background=True).music_sync()
+        if isinstance(result, ErrorResponse):
+            if self.error is None:
+                logger.warning(f"轮询当前音乐失败: {self.server_url} {self.house_id} {result.error}")
+            self.error = result.error
+            self._backoff(changed=False)
+            return
+
+        self._backoff(self._update(result, version))
+
+    async def _poll_once(self) -> None:
+        try:
+            await self.poll()
+        except Exception:
+            logger.exception("轮询当前音乐失败")
+
+    async def _poll_for(self, duration: float) -> None:
+        """在 duration 秒内按轮询间隔轮询，间隔为 0 时只等待"""
+        deadline = time.monotonic() + duration
+        interval = plugin_config.alisten_poll_interval
+        while True:
+            if interval > 0:
+                await self._poll_once()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(interval, remaining) if interval > 0 else remaining)
+
+    async def _wait(self) -> None:
+        """等待到下次轮询的时间，暂停时一直等待到有人使用命令"""
+        while True:
+            self._wakeup.clear()
+            timeout = None if self.idle else self.next_poll_at - time.monotonic()
+            if timeout is not None and timeout <= 0:
+                return
+            with contextlib.suppress(TimeoutError):
+                async with asyncio.timeout(timeout):
+                    await self._wakeup.wait()
+
+    async def subscribe(self) -> bool:
+        """订阅推送直到连接断开
+
+        Returns:
+            连接是否成功建立过
+
+        Raises:
+            PushUnsupportedError: 当前驱动器不支持 WebSocket 客户端
+        """
+        key = self.key
+        connected = False
+        try:
+            async with connect(self.config) as websocket:
+                connected = self.pushing = True
+                # 订阅之后获取一次完整状态，之后只接收变化
+                await self._poll_once()
+                while True:
+                    event = await receive(websocket)
+                    if isinstance(event, MusicEvent):
+                        self._update(event.data, current_cache.version(key))
+                    elif event is not None:
+                        await playlist_cache.set(key, event.data, plugin_config.alisten_push_timeout)
+        except PushUnsupportedError:
+            raise
+        except Exception as e:
+            log = logger.warning if connected else logger.debug
+            log(f"推送连接断开: {self.server_url} {self.house_id} {type(e).__name__}: {e}")
+        finally:
+            if connected:
+                self.pushing = False
+                # 断开期间无法得知播放列表是否变化
+                await playlist_cache.invalidate(key)
+        return connected
+
+    async def _run(self, delay: float) -> None:
+        if delay > 0:
+            await asyncio.sleep(delay)
+        push = plugin_config.alisten_push
+        failures = 0
+        while self.sessions:
+            if not push:
+                if plugin_config.alisten_poll_interval <= 0:
+                    return
+                await self._wait()
+                await self._poll_once()
+                jitter = random.uniform(1 - self.JITTER, 1 + self.JITTER)
+                self.next_poll_at = time.monotonic() + self.interval * jitter
+                continue
+
+            try:
+                connected = await self.subscribe()
+            except PushUnsupportedError as e:
+                logger.warning(f"无法订阅推送，改为轮询: {e}")
+                push = False
+                continue
+            failures = 0 if connected else failures + 1
+            # 等待重连期间轮询
+            await self._poll_for(reconnect_delay(failures))
+
+    def start(self, delay: float = 0.0) -> None:
+        """启动轮询，delay 秒后第一次轮询或连接推送"""
+        if not self.running:
+            self._task = asyncio.create_task(self._run(delay))
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+_pollers: dict[tuple[str, str, str], HousePoller] = {}
+"""(服务器地址, 房间 ID, 房间密码的摘要) -> 轮询"""
+
+
+def _key(config: AlistenConfig) -> tuple[str, str, str]:
+    return house_cache_key(config.server_url, config.house_id, config.house_password)
+
+
+def get_poller(config: AlistenConfig) -> HousePoller | None:
+    """获取群组绑定的房间的轮询"""
+    return _pollers.get(_key(config))
+
+
+def enabled() -> bool:
+    """是否需要在后台获取房间状态"""
+    return plugin_config.alisten_poll_interval > 0 or plugin_config.alisten_push
+
+
+def bind(config: AlistenConfig) -> None:
+    """群组绑定房间，房间尚未轮询时启动轮询"""
+    if not enabled():
+        return
+    key = _key(config)
+    if (poller := _pollers.get(key)) is None:
+        poller = _pollers[key] = HousePoller(*key)
+    poller.sessions.pop(config.session_id, None)
+    poller.sessions[config.session_id] = config
+    poller.start()
+
+
+def unbind(config: AlistenConfig) -> None:
+    """群组解除绑定房间，房间没有其他群组绑定时停止轮询"""
+    key = _key(config)
+    if (poller := _pollers.get(key)) is None:
+        return
+    poller.sessions.pop(config.session_id, None)
+    if not poller.sessions:
+        poller.stop()
+        del _pollers[key]
+
+
+def sync_pollers(configs: Iterable[AlistenConfig]) -> None:
+    """按所有群组的配置启动或停止轮询，仍有群组绑定的房间保留已有的轮询结果
+
+    新启动的轮询在 alisten_poll_stagger 秒内随机分散开始
+    """
+    houses: dict[tuple[str, str, str], dict[str, AlistenConfig]] = {}
+    for config in configs:
+        houses.setdefault(_key(config), {})[config.session_id] = config
+
+    for key in list(_pollers):
+        if key not in houses:
+            _pollers.pop(key).stop()
+    if not enabled():
+        return
+    for key, sessions in houses.items():
+        if (poller := _pollers.get(key)) is None:
+            poller = _pollers[key] = HousePoller(*key)
+        poller.sessions = sessions
+        poller.start(random.uniform(0, plugin_config.alisten_poll_stagger))
+
+
+def _hurry(server_url: str, house_id: str) -> None:
+    for poller in _pollers.values():
+        if (poller.server_url, poller.house_id) == (server_url, house_id):
+            poller.hurry()
+
+
+house_invalidated.append(_hurry)
+
+
+@driver.on_shutdown
+def close_pollers() -> None:
+    """停止所有轮询"""
+    for poller in _pollers.values():
+        poller.stop()
+    _pollers.clear()
@@ -0,0 +1,101 @@
+"""房间状态推送
+
+开启 alisten_push 后，每个房间的轮询任务改为通过 WebSocket 订阅服务器推送的当前音乐与播放列表变化，
+连接期间不再轮询。连接断开后按指数退避重连，等待重连期间继续轮询；
+驱动器不支持 WebSocket 客户端时一直轮询。
+
+协议：连接 {服务器地址}{alisten_push_endpoint}（http/https 换成 ws/wss），连接后发送房间信息
+{"houseId": ..., "password": ...}，之后服务器发送 {"type": "music" | "playlist", "data": {...}} 形式的消息。
+其他类型的消息（如心跳）只用于判断连接是否存活。
+"""
+
+import asyncio
+import random
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Annotated, Literal
+
+from nonebot import get_driver
+from nonebot.drivers import Request, WebSocket, WebSocketClientMixin
+from pydantic import BaseModel, Field, RootModel, ValidationError
+
+from .alisten_api import CurrentMusicResponse, PlaylistResponse
+from .codec import decode
+from .config import plugin_config
+from .envelope import house_envelope, request_body
+from .models import AlistenConfig
+
+RECONNECT_BACKOFF = 1.0
+"""重连退避的初始时间（秒）"""
+
+driver = get_driver()
+
+
+class PushUnsupportedError(Exception):
+    """当前驱动器不支持 WebSocket 客户端"""
+
+
+class MusicEvent(BaseModel):
+    """当前音乐变化"""
+
+    type: Literal["music"]
+    data: CurrentMusicResponse
+
+
+class PlaylistEvent(BaseModel):
+    """播放列表变化"""
+
+    type: Literal["playlist"]
+    data: PlaylistResponse
+
+
+class PushEvent(RootModel[Annotated[MusicEvent | PlaylistEvent, Field(discriminator="type")]]):
+    """推送消息"""
+
+
+def push_url(server_url: str) -> str:
+    """推送端点的 WebSocket 地址"""
+    if server_url.startswith("https://"):
+        server_url = "wss://" + server_url.removeprefix("https://")
+    elif server_url.startswith("http://"):
+        server_url = "ws://" + server_url.removeprefix("http://")
+    return server_url + plugin_config.alisten_push_endpoint
+
+
+def reconnect_delay(failures: int) -> float:
+    """连续失败 failures 次后重连前的等待时间（秒），使用带上限的指数退避和全抖动"""
+    ceiling = min(plugin_config.alisten_push_backoff_max, RECONNECT_BACKOFF * 2**failures)
+    return random.uniform(0, ceiling)
+
+
+@asynccontextmanager
+async def connect(config: AlistenConfig) -> AsyncIterator[WebSocket]:
+    """连接推送端点并订阅房间"""
+    if not isinstance(driver, WebSocketClientMixin):
+        raise PushUnsupportedError("当前驱动器不支持 WebSocket 客户端")
+
+    request = Request("GET", push_url(config.server_url), timeout=plugin_config.alisten_timeout)
+    async with driver.websocket(request) as websocket:
+        envelope = house_envelope(config.house_id, config.house_password)
+        await websocket.send_text(request_body(envelope).decode())
+        yield websocket
+
+
+async def receive(websocket: WebSocket) -> MusicEvent | PlaylistEvent | None:
+    """接收一条消息
+
+    Returns:
+        当前音乐或播放列表的变化，其他消息返回 None
+
+    Raises:
+        TimeoutError: 超过 alisten_push_timeout 秒没有收到消息
+    """
+    async with asyncio.timeout(plugin_config.alisten_push_timeout):
+        message = await websocket.receive()
+
+    content = message.encode() if isinstance(message, str) else message
+    try:
+        return decode(PushEvent, content).root
+    except ValidationError:
+        # 心跳或暂不支持的消息
+        return None
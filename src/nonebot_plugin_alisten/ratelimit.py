@@ -0,0 +1,109 @@
+"""命令频率限制
+
+使用令牌桶分别限制每个用户、每个群组与每个服务器发往 Alisten 服务器的命令：
+桶的容量是允许的突发次数，令牌按固定速率恢复，每条命令消耗一个令牌。
+任一级别的令牌不足时拒绝命令，且不消耗其他级别的令牌。
+
+令牌桶只保存在进程内存中，按最近使用的时间排列；闲置到足以恢复满令牌的桶与新建的桶没有区别，直接淘汰。
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Literal
+
+from .config import plugin_config
+
+Scope = Literal["user", "group", "server"]
+
+
+@dataclass(slots=True)
+class Bucket:
+    tokens: float
+    updated_at: float
+    """上次更新令牌数的时间（time.monotonic）"""
+
+
+class TokenBucketLimiter:
+    """一组键各自独立的令牌桶
+
+    Args:
+        burst: 桶的容量
+        rate: 每秒恢复的令牌数
+    """
+
+    def __init__(self, burst: int, rate: float) -> None:
+        self.burst = burst
+        self.rate = rate
+        self._buckets: OrderedDict[str, Bucket] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    @property
+    def enabled(self) -> bool:
+        return self.burst > 0 and self.rate > 0
+
+    def _tokens(self, key: str, now: float) -> float:
+        if (bucket := self._buckets.get(key)) is None:
+            return self.burst
+        return min(self.burst, bucket.tokens + (now - bucket.updated_at) * self.rate)
+
+    def retry_after(self, key: str, now: float) -> float:
+        """还需要等待多少秒才有一个令牌，为 0 时可以立即使用"""
+        if not self.enabled:
+            return 0.0
+        return max(0.0, (1 - self._tokens(key, now)) / self.rate)
+
+    def consume(self, key: str, now: float) -> None:
+        """消耗一个令牌，调用前需要确认 retry_after 为 0"""
+        if not self.enabled:
+            return
+        tokens = self._tokens(key, now) - 1
+        if (bucket := self._buckets.get(key)) is None:
+            self._buckets[key] = Bucket(tokens, now)
+        else:
+            bucket.tokens = tokens
+            bucket.updated_at = now
+            self._buckets.move_to_end(key)
+        self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        """淘汰闲置到已经恢复满令牌的桶"""
+        full_after = self.burst / self.rate
+        while self._buckets:
+            bucket = next(iter(self._buckets.values()))
+            if now - bucket.updated_at < full_after:
+                return
+            self._buckets.popitem(last=False)
+
+
+_limiters: dict[Scope, TokenBucketLimiter] = {}
+
+
+def get_limiter(scope: Scope) -> TokenBucketLimiter:
+    """获取对应级别的令牌桶，首次使用时按配置创建"""
+    if (limiter := _limiters.get(scope)) is None:
+        burst, rate = {
+            "user": (plugin_config.alisten_rate_user_burst, plugin_config.alisten_rate_user),
+            "group": (plugin_config.alisten_rate_group_burst, plugin_config.alisten_rate_group),
+            "server": (plugin_config.alisten_rate_server_burst, plugin_config.alisten_rate_server),
+        }[scope]
+        limiter = _limiters[scope] = TokenBucketLimiter(burst, rate)
+    return limiter
+
+
+def acquire(user_id: str, session_id: str, server_url: str) -> tuple[Scope, float] | None:
+    """为一条命令消耗各级别的令牌
+
+    Returns:
+        令牌不足时返回 (受限的级别, 需要等待的秒数)，此时不消耗任何令牌
+    """
+    now = time.monotonic()
+    keys: list[tuple[Scope, str]] = [("user", user_id), ("group", session_id), ("server", server_url)]
+    for scope, key in keys:
+        if (wait := get_limiter(scope).retry_after(key, now)) > 0:
+            return scope, wait
+    for scope, key in keys:
+        get_limiter(scope).consume(key, now)
+    return None
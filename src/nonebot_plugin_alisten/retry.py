@@ -0,0 +1,58 @@
+"""幂等请求的重试策略
+
+只有读取类请求会重试。每个服务器有独立的重试预算：正常的响应会积攒少量额度，每次重试消耗一个额度，
+服务器持续故障时额度很快耗尽，重试自然停止，避免形成重试风暴。
+"""
+
+import random
+from dataclasses import dataclass
+
+from .config import plugin_config
+
+RETRYABLE_STATUS_CODES = frozenset({502, 503, 504})
+"""可以重试的 HTTP 状态码"""
+
+
+@dataclass
+class RetryBudget:
+    """重试预算"""
+
+    ratio: float
+    """每个正常响应积攒的额度"""
+    max_tokens: float
+    """额度上限"""
+    tokens: float
+
+    def deposit(self) -> None:
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """尝试消耗一次重试的额度"""
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+_budgets: dict[str, RetryBudget] = {}
+"""服务器地址 -> 重试预算"""
+
+
+def get_retry_budget(server_url: str) -> RetryBudget:
+    """获取服务器对应的重试预算"""
+    if (budget := _budgets.get(server_url)) is None:
+        budget = _budgets[server_url] = RetryBudget(
+            ratio=plugin_config.alisten_retry_budget_ratio,
+            max_tokens=plugin_config.alisten_retry_budget,
+            tokens=plugin_config.alisten_retry_budget,
+        )
+    return budget
+
+
+def backoff(attempt: int) -> float:
+    """第 attempt 次重试前的等待时间（秒）
+
+    使用带上限的指数退避和全抖动
+    """
+    ceiling = min(plugin_config.alisten_retry_backoff_max, plugin_config.alisten_retry_backoff * 2**attempt)
+    return random.uniform(0, ceiling)
@@ -0,0 +1,147 @@
+"""搜索结果持久化
+
+搜索结果写入缓存的同时加入写入队列，后台任务定期将队列中的结果批量写入数据库，
+命令处理时不访问数据库。启动时将数据库中未过期的结果载入缓存，重启后不必重新请求服务器。
+
+写入是尽力而为的：进程异常退出时队列中尚未写入的结果会丢失，只影响重启后的命中率。
+"""
+
+import asyncio
+import contextlib
+import time
+
+from nonebot.log import logger
+from nonebot_plugin_orm import get_session
+from sqlalchemy import delete, select
+
+from .cache import TTLCache
+from .codec import pack
+from .config import plugin_config
+from .models import AlistenSearchResult
+
+BATCH_SIZE = 100
+"""队列中的结果达到多少条时立即写入，不等待写入间隔"""
+
+
+class SearchStore[V]:
+    """将缓存中的搜索结果持久化到数据库
+
+    Args:
+        cache: 搜索结果缓存
+    """
+
+    def __init__(self, cache: TTLCache[V]) -> None:
+        self.cache = cache
+        self._pending: dict[str, tuple[V, float]] = {}
+        """缓存键 -> (搜索结果, 过期时间)，按加入顺序排列"""
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def put(self, key: tuple[object, ...], value: V, ttl: float) -> None:
+        """将搜索结果加入写入队列"""
+        max_entries = plugin_config.alisten_search_persist_entries
+        if max_entries <= 0 or ttl <= 0:
+            return
+
+        encoded = self.cache.encode_key(key)
+        self._pending.pop(encoded, None)
+        self._pending[encoded] = (value, time.time() + ttl)
+        # 队列与数据库的上限相同，超出的部分写入后也会被淘汰
+        while len(self._pending) > max_entries:
+            del self._pending[next(iter(self._pending))]
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        if len(self._pending) >= BATCH_SIZE:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), plugin_config.alisten_search_persist_interval)
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("写入搜索结果失败")
+
+    async def flush(self) -> int:
+        """将队列中的结果写入数据库，并淘汰过期及超出上限的条目
+
+        Returns:
+            写入的条目数
+        """
+        pending, self._pending = self._pending, {}
+        now = time.time()
+        rows = [
+            AlistenSearchResult(key=key, value=pack(self.cache.tp, value), expires_at=expires_at)
+            for key, (value, expires_at) in pending.items()
+            if expires_at > now
+        ]
+        if not rows:
+            return 0
+
+        try:
+            async with get_session() as db_session, db_session.begin():
+                await db_session.execute(delete(AlistenSearchResult).where(AlistenSearchResult.key.in_(list(pending))))
+                db_session.add_all(rows)
+                await db_session.flush()
+                await db_session.execute(delete(AlistenSearchResult).where(AlistenSearchResult.expires_at <= now))
+                evicted = (
+                    await db_session.scalars(
+                        select(AlistenSearchResult.key)
+                        .order_by(AlistenSearchResult.expires_at.desc())
+                        .offset(plugin_config.alisten_search_persist_entries)
+                    )
+                ).all()
+                if evicted:
+                    await db_session.execute(delete(AlistenSearchResult).where(AlistenSearchResult.key.in_(evicted)))
+        except Exception:
+            # 放回队列等待下次写入，期间更新过的结果以新的为准
+            self._pending = pending | self._pending
+            raise
+        return len(rows)
+
+    async def load(self) -> int:
+        """将数据库中未过期的结果载入缓存
+
+        Returns:
+            载入的条目数
+        """
+        if plugin_config.alisten_search_persist_entries <= 0:
+            return 0
+
+        now = time.time()
+        async with get_session() as db_session:
+            rows = (
+                await db_session.execute(
+                    select(AlistenSearchResult.key, AlistenSearchResult.value, AlistenSearchResult.expires_at)
+                    .where(AlistenSearchResult.expires_at > now)
+                    .order_by(AlistenSearchResult.expires_at)
+                )
+            ).all()
+
+        # 按过期时间从早到晚写入，缓存容量不足时保留较新的结果
+        for key, value, expires_at in rows:
+            await self.cache.restore(key, value, expires_at - now)
+        logger.debug(f"已载入 {len(rows)} 条搜索结果")
+        return len(rows)
+
+    async def clear(self) -> int:
+        """清空队列与数据库中的结果，返回数据库中删除的条目数"""
+        self._pending.clear()
+        async with get_session() as db_session, db_session.begin():
+            result = await db_session.execute(delete(AlistenSearchResult))
+        return result.rowcount  # type: ignore[attr-defined]
+
+    async def close(self) -> None:
+        """停止后台任务并写入队列中剩余的结果"""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
@@ -0,0 +1,31 @@
+"""合并相同的并发请求
+
+同一时间对同一服务器发出的相同读取请求只会真正发送一次，其余调用者共享这次请求的结果。
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+_inflight: dict[Hashable, asyncio.Task[Any]] = {}
+"""请求键 -> 正在进行的请求"""
+
+
+async def single_flight[T](key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+    """执行 func，若已有相同 key 的调用正在进行则等待其结果
+
+    请求在独立的任务中执行，某个调用者被取消不会影响其他正在等待的调用者。
+
+    Args:
+        key: 请求键
+        func: 实际发送请求的函数
+
+    Returns:
+        请求结果
+    """
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(func())
+        _inflight[key] = task
+        task.add_done_callback(lambda t: _inflight.pop(key) if _inflight.get(key) is t else None)
+    return await asyncio.shield(task)
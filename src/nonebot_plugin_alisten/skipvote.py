@@ -0,0 +1,107 @@
+"""切歌投票的汇总
+
+同一群组的第一个投票立即提交并回复，同时开始一个 alisten_skip_window 秒的窗口；
+窗口内之后的投票合并为一批：每个人的投票仍然分别提交，窗口结束且这一批投票都提交后，
+由这一批中第一个投票的人的命令统一回复。窗口结束后的投票重新开始一个窗口。
+
+同一群组的投票依次提交，同时只提交一个。
+"""
+
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
+
+from .alisten_api import AlistenAPI, ErrorResponse, VoteSkipResponse
+from .config import plugin_config
+
+
+@dataclass
+class SkipBatch:
+    """窗口内第一个投票之后的投票"""
+
+    votes: int = 0
+    """成功的投票数"""
+    result: VoteSkipResponse | None = None
+    """最后一次成功投票的结果"""
+    errors: Counter[str] = field(default_factory=Counter)
+    """失败的原因 -> 人数"""
+    tasks: list[asyncio.Task[VoteSkipResponse | ErrorResponse]] = field(default_factory=list)
+
+
+@dataclass
+class SkipWindow:
+    closes_at: float
+    """窗口结束的时间（事件循环的时间）"""
+    batch: SkipBatch | None = None
+
+
+_windows: dict[str, SkipWindow] = {}
+"""群组会话 ID -> 正在进行的窗口"""
+_tails: dict[str, asyncio.Task[VoteSkipResponse | ErrorResponse]] = {}
+"""群组会话 ID -> 最后提交的投票，之后的投票等待它完成后再提交"""
+
+
+async def _submit(
+    api: AlistenAPI, previous: asyncio.Task[VoteSkipResponse | ErrorResponse] | None
+) -> VoteSkipResponse | ErrorResponse:
+    session_id = api.config.session_id
+    try:
+        if previous is not None:
+            await asyncio.wait([previous])
+        return await api.music_skip_vote()
+    finally:
+        if _tails.get(session_id) is asyncio.current_task():
+            del _tails[session_id]
+
+
+def _enqueue(api: AlistenAPI) -> asyncio.Task[VoteSkipResponse | ErrorResponse]:
+    """排在同一群组之前的投票之后提交"""
+    session_id = api.config.session_id
+    task = _tails[session_id] = asyncio.create_task(_submit(api, _tails.get(session_id)))
+    return task
+
+
+def _close(session_id: str, window: SkipWindow) -> None:
+    if _windows.get(session_id) is window:
+        del _windows[session_id]
+
+
+async def vote(api: AlistenAPI) -> VoteSkipResponse | ErrorResponse | SkipBatch | None:
+    """投票跳过当前音乐
+
+    Returns:
+        窗口内的第一个投票返回自己的结果；第二个投票等待窗口结束且这一批投票都提交后，返回这一批的结果；
+        之后的投票返回 None
+    """
+    session_id = api.config.session_id
+    loop = asyncio.get_running_loop()
+    window = _windows.get(session_id)
+    if window is None or loop.time() >= window.closes_at:
+        window = _windows[session_id] = SkipWindow(loop.time() + plugin_config.alisten_skip_window)
+        loop.call_later(plugin_config.alisten_skip_window, _close, session_id, window)
+        return await _enqueue(api)
+
+    task = _enqueue(api)
+    if window.batch is not None:
+        window.batch.tasks.append(task)
+        return None
+
+    batch = window.batch = SkipBatch(tasks=[task])
+    await asyncio.sleep(window.closes_at - loop.time())
+    for result in await asyncio.gather(*batch.tasks):
+        if isinstance(result, ErrorResponse):
+            batch.errors[result.error] += 1
+        else:
+            batch.votes += 1
+            batch.result = result
+    return batch
+
+
+def format_batch(batch: SkipBatch) -> str:
+    """多人投票时的汇总回复"""
+    lines = []
+    if batch.result is not None:
+        required_str = f"/{batch.result.required_votes}" if batch.result.required_votes else ""
+        lines.append(f"{batch.votes} 人投票跳过，当前票数：{batch.result.current_votes}{required_str}")
+    lines.extend(f"{count} 人投票失败：{error}" for error, count in batch.errors.items())
+    return "\n".join(lines)
@@ -0,0 +1,107 @@
+"""Alisten 服务器 HTTP 连接管理
+
+同一服务器地址的所有请求共用一个长连接会话，避免每次请求都重新建立 TCP/TLS 连接。
+开启 HTTP/2 后同一服务器的并发请求复用同一个连接，驱动器不支持时回退到 HTTP/1.1，
+服务器不支持时由 TLS 协商自动回退。
+"""
+
+from typing import cast
+
+from nonebot import get_driver
+from nonebot.drivers import HTTPClientMixin, HTTPClientSession, HTTPVersion, Request, Response
+from nonebot.log import logger
+
+from .config import plugin_config
+
+driver = get_driver()
+
+_sessions: dict[str, HTTPClientSession] = {}
+"""服务器地址 -> 已初始化的会话"""
+_session_supported = True
+"""驱动器是否支持 get_session"""
+_http2_supported = True
+"""驱动器是否支持 HTTP/2"""
+
+
+async def _create_session() -> HTTPClientSession:
+    """创建并初始化会话"""
+    global _http2_supported
+
+    mixin = cast("HTTPClientMixin", driver)
+    if plugin_config.alisten_http2 and _http2_supported:
+        try:
+            session = mixin.get_session(version=HTTPVersion.H2)
+            await session.setup()
+            return session
+        except NotImplementedError:
+            raise
+        except (RuntimeError, ImportError) as e:
+            # aiohttp 不支持 HTTP/2，httpx 未安装 h2 时也无法使用
+            logger.warning(f"当前驱动器无法使用 HTTP/2，回退到 HTTP/1.1: {e}")
+            _http2_supported = False
+
+    session = mixin.get_session()
+    await session.setup()
+    return session
+
+
+async def get_session(server_url: str) -> HTTPClientSession | None:
+    """获取服务器对应的长连接会话
+
+    会话在首次使用时创建，之后所有绑定到该服务器的 AlistenAPI 实例共用。
+
+    Args:
+        server_url: 服务器地址
+
+    Returns:
+        会话实例，驱动器不支持会话时返回 None
+    """
+    global _session_supported
+
+    if session := _sessions.get(server_url):
+        return session
+    if not _session_supported:
+        return None
+
+    try:
+        session = await _create_session()
+    except NotImplementedError:
+        logger.debug("当前驱动器不支持 HTTP 会话，回退到单次请求")
+        _session_supported = False
+        return None
+
+    # setup 期间可能有其他协程已经创建了会话，以先创建的为准
+    if existing := _sessions.get(server_url):
+        await session.close()
+        return existing
+
+    _sessions[server_url] = session
+    return session
+
+
+async def send(server_url: str, request: Request) -> Response:
+    """通过服务器对应的会话发送请求
+
+    Args:
+        server_url: 服务器地址
+        request: 请求
+
+    Returns:
+        响应
+    """
+    session = await get_session(server_url)
+    if session is None:
+        return await cast("HTTPClientMixin", driver).request(request)
+    return await session.request(request)
+
+
+@driver.on_shutdown
+async def close_sessions() -> None:
+    """关闭所有会话"""
+    sessions = list(_sessions.values())
+    _sessions.clear()
+    for session in sessions:
+        try:
+            await session.close()
+        except Exception:
+            logger.exception("关闭 Alisten 会话失败")
@@ -0,0 +1,197 @@
+import asyncio
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+import httpx
+import pytest
+import respx
+from nonebug import App
+from pytest_mock import MockerFixture
+
+from tests.fake import FakeRedisServer, fake_alisten_api
+
+PLAYLIST = {
+    "playlist": [
+        {"id": "123", "name": "Song 1", "source": "wy", "user": {"name": "user1", "email": "a@a.com"}, "likes": 5},
+    ]
+}
+
+
+@pytest.fixture
+async def redis_server() -> AsyncIterator[FakeRedisServer]:
+    server = FakeRedisServer(password="secret")
+    await server.start()
+    yield server
+    await server.stop()
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend_name(request: pytest.FixtureRequest, app: App, mocker: MockerFixture, redis_server: FakeRedisServer):
+    """依次使用三种缓存后端"""
+    from nonebot_plugin_alisten.config import plugin_config
+
+    mocker.patch.object(plugin_config, "alisten_cache_backend", request.param)
+    mocker.patch.object(plugin_config, "alisten_cache_redis_url", redis_server.url)
+    return request.param
+
+
+async def test_backend(backend_name: str):
+    """测试各缓存后端的读写、过期、清空与统计"""
+    from nonebot_plugin_alisten.backend import get_backend
+
+    backend = get_backend()
+    assert type(backend).__name__.lower().startswith(backend_name)
+
+    await backend.set("alisten:a:1", b"\x00\x01", ttl=60)
+    await backend.set("alisten:a:2", b"\x02", ttl=60)
+    await backend.set("alisten:b:1", b"\x03", ttl=60)
+    assert await backend.get("alisten:a:1") == b"\x00\x01"
+    assert await backend.get("alisten:a:3") is None
+    assert await backend.stats("alisten:a:") == (2, 3)
+
+    await backend.delete("alisten:a:1")
+    assert await backend.get("alisten:a:1") is None
+
+    await backend.set("alisten:b:2", b"\x04", ttl=0.05)
+    await asyncio.sleep(0.1)
+    assert await backend.get("alisten:b:2") is None
+
+    assert await backend.clear("alisten:b:") == 1
+    assert await backend.get("alisten:a:2") == b"\x02"
+
+
+@respx.mock(assert_all_called=True)
+async def test_playlist_cached_in_backend(backend_name: str, respx_mock: respx.MockRouter):
+    """测试播放列表缓存在配置的后端中"""
+    from nonebot_plugin_alisten.alisten_api import PlaylistResponse
+
+    mocked_api = respx_mock.post("http://localhost:8080/music/playlist").mock(
+        return_value=httpx.Response(status_code=200, json=PLAYLIST)
+    )
+
+    first = await fake_alisten_api().music_playlist()
+    second = await fake_alisten_api().music_playlist()
+
+    assert isinstance(first, PlaylistResponse)
+    assert second == first
+    assert mocked_api.call_count == 1
+
+
+async def test_sqlite_shared_between_processes(app: App, tmp_path: Path):
+    """测试多个进程通过同一个 SQLite 文件共享缓存"""
+    from nonebot_plugin_alisten.backend import SQLiteBackend
+
+    first = SQLiteBackend(tmp_path / "cache.db")
+    second = SQLiteBackend(tmp_path / "cache.db")
+    try:
+        await first.set("alisten:a:1", b"value", ttl=60)
+        assert await second.get("alisten:a:1") == b"value"
+        await second.delete("alisten:a:1")
+        assert await first.get("alisten:a:1") is None
+    finally:
+        await first.close()
+        await second.close()
+
+
+async def test_redis_auth_and_select(app: App, redis_server: FakeRedisServer):
+    """测试连接时认证并选择数据库，服务器断开后重新连接"""
+    from nonebot_plugin_alisten.backend import RedisBackend, RedisError
+
+    backend = RedisBackend(redis_server.url)
+    try:
+        await backend.set("alisten:a:1", b"value", ttl=60)
+        assert redis_server.commands[:2] == [[b"AUTH", b"secret"], [b"SELECT", b"1"]]
+        assert await backend.get("alisten:a:1") == b"value"
+
+        assert backend._writer
+        backend._writer.close()
+        await asyncio.sleep(0.01)
+        with pytest.raises((ConnectionError, asyncio.IncompleteReadError)):
+            await backend.get("alisten:a:1")
+        assert await backend.get("alisten:a:1") == b"value"
+    finally:
+        await backend.close()
+
+    wrong = RedisBackend(redis_server.url.replace("secret", "wrong"))
+    with pytest.raises(RedisError):
+        await wrong.get("alisten:a:1")
+    assert wrong._writer is None
+
+
+async def test_redis_pipeline(app: App, redis_server: FakeRedisServer):
+    """测试流水线发送多条命令，出错时读完所有回复，连接仍可继续使用"""
+    from nonebot_plugin_alisten.backend import RedisBackend, RedisError
+
+    backend = RedisBackend(redis_server.url)
+    try:
+        for i in range(3):
+            await backend.set(f"alisten:a:{i}", b"v" * (i + 1), ttl=60)
+        assert await backend.pipeline([("STRLEN", f"alisten:a:{i}") for i in range(3)]) == [1, 2, 3]
+        assert await backend.stats("alisten:a:") == (3, 6)
+
+        with pytest.raises(RedisError):
+            await backend.pipeline([("GET", "alisten:a:0"), ("UNKNOWN",), ("GET", "alisten:a:1")])
+        assert await backend.get("alisten:a:2") == b"vvv"
+    finally:
+        await backend.close()
+
+
+async def test_redis_cancelled(app: App, redis_server: FakeRedisServer):
+    """测试等待回复时被取消后断开连接，之后的命令不会读到这次的回复"""
+    from nonebot_plugin_alisten.backend import RedisBackend
+
+    backend = RedisBackend(redis_server.url)
+    try:
+        await backend.set("alisten:a:1", b"value-1", ttl=60)
+        await backend.set("alisten:a:2", b"value-2", ttl=60)
+
+        redis_server.delay = 0.1
+        task = asyncio.create_task(backend.get("alisten:a:1"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert backend._writer is None
+
+        redis_server.delay = 0
+        assert await backend.get("alisten:a:2") == b"value-2"
+    finally:
+        await backend.close()
+
+
+@respx.mock(assert_all_called=True)
+async def test_backend_unavailable(app: App, respx_mock: respx.MockRouter, mocker: MockerFixture):
+    """测试缓存后端不可用时视为未命中，不影响命令"""
+    from nonebot_plugin_alisten.alisten_api import PlaylistResponse
+    from nonebot_plugin_alisten.config import plugin_config
+
+    # 没有服务器监听的端口
+    mocker.patch.object(plugin_config, "alisten_cache_backend", "redis")
+    mocker.patch.object(plugin_config, "alisten_cache_redis_url", "redis://127.0.0.1:1/0")
+    mocked_api = respx_mock.post("http://localhost:8080/music/playlist").mock(
+        return_value=httpx.Response(status_code=200, json=PLAYLIST)
+    )
+
+    assert isinstance(await fake_alisten_api().music_playlist(), PlaylistResponse)
+    assert isinstance(await fake_alisten_api().music_playlist(), PlaylistResponse)
+    assert mocked_api.call_count == 2
+
+
+def test_pack():
+    """测试缓存值的序列化"""
+    from nonebot_plugin_alisten.alisten_api import PlaylistResponse, SearchMusicResponse
+    from nonebot_plugin_alisten.codec import pack, unpack
+
+    small = SearchMusicResponse.model_validate({"list": [], "totalSize": 0})
+    assert pack(SearchMusicResponse, small) == b'\x00{"list":[],"totalSize":0}'
+    assert unpack(SearchMusicResponse, pack(SearchMusicResponse, small)) == small
+
+    # 较长的值压缩后存储
+    playlist = PlaylistResponse.model_validate({"playlist": PLAYLIST["playlist"] * 20})
+    data = pack(PlaylistResponse, playlist)
+    assert data[:1] == b"\x01"
+    assert len(data) < len(playlist.model_dump_json(by_alias=True)) / 5
+    assert unpack(PlaylistResponse, data) == playlist
+
+    with pytest.raises(ValueError, match="未知的缓存值格式"):
+        unpack(PlaylistResponse, b"\x09{}")
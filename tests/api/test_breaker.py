@@ -0,0 +1,160 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+import respx
+from nonebot import get_adapter
+from nonebot.adapters.onebot.v11 import Adapter, Bot, Message
+from nonebug import App
+from pytest_mock import MockerFixture
+
+from tests.fake import fake_alisten_api, fake_group_message_event_v11
+
+
+def test_breaker_consecutive_failures(mocker: MockerFixture):
+    """测试连续失败后熔断，冷却后只放行一个探测请求"""
+    from nonebot_plugin_alisten.breaker import BreakerState, CircuitBreaker
+    from nonebot_plugin_alisten.config import plugin_config
+
+    mocker.patch.object(plugin_config, "alisten_breaker_failures", 3)
+    breaker = CircuitBreaker("http://localhost:8080")
+
+    for _ in range(2):
+        breaker.record_failure("error")
+    assert breaker.state == BreakerState.CLOSED
+    assert breaker.allow()
+
+    breaker.record_failure("error")
+    assert breaker.state == BreakerState.OPEN
+    assert not breaker.allow()
+
+    # 冷却结束
+    assert breaker.opened_at
+    breaker.opened_at -= plugin_config.alisten_breaker_cooldown
+    assert breaker.state == BreakerState.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    # 探测失败，重新熔断
+    breaker.record_failure("error")
+    assert breaker.state == BreakerState.OPEN
+
+    breaker.opened_at -= plugin_config.alisten_breaker_cooldown
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == BreakerState.CLOSED
+    assert breaker.consecutive_failures == 0
+    assert breaker.allow()
+
+
+def test_breaker_error_rate(mocker: MockerFixture):
+    """测试错误率过高时熔断"""
+    from nonebot_plugin_alisten.breaker import BreakerState, CircuitBreaker
+    from nonebot_plugin_alisten.config import plugin_config
+
+    mocker.patch.object(plugin_config, "alisten_breaker_window", 4)
+    mocker.patch.object(plugin_config, "alisten_breaker_error_rate", 0.5)
+    breaker = CircuitBreaker("http://localhost:8080")
+
+    breaker.record_success()
+    breaker.record_failure("error")
+    breaker.record_success()
+    assert breaker.state == BreakerState.CLOSED
+
+    breaker.record_failure("error")
+    assert breaker.state == BreakerState.OPEN
+    assert breaker.error_rate == 0.5
+
+
+def test_breaker_stale_probe(mocker: MockerFixture):
+    """测试探测请求没有结果时，冷却后放行新的探测请求"""
+    from nonebot_plugin_alisten.breaker import CircuitBreaker
+    from nonebot_plugin_alisten.config import plugin_config
+
+    breaker = CircuitBreaker("http://localhost:8080")
+    breaker.opened_at = time.monotonic() - plugin_config.alisten_breaker_cooldown
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    assert breaker.probe_started_at
+    breaker.probe_started_at -= plugin_config.alisten_breaker_cooldown
+    assert breaker.allow()
+
+
+@pytest.mark.usefixtures("_configs")
+@respx.mock(assert_all_called=True)
+async def test_breaker_fail_fast(app: App, respx_mock: respx.MockRouter, mocker: MockerFixture):
+    """测试熔断后不再请求服务器"""
+    from nonebot_plugin_alisten import alisten_cmd
+    from nonebot_plugin_alisten.config import plugin_config
+
+    mocker.patch.object(plugin_config, "alisten_breaker_failures", 1)
+
+    mocked_api = respx_mock.post("http://localhost:8080/music/pick").mock(
+        side_effect=httpx.ConnectError("connection refused")
+    )
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/music Sagitta luminis"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event=event, message="点歌请求失败，请稍后重试", at_sender=True)
+        ctx.should_finished(alisten_cmd)
+
+        event = fake_group_message_event_v11(message=Message("/music Sagitta luminis"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event=event, message="点歌请求失败，服务器暂时不可用，请稍后重试", at_sender=True)
+        ctx.should_finished(alisten_cmd)
+
+    assert mocked_api.call_count == 1
+
+
+@pytest.mark.usefixtures("_configs")
+@respx.mock(assert_all_called=True)
+async def test_breaker_business_error(app: App, respx_mock: respx.MockRouter):
+    """测试服务器返回的业务错误不计入熔断"""
+    from nonebot_plugin_alisten.breaker import get_breaker
+
+    respx_mock.post("http://localhost:8080/music/pick").mock(
+        return_value=httpx.Response(status_code=400, json={"error": "点歌失败"})
+    )
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/music Sagitta luminis"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event=event, message="点歌失败", at_sender=True)
+
+    breaker = get_breaker("http://localhost:8080")
+    assert breaker.consecutive_failures == 0
+    assert list(breaker.outcomes) == [True]
+
+
+# 被取消的请求不会记录在 respx 中
+@respx.mock(assert_all_called=False)
+async def test_breaker_deadline_timeout(app: App, respx_mock: respx.MockRouter, mocker: MockerFixture):
+    """测试命令剩余时间不足导致的超时不计入熔断，端点超时计入"""
+    from nonebot_plugin_alisten.alisten_api import ErrorResponse
+    from nonebot_plugin_alisten.breaker import get_breaker
+    from nonebot_plugin_alisten.config import plugin_config
+
+    async def slow(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(1)
+        return httpx.Response(status_code=200, json={"name": "Song", "source": "wy", "id": "1"})
+
+    mocker.patch.object(plugin_config, "alisten_endpoint_timeout", {})
+    mocker.patch.object(plugin_config, "alisten_timeout", 0.1)
+    respx_mock.post("http://localhost:8080/music/pick").mock(side_effect=slow)
+    breaker = get_breaker("http://localhost:8080")
+
+    api = fake_alisten_api(deadline=time.monotonic() + 0.05)
+    assert isinstance(await api.music_pick(id="1", name="Song", source="wy"), ErrorResponse)
+    assert list(breaker.outcomes) == []
+
+    assert isinstance(await fake_alisten_api().music_pick(id="1", name="Song", source="wy"), ErrorResponse)
+    assert list(breaker.outcomes) == [False]
@@ -0,0 +1,148 @@
+import asyncio
+
+import httpx
+import pytest
+import respx
+from nonebot import get_adapter
+from nonebot.adapters.onebot.v11 import Adapter, Bot, Message
+from nonebug import App
+from pytest_mock import MockerFixture
+
+from tests.fake import fake_alisten_api, fake_group_message_event_v11
+
+
+async def test_bulkhead_fifo(app: App):
+    """测试超出并发数的请求按先后顺序获得名额"""
+    from nonebot_plugin_alisten.bulkhead import Bulkhead
+
+    bulkhead = Bulkhead(limit=1, max_queue=10)
+    order: list[int] = []
+
+    async def worker(i: int) -> None:
+        assert await bulkhead.acquire(1)
+        order.append(i)
+        await asyncio.sleep(0.01)
+        bulkhead.release()
+
+    await asyncio.gather(*(worker(i) for i in range(5)))
+
+    assert order == [0, 1, 2, 3, 4]
+    assert bulkhead.active == 0
+    assert bulkhead.queued == 4
+    assert bulkhead.max_depth == 4
+    assert bulkhead.max_wait >= 0.03
+    assert bulkhead.rejected == 0
+
+
+async def test_bulkhead_reject(app: App):
+    """测试队列已满时立即失败，排队超时也失败且不占用名额"""
+    from nonebot_plugin_alisten.bulkhead import Bulkhead
+
+    bulkhead = Bulkhead(limit=1, max_queue=1)
+    assert await bulkhead.acquire(1)
+
+    waiter = asyncio.create_task(bulkhead.acquire(0.05))
+    await asyncio.sleep(0)
+    assert bulkhead.waiting == 1
+    assert not await bulkhead.acquire(1)
+    assert bulkhead.rejected == 1
+
+    assert not await waiter
+    assert bulkhead.timeouts == 1
+    assert bulkhead.waiting == 0
+
+    bulkhead.release()
+    assert bulkhead.active == 0
+    assert await bulkhead.acquire(0)
+
+
+async def test_bulkhead_cancel(app: App):
+    """测试排队时被取消不影响后面的请求"""
+    from nonebot_plugin_alisten.bulkhead import Bulkhead
+
+    bulkhead = Bulkhead(limit=1, max_queue=10)
+    assert await bulkhead.acquire(1)
+
+    cancelled = asyncio.create_task(bulkhead.acquire(1))
+    waiter = asyncio.create_task(bulkhead.acquire(1))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    await asyncio.sleep(0)
+
+    bulkhead.release()
+    assert await waiter
+    assert bulkhead.active == 1
+    bulkhead.release()
+    assert bulkhead.active == 0
+
+
+async def test_bulkhead_disabled(app: App):
+    """测试并发数为 0 时不限制"""
+    from nonebot_plugin_alisten.bulkhead import Bulkhead
+
+    bulkhead = Bulkhead(limit=0, max_queue=0)
+    for _ in range(10):
+        assert await bulkhead.acquire(0)
+    bulkhead.release()
+    assert bulkhead.active == 0
+
+
+@pytest.mark.usefixtures("_configs")
+@respx.mock(assert_all_called=False)
+async def test_bulkhead_busy_reply(app: App, respx_mock: respx.MockRouter, mocker: MockerFixture):
+    """测试排队已满时直接回复服务繁忙，不请求服务器"""
+    from nonebot_plugin_alisten import alisten_cmd
+    from nonebot_plugin_alisten.bulkhead import get_bulkhead
+    from nonebot_plugin_alisten.config import plugin_config
+
+    mocker.patch.object(plugin_config, "alisten_server_concurrency", 1)
+    mocker.patch.object(plugin_config, "alisten_server_queue", 0)
+    mocked_api = respx_mock.post("http://localhost:8080/music/playlist").mock(
+        return_value=httpx.Response(status_code=200, json={"playlist": []})
+    )
+    bulkhead = get_bulkhead("http://localhost:8080")
+    assert await bulkhead.acquire(1)
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/播放列表"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event, "获取播放列表请求失败，服务繁忙，请稍后再试", at_sender=True)
+        ctx.should_finished(alisten_cmd)
+
+    assert mocked_api.call_count == 0
+    assert bulkhead.rejected == 1
+
+
+@respx.mock(assert_all_called=True)
+async def test_background_request(app: App, respx_mock: respx.MockRouter, mocker: MockerFixture):
+    """测试后台请求不排队、不占用命令的名额，失败不计入熔断器"""
+    from nonebot_plugin_alisten.alisten_api import ErrorResponse, PlaylistResponse
+    from nonebot_plugin_alisten.breaker import get_breaker
+    from nonebot_plugin_alisten.bulkhead import get_bulkhead
+    from nonebot_plugin_alisten.config import plugin_config
+
+    mocker.patch.object(plugin_config, "alisten_server_concurrency", 1)
+    mocker.patch.object(plugin_config, "alisten_breaker_failures", 2)
+    sync = respx_mock.post("http://localhost:8080/music/sync").mock(return_value=httpx.Response(status_code=500))
+    playlist = respx_mock.post("http://localhost:8080/music/playlist").mock(
+        return_value=httpx.Response(status_code=200, json={"playlist": []})
+    )
+
+    # 名额被占用时后台请求直接放弃，不排队
+    bulkhead = get_bulkhead("http://localhost:8080")
+    assert bulkhead.try_acquire()
+    result = await fake_alisten_api(background=True).music_sync()
+    assert result == ErrorResponse(error="获取当前音乐请求失败，服务繁忙，请稍后再试")
+    assert bulkhead.queued == 0
+    bulkhead.release()
+
+    # 失败不重试，也不计入熔断器
+    for _ in range(3):
+        assert isinstance(await fake_alisten_api(background=True).music_sync(), ErrorResponse)
+    assert sync.call_count == 3
+    assert get_breaker("http://localhost:8080").consecutive_failures == 0
+    assert isinstance(await fake_alisten_api().music_playlist(), PlaylistResponse)
+    assert playlist.call_count == 1
@@ -0,0 +1,418 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+import respx
+from nonebot import get_adapter
+from nonebot.adapters.onebot.v11 import Adapter, Bot, Message
+from nonebug import App
+from pytest_mock import MockerFixture
+
+from tests.fake import fake_alisten_api, fake_group_message_event_v11
+
+PLAYLIST = {
+    "playlist": [
+        {
+            "id": "123",
+            "name": "Song 1",
+            "source": "wy",
+            "user": {"name": "user1", "email": "a@a.com"},
+            "likes": 5,
+        },
+    ]
+}
+
+
+async def test_ttl_cache(app: App, mocker: MockerFixture):
+    """测试缓存过期与失效"""
+    from nonebot_plugin_alisten.cache import TTLCache
+
+    monotonic = mocker.patch("nonebot_plugin_alisten.backend.time.monotonic", return_value=100)
+    cache = TTLCache("test", int)
+
+    await cache.set(("a",), 1, ttl=3)
+    assert await cache.get(("a",)) == 1
+    monotonic.return_value = 103
+    assert await cache.get(("a",)) is None
+
+    await cache.set(("a",), 2, ttl=0)
+    assert await cache.get(("a",)) is None
+
+    await cache.set(("a",), 3, ttl=3)
+    await cache.invalidate(("a",))
+    assert await cache.get(("a",)) is None
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+async def test_ttl_cache_version(app: App):
+    """测试读取期间发生写操作时不缓存读到的结果"""
+    from nonebot_plugin_alisten.cache import TTLCache
+
+    cache = TTLCache("test", int)
+
+    version = cache.version(("a",))
+    await cache.invalidate(("a",))
+    await cache.set(("a",), 1, ttl=3, version=version)
+    assert await cache.get(("a",)) is None
+
+    await cache.set(("a",), 2, ttl=3, version=cache.version(("a",)))
+    assert await cache.get(("a",)) == 2
+
+
+@respx.mock(assert_all_called=True)
+async def test_playlist_cached(app: App, respx_mock: respx.MockRouter):
+    """测试播放列表按服务器和房间缓存"""
+    from nonebot_plugin_alisten.alisten_api import PlaylistResponse
+
+    mocked_api = respx_mock.post("http://localhost:8080/music/playlist").mock(
+        return_value=httpx.Response(status_code=200, json=PLAYLIST)
+    )
+
+    first = await fake_alisten_api().music_playlist()
+    second = await fake_alisten_api(user_name="other").music_playlist()
+
+    assert isinstance(first, PlaylistResponse)
+    assert second == first
+    assert mocked_api.call_count == 1
+
+    # 不同房间分别缓存
+    await fake_alisten_api(house_id="room456").music_playlist()
+    assert mocked_api.call_count == 2
+
+
+@respx.mock(assert_all_called=True)
+async def test_playlist_cached_per_password(app: App, respx_mock: respx.MockRouter):
+    """测试房间密码错误的群组不会读到其他群组缓存的结果，写操作使每个密码的缓存都失效"""
+    from nonebot_plugin_alisten.alisten_api import ErrorResponse, PlaylistResponse
+
+    def playlist(request: httpx.Request) -> httpx.Response:
+        if json.loads(request.content)["password"] != "password123":
+            return httpx.Response(status_code=403, json={"error": "密码错误"})
+        return httpx.Response(status_code=200, json=PLAYLIST)
+
+    mocked_api = respx_mock.post("http://localhost:8080/music/playlist").mock(side_effect=playlist)
+    respx_mock.post("http://localhost:8080/music/sync").mock(
+        side_effect=[
+            httpx.Response(status_code=200, json=CURRENT),
+            httpx.Response(status_code=403, json={"error": "密码错误"}),
+        ]
+    )
+    respx_mock.post("http://localhost:8080/music/pick").mock(
+        return_value=httpx.Response(status_code=200, json={"name": "Song 2", "source": "wy", "id": "456"})
+    )
+
+    assert isinstance(await fake_alisten_api().music_playlist(), PlaylistResponse)
+    assert await fake_alisten_api(house_password="wrong").music_playlist() == ErrorResponse(error="密码错误")
+    assert mocked_api.call_count == 2
+    assert isinstance(await fake_alisten_api().music_current(), tuple)
+    assert isinstance(await fake_alisten_api(house_password="wrong").music_current(), ErrorResponse)
+
+    await fake_alisten_api(house_password="other").music_pick(id="456", name="Song 2", source="wy")
+    assert isinstance(await fake_alisten_api().music_playlist(), PlaylistResponse)
+    assert mocked_api.call_count == 3
+
+
+@respx.mock(assert_all_called=True)
+async def test_playlist_error_not_cached(app: App, respx_mock: respx.MockRouter):
+    """测试获取失败的结果不缓存"""
+    from nonebot_plugin_alisten.alisten_api import ErrorResponse, PlaylistResponse
+
+    mocked_api = respx_mock.post("http://localhost:8080/music/playlist").mock(
+        side_effect=[
+            httpx.Response(status_code=500, json={"error": "服务器内部错误"}),
+            httpx.Response(status_code=200, json=PLAYLIST),
+        ]
+    )
+
+    assert isinstance(await fake_alisten_api().music_playlist(), ErrorResponse)
+    assert isinstance(await fake_alisten_api().music_playlist(), PlaylistResponse)
+    assert mocked_api.call_count == 2
+
+
+@pytest.mark.usefixtures("_configs")
+@respx.mock(assert_all_called=True)
+async def test_playlist_invalidated_by_write(app: App, respx_mock: respx.MockRouter):
+    """测试点赞后立即看到最新的播放列表"""
+    from nonebot_plugin_alisten import alisten_cmd
+
+    playlist_api = respx_mock.post("http://localhost:8080/music/playlist").mock(
+        side_effect=[
+            httpx.Response(status_code=200, json=PLAYLIST),
+            httpx.Response(
+                status_code=200,
+                json={"playlist": [{**PLAYLIST["playlist"][0], "likes": 6}]},
+            ),
+        ]
+    )
+    respx_mock.post("http://localhost:8080/music/good").mock(
+        return_value=httpx.Response(status_code=200, json={"name": "Song 1", "likes": 6})
+    )
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/alisten music playlist"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event=event, message="当前播放列表：\n1. Song 1 [网易云] ❤️5 - user1", at_sender=True)
+        ctx.should_finished(alisten_cmd)
+
+        event = fake_group_message_event_v11(message=Message("/alisten music good Song 1"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event=event, message="点赞成功：Song 1，当前点赞数：6", at_sender=True)
+        ctx.should_finished(alisten_cmd)
+
+        event = fake_group_message_event_v11(message=Message("/alisten music playlist"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event=event, message="当前播放列表：\n1. Song 1 [网易云] ❤️6 - user1", at_sender=True)
+        ctx.should_finished(alisten_cmd)
+
+    # 第一次展示播放列表的结果被点赞命令复用
+    assert playlist_api.call_count == 2
+
+
+@respx.mock(assert_all_called=True)
+async def test_playlist_not_cached_when_written_during_read(app: App, respx_mock: respx.MockRouter):
+    """测试获取播放列表期间点歌时不缓存过时的播放列表"""
+    from nonebot_plugin_alisten.alisten_api import playlist_cache
+
+    async def slow_playlist(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.2)
+        return httpx.Response(status_code=200, json=PLAYLIST)
+
+    respx_mock.post("http://localhost:8080/music/playlist").mock(side_effect=slow_playlist)
+    respx_mock.post("http://localhost:8080/music/pick").mock(
+        return_value=httpx.Response(status_code=200, json={"name": "Song 2", "source": "wy", "id": "456"})
+    )
+
+    async def pick():
+        await asyncio.sleep(0.05)
+        await fake_alisten_api().music_pick(id="456", name="Song 2", source="wy")
+
+    await asyncio.gather(fake_alisten_api().music_playlist(), pick())
+
+    assert await playlist_cache.get(fake_alisten_api()._cache_key) is None
+
+
+@pytest.mark.usefixtures("_no_playlist_cache")
+@respx.mock(assert_all_called=True)
+async def test_playlist_cache_disabled(app: App, respx_mock: respx.MockRouter):
+    """测试缓存时间为 0 时不缓存"""
+    mocked_api = respx_mock.post("http://localhost:8080/music/playlist").mock(
+        return_value=httpx.Response(status_code=200, json=PLAYLIST)
+    )
+
+    await fake_alisten_api().music_playlist()
+    await fake_alisten_api().music_playlist()
+
+    assert mocked_api.call_count == 2
+
+
+SEARCH = {
+    "list": [{"id": "1", "name": "青花瓷", "artist": "周杰伦"}],
+    "totalSize": 1,
+}
+
+
+async def test_memory_backend_eviction():
+    """测试按条目数和字节数淘汰最久未使用的条目"""
+    from nonebot_plugin_alisten.backend import MemoryBackend
+
+    backend = MemoryBackend(max_entries=2, max_bytes=100)
+
+    await backend.set("a", b"a" * 10, ttl=60)
+    await backend.set("b", b"b" * 10, ttl=60)
+    assert await backend.get("a") == b"a" * 10
+    await backend.set("c", b"c" * 10, ttl=60)
+    assert await backend.get("b") is None
+    assert len(backend) == 2
+
+    await backend.set("d", b"d" * 95, ttl=60)
+    assert await backend.get("a") is None
+    assert await backend.get("c") is None
+    assert await backend.get("d") == b"d" * 95
+    assert backend.size == 95
+
+    # 超过总大小的条目不缓存
+    await backend.set("e", b"e" * 101, ttl=60)
+    assert await backend.get("e") is None
+    assert await backend.get("d") == b"d" * 95
+
+    assert await backend.stats("") == (1, 95)
+    assert await backend.clear("") == 1
+    assert backend.size == 0
+
+
+async def test_memory_backend_namespaces():
+    """测试每个命名空间分别淘汰，其他缓存写入再多也不会挤掉搜索结果"""
+    from nonebot_plugin_alisten.backend import MemoryBackend
+
+    backend = MemoryBackend(max_entries=2, max_bytes=100)
+
+    await backend.set("alisten:search:1", b"s" * 60, ttl=60)
+    for i in range(5):
+        await backend.set(f"alisten:playlist:{i}", b"p" * 60, ttl=60)
+    assert await backend.get("alisten:search:1") == b"s" * 60
+    assert await backend.stats("alisten:playlist:") == (1, 60)
+    assert len(backend) == 2
+    assert backend.size == 120
+
+
+async def test_memory_backend_objects(app: App):
+    """测试 memory 后端直接保存对象，命中时不反序列化"""
+    from nonebot_plugin_alisten.alisten_api import PlaylistResponse
+    from nonebot_plugin_alisten.cache import TTLCache
+
+    cache = TTLCache("objects", PlaylistResponse)
+    playlist = PlaylistResponse.model_validate(PLAYLIST)
+    await cache.set(("a",), playlist, ttl=60)
+
+    assert await cache.get(("a",)) is playlist
+    assert await cache.stats() == (1, len(playlist.model_dump_json(by_alias=True)))
+
+
+async def test_memory_backend_ttl(mocker: MockerFixture):
+    """测试条目过期"""
+    from nonebot_plugin_alisten.backend import MemoryBackend
+
+    monotonic = mocker.patch("nonebot_plugin_alisten.backend.time.monotonic", return_value=100)
+    backend = MemoryBackend(max_entries=10, max_bytes=100)
+
+    await backend.set("a", b"a" * 10, ttl=60)
+    monotonic.return_value = 160
+    assert await backend.get("a") is None
+    assert backend.size == 0
+
+
+@respx.mock(assert_all_called=True)
+async def test_search_cached(app: App, respx_mock: respx.MockRouter):
+    """测试相同关键词的搜索结果在不同群组间共享"""
+    from nonebot_plugin_alisten.alisten_api import SearchMusicResponse, search_cache
+
+    mocked_api = respx_mock.post("http://localhost:8080/music/search").mock(
+        return_value=httpx.Response(status_code=200, json=SEARCH)
+    )
+
+    first = await fake_alisten_api().music_search("青花瓷", "wy")
+    second = await fake_alisten_api(house_id="room456").music_search("  青花瓷 ", "wy")
+
+    assert isinstance(first, SearchMusicResponse)
+    assert second == first
+    assert mocked_api.call_count == 1
+    assert (search_cache.hits, search_cache.misses) == (1, 1)
+    stats = await search_cache.stats()
+    assert stats
+    assert stats[0] == 1
+
+    # 不同音乐源分别缓存
+    await fake_alisten_api().music_search("青花瓷", "qq")
+    assert mocked_api.call_count == 2
+
+
+@respx.mock(assert_all_called=True)
+async def test_search_error_not_cached(app: App, respx_mock: respx.MockRouter):
+    """测试搜索失败的结果不缓存"""
+    from nonebot_plugin_alisten.alisten_api import search_cache
+
+    mocked_api = respx_mock.post("http://localhost:8080/music/search").mock(
+        return_value=httpx.Response(status_code=400, json={"error": "搜索失败"})
+    )
+
+    await fake_alisten_api().music_search("青花瓷", "wy")
+    await fake_alisten_api().music_search("青花瓷", "wy")
+
+    assert mocked_api.call_count == 2
+    assert await search_cache.stats() == (0, 0)
+
+
+CURRENT = {
+    "name": "测试歌曲",
+    "source": "wy",
+    "id": "123456",
+    "user": {"name": "test_user", "email": "test@example.com"},
+}
+
+
+@respx.mock(assert_all_called=True)
+async def test_current_stale_while_revalidate(app: App, respx_mock: respx.MockRouter, mocker: MockerFixture):
+    """测试当前音乐过期后先返回旧数据，并只在后台刷新一次"""
+    from nonebot_plugin_alisten.alisten_api import CurrentMusicResponse, current_cache
+
+    clock = mocker.patch("nonebot_plugin_alisten.cache.time.time", return_value=100)
+    refreshed = asyncio.Event()
+
+    async def side_effect(request: httpx.Request):
+        await refreshed.wait()
+        return httpx.Response(status_code=200, json={**CURRENT, "name": "新歌曲"})
+
+    mocked_api = respx_mock.post("http://localhost:8080/music/sync").mock(
+        side_effect=[httpx.Response(status_code=200, json=CURRENT), side_effect]
+    )
+
+    result = await fake_alisten_api().music_current()
+    assert isinstance(result, tuple)
+    current, age = result
+    assert isinstance(current, CurrentMusicResponse)
+    assert age == 0
+
+    # 新鲜期内直接使用缓存
+    clock.return_value = 102
+    assert await fake_alisten_api().music_current() == (current, 2)
+    assert mocked_api.call_count == 1
+
+    # 过期后返回旧数据，多次查询只启动一次后台刷新
+    clock.return_value = 110
+    assert await fake_alisten_api().music_current() == (current, 10)
+    assert await fake_alisten_api().music_current() == (current, 10)
+    key = fake_alisten_api()._cache_key
+    assert current_cache.refreshing(key)
+
+    refreshed.set()
+    while current_cache.refreshing(key):
+        await asyncio.sleep(0.01)
+    assert mocked_api.call_count == 2
+
+    result = await fake_alisten_api().music_current()
+    assert isinstance(result, tuple)
+    assert result[0].name == "新歌曲"
+    assert result[1] == 0
+
+
+@respx.mock(assert_all_called=True)
+async def test_current_too_stale(app: App, respx_mock: respx.MockRouter, mocker: MockerFixture):
+    """测试超过最长过期时间后重新获取，获取失败的结果不缓存"""
+    from nonebot_plugin_alisten.alisten_api import ErrorResponse
+
+    clock = mocker.patch("nonebot_plugin_alisten.cache.time.time", return_value=100)
+    mocked_api = respx_mock.post("http://localhost:8080/music/sync").mock(
+        side_effect=[
+            httpx.Response(status_code=200, json=CURRENT),
+            httpx.Response(status_code=500, json={"error": "服务器内部错误"}),
+            httpx.Response(status_code=200, json=CURRENT),
+        ]
+    )
+
+    await fake_alisten_api().music_current()
+    clock.return_value = 164
+    assert isinstance(await fake_alisten_api().music_current(), ErrorResponse)
+    result = await fake_alisten_api().music_current()
+    assert isinstance(result, tuple)
+    assert result[1] == 0
+    assert mocked_api.call_count == 3
+
+
+@respx.mock(assert_all_called=True)
+async def test_current_invalidated_by_write(app: App, respx_mock: respx.MockRouter):
+    """测试切歌后立即看到最新的当前音乐"""
+    mocked_api = respx_mock.post("http://localhost:8080/music/sync").mock(
+        return_value=httpx.Response(status_code=200, json=CURRENT)
+    )
+    respx_mock.post("http://localhost:8080/music/skip/vote").mock(
+        return_value=httpx.Response(status_code=200, json={"current_votes": 1})
+    )
+
+    await fake_alisten_api().music_current()
+    await fake_alisten_api().music_skip_vote()
+    await fake_alisten_api().music_current()
+    assert mocked_api.call_count == 2
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+from pytest_mock import MockerFixture
+
+HOUSES = json.dumps(
+    [
+        {
+            "createTime": "2025-01-01T00:00:00Z",
+            "desc": "描述",
+            "enableStatus": True,
+            "id": "room123",
+            "name": "房间",
+            "needPwd": False,
+            "population": 3,
+        }
+    ]
+).encode()
+SEARCH = json.dumps({"list": [{"id": "1", "name": "青花瓷", "artist": "周杰伦"}], "totalSize": 1}).encode()
+
+
+@pytest.mark.parametrize("backend", ["orjson", "msgspec"])
+def test_decode_backends(backend: str, mocker: MockerFixture):
+    """测试第三方 JSON 库解码得到的对象与 pydantic 相同"""
+    pytest.importorskip(backend)
+
+    from nonebot_plugin_alisten import codec
+    from nonebot_plugin_alisten.alisten_api import HouseSearchResponse, SearchMusicResponse
+
+    loader = codec._load_json_loader(backend)
+    assert loader is not None
+    mocker.patch.object(codec, "_json_loader", loader)
+
+    assert codec.decode(HouseSearchResponse, HOUSES) == HouseSearchResponse.model_validate_json(HOUSES)
+    assert codec.decode(SearchMusicResponse, SEARCH) == SearchMusicResponse.model_validate_json(SEARCH)
+
+
+@pytest.mark.parametrize("backend", ["orjson", "msgspec"])
+def test_backend_not_installed(backend: str, mocker: MockerFixture):
+    """测试未安装第三方 JSON 库时回退到 pydantic"""
+    from nonebot_plugin_alisten import codec
+
+    mocker.patch.dict("sys.modules", {backend: None})
+
+    assert codec._load_json_loader(backend) is None
+    assert codec._load_json_loader("pydantic") is None
+
+
+def test_adapter_cached():
+    """测试同一类型的 TypeAdapter 只创建一次"""
+    from nonebot_plugin_alisten.alisten_api import PlaylistResponse
+    from nonebot_plugin_alisten.codec import get_adapter
+
+    assert get_adapter(PlaylistResponse) is get_adapter(PlaylistResponse)
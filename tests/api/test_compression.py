@@ -0,0 +1,159 @@
+import gzip
+import json
+import zlib
+
+import httpx
+import pytest
+import respx
+from nonebot import get_adapter
+from nonebot.adapters.onebot.v11 import Adapter, Bot, Message
+from nonebot.drivers import Response
+from nonebug import App
+from pytest_mock import MockerFixture
+
+from tests.fake import fake_alisten_api, fake_group_message_event_v11
+
+PLAYLIST = json.dumps(
+    {
+        "playlist": [
+            {
+                "id": str(i),
+                "name": f"Song {i}",
+                "source": "wy",
+                "user": {"name": "user1", "email": "a@a.com"},
+                "likes": 0,
+            }
+            for i in range(20)
+        ]
+    }
+).encode()
+
+
+def test_decode_content():
+    """测试按需解压响应内容"""
+    from nonebot_plugin_alisten.compression import decode_content
+
+    compressed = gzip.compress(PLAYLIST)
+
+    # 驱动器没有解压
+    assert decode_content(Response(200, headers={"Content-Encoding": "gzip"}, content=compressed)) == PLAYLIST
+    # 驱动器已经解压
+    assert decode_content(Response(200, headers={"Content-Encoding": "gzip"}, content=PLAYLIST)) == PLAYLIST
+    assert decode_content(Response(200, content=PLAYLIST)) == PLAYLIST
+    assert decode_content(Response(200, content="")) == b""
+    # 不支持的压缩格式原样返回
+    assert decode_content(Response(200, headers={"Content-Encoding": "unknown"}, content=b"\x00")) == b"\x00"
+
+
+def test_decode_content_bracket(mocker: MockerFixture):
+    """测试压缩数据以 [ 开头时仍然解压"""
+    from nonebot_plugin_alisten import compression
+
+    # brotli 等没有固定文件头的格式，压缩数据可能以 [ 开头
+    mocker.patch.dict(compression._decoders, {"br": lambda data: zlib.decompress(data.removeprefix(b"["))})
+    compressed = b"[" + zlib.compress(PLAYLIST)
+
+    assert compression.decode_content(Response(200, headers={"Content-Encoding": "br"}, content=compressed)) == PLAYLIST
+    # 驱动器已经解压时解压失败，使用原内容
+    assert compression.decode_content(Response(200, headers={"Content-Encoding": "br"}, content=PLAYLIST)) == PLAYLIST
+
+
+def test_record_transfer_unmeasured():
+    """测试驱动器已解压且没有 Content-Length 时不计入传输字节数"""
+    from nonebot_plugin_alisten.compression import TransferStats, get_transfer_stats, record_transfer
+
+    compressed = gzip.compress(PLAYLIST)
+    headers = {"Content-Encoding": "gzip"}
+    record_transfer(
+        "http://localhost:8080", "/music/playlist", Response(200, headers=headers, content=compressed), PLAYLIST
+    )
+    record_transfer(
+        "http://localhost:8080", "/music/playlist", Response(200, headers=headers, content=PLAYLIST), PLAYLIST
+    )
+
+    assert get_transfer_stats("http://localhost:8080") == {
+        "/music/playlist": TransferStats(requests=2, wire_bytes=len(compressed), body_bytes=len(PLAYLIST), unmeasured=1)
+    }
+
+
+@respx.mock(assert_all_called=True)
+async def test_compressed_response(app: App, respx_mock: respx.MockRouter):
+    """测试请求压缩并统计传输量"""
+    from nonebot_plugin_alisten.alisten_api import PlaylistResponse
+    from nonebot_plugin_alisten.compression import TransferStats, get_transfer_stats
+
+    compressed = gzip.compress(PLAYLIST)
+    mocked_api = respx_mock.post("http://localhost:8080/music/playlist").mock(
+        return_value=httpx.Response(
+            status_code=200,
+            content=compressed,
+            headers={"Content-Encoding": "gzip", "Content-Type": "application/json"},
+        )
+    )
+
+    result = await fake_alisten_api().music_playlist()
+
+    assert isinstance(result, PlaylistResponse)
+    assert result.playlist
+    assert len(result.playlist) == 20
+    assert "gzip" in mocked_api.calls.last.request.headers["Accept-Encoding"]
+    assert get_transfer_stats("http://localhost:8080") == {
+        "/music/playlist": TransferStats(requests=1, wire_bytes=len(compressed), body_bytes=len(PLAYLIST))
+    }
+
+
+@respx.mock(assert_all_called=True)
+async def test_compression_disabled(app: App, respx_mock: respx.MockRouter, mocker: MockerFixture):
+    """测试关闭压缩"""
+    from nonebot_plugin_alisten.config import plugin_config
+
+    mocker.patch.object(plugin_config, "alisten_compression", False)
+    mocked_api = respx_mock.post("http://localhost:8080/music/playlist").mock(
+        return_value=httpx.Response(status_code=200, json={"playlist": []})
+    )
+
+    await fake_alisten_api().music_playlist()
+
+    assert mocked_api.calls.last.request.headers["Accept-Encoding"] == "identity"
+
+
+@pytest.mark.usefixtures("_configs")
+async def test_status_transfer_stats(app: App):
+    """测试服务器状态中显示传输统计"""
+    from nonebot_plugin_alisten import alisten_cmd
+    from nonebot_plugin_alisten.compression import record_transfer
+
+    record_transfer(
+        "http://localhost:8080",
+        "/music/playlist",
+        Response(200, headers={"Content-Encoding": "gzip", "Content-Length": "2048"}, content=b"x" * 10240),
+        b"x" * 10240,
+    )
+    record_transfer("http://localhost:8080", "/music/sync", Response(200, content=b"{}"), b"{}")
+    # 驱动器已解压且分块传输，传输大小未知
+    record_transfer(
+        "http://localhost:8080",
+        "/music/sync",
+        Response(200, headers={"Content-Encoding": "gzip"}, content=b"{}"),
+        b"{}",
+    )
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/alisten status"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(
+            event,
+            "Alisten 服务器状态:\n"
+            "服务器地址: http://localhost:8080\n"
+            "熔断状态: 正常\n"
+            "连续失败: 0 次\n"
+            "最近错误率: 0%（0 次请求）\n"
+            "\n"
+            "传输统计:\n"
+            "/music/playlist: 1 次，2.0 KB（解压后 10.0 KB）\n"
+            "/music/sync: 2 次，2 B，其中 1 次传输大小未知",
+        )
+        ctx.should_finished(alisten_cmd)
@@ -0,0 +1,19 @@
+import json
+
+
+def test_request_body():
+    """测试请求体拼接结果与直接序列化一致"""
+    from nonebot_plugin_alisten.envelope import house_envelope, request_body, user_field
+
+    envelope = house_envelope("room123", 'pass"word\\')
+    user = user_field("昵称", "")
+
+    assert json.loads(request_body(envelope)) == {"houseId": "room123", "password": 'pass"word\\'}
+    assert json.loads(request_body(envelope, user, name="青花瓷", index=1)) == {
+        "houseId": "room123",
+        "password": 'pass"word\\',
+        "user": {"name": "昵称", "email": ""},
+        "name": "青花瓷",
+        "index": 1,
+    }
+    assert house_envelope("room123", 'pass"word\\') is envelope
@@ -0,0 +1,138 @@
+import httpx
+import pytest
+import respx
+from nonebot import get_adapter
+from nonebot.adapters.onebot.v11 import Adapter, Bot, Message
+from nonebug import App
+from pytest_mock import MockerFixture
+
+from tests.fake import fake_alisten_api, fake_group_message_event_v11
+
+
+@respx.mock(assert_all_called=True)
+async def test_deterministic_error_cached(app: App, respx_mock: respx.MockRouter):
+    """测试房间不存在等确定性错误按服务器、房间和端点缓存"""
+    from nonebot_plugin_alisten.alisten_api import ErrorResponse
+
+    sync_api = respx_mock.post("http://localhost:8080/music/sync").mock(
+        return_value=httpx.Response(status_code=404, json={"error": "房间不存在"})
+    )
+    playlist_api = respx_mock.post("http://localhost:8080/music/playlist").mock(
+        return_value=httpx.Response(status_code=404, json={"error": "房间不存在"})
+    )
+
+    first = await fake_alisten_api().music_sync()
+    second = await fake_alisten_api(user_name="other").music_sync()
+    assert first == ErrorResponse(error="房间不存在")
+    assert second == first
+    assert sync_api.call_count == 1
+
+    # 不同端点、不同房间、不同密码分别缓存
+    await fake_alisten_api().music_playlist()
+    await fake_alisten_api(house_id="room456").music_sync()
+    await fake_alisten_api(house_password="other").music_sync()
+    assert sync_api.call_count == 3
+    assert playlist_api.call_count == 1
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        httpx.Response(status_code=500, json={"error": "服务器内部错误"}),
+        httpx.Response(status_code=429, json={"error": "请求过于频繁"}),
+        httpx.Response(status_code=400, content=b""),
+    ],
+)
+@respx.mock(assert_all_called=True)
+async def test_transient_error_not_cached(app: App, respx_mock: respx.MockRouter, response: httpx.Response):
+    """测试临时错误不缓存"""
+    mocked_api = respx_mock.post("http://localhost:8080/music/sync").mock(return_value=response)
+
+    await fake_alisten_api().music_sync()
+    await fake_alisten_api().music_sync()
+    assert mocked_api.call_count == 2
+
+
+@respx.mock(assert_all_called=True)
+async def test_error_cache_expired(app: App, respx_mock: respx.MockRouter, mocker: MockerFixture):
+    """测试错误缓存过期后重新请求"""
+    from nonebot_plugin_alisten.config import plugin_config
+
+    monotonic = mocker.patch("nonebot_plugin_alisten.backend.time.monotonic", return_value=100)
+    mocked_api = respx_mock.post("http://localhost:8080/music/sync").mock(
+        return_value=httpx.Response(status_code=404, json={"error": "房间不存在"})
+    )
+
+    await fake_alisten_api().music_sync()
+    monotonic.return_value = 100 + plugin_config.alisten_error_cache_ttl
+    await fake_alisten_api().music_sync()
+    assert mocked_api.call_count == 2
+
+    monotonic.return_value = 200
+    mocker.patch.object(plugin_config, "alisten_error_cache_ttl", 0)
+    await fake_alisten_api().music_sync()
+    await fake_alisten_api().music_sync()
+    assert mocked_api.call_count == 4
+
+
+@respx.mock(assert_all_called=True)
+async def test_error_cache_invalidated_by_write(app: App, respx_mock: respx.MockRouter):
+    """测试点歌后不再使用缓存的错误"""
+    mocked_api = respx_mock.post("http://localhost:8080/music/sync").mock(
+        return_value=httpx.Response(status_code=404, json={"error": "当前没有播放音乐"})
+    )
+    respx_mock.post("http://localhost:8080/music/pick").mock(
+        return_value=httpx.Response(
+            status_code=200,
+            json={"name": "Song", "source": "wy", "id": "1", "user": {"name": "u", "email": "u@u.com"}},
+        )
+    )
+
+    await fake_alisten_api().music_sync()
+    await fake_alisten_api().music_pick(id="1", name="Song", source="wy")
+    await fake_alisten_api().music_sync()
+    assert mocked_api.call_count == 2
+
+
+@pytest.mark.usefixtures("_configs")
+@respx.mock(assert_all_called=True)
+async def test_error_cache_cleared_by_config_set(app: App, respx_mock: respx.MockRouter):
+    """测试设置配置后不再使用缓存的错误"""
+    from nonebot_plugin_alisten import alisten_cmd
+
+    mocked_api = respx_mock.post("http://localhost:8080/music/sync").mock(
+        side_effect=[
+            httpx.Response(status_code=404, json={"error": "房间不存在"}),
+            httpx.Response(
+                status_code=200,
+                json={"name": "测试歌曲", "source": "wy", "id": "1", "user": {"name": "u", "email": "u@u.com"}},
+            ),
+        ]
+    )
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        for _ in range(2):
+            event = fake_group_message_event_v11(message=Message("/alisten music current"))
+            ctx.receive_event(bot, event)
+            ctx.should_call_send(event=event, message="房间不存在", at_sender=True)
+            ctx.should_finished(alisten_cmd)
+
+        event = fake_group_message_event_v11(
+            message=Message("/alisten config set http://localhost:8080 room123 password123")
+        )
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(
+            event,
+            "Alisten 配置已设置:\n服务器地址: http://localhost:8080\n房间ID: room123\n房间密码: 已设置",
+        )
+        ctx.should_finished(alisten_cmd)
+
+        event = fake_group_message_event_v11(message=Message("/alisten music current"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event=event, message="当前播放：测试歌曲\n来源：网易云音乐\n点歌者：u", at_sender=True)
+        ctx.should_finished(alisten_cmd)
+
+    assert mocked_api.call_count == 2
@@ -0,0 +1,184 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+import respx
+from nonebug import App
+from pytest_mock import MockerFixture
+
+from tests.fake import fake_alisten_api
+
+CURRENT = {
+    "name": "Song 1",
+    "source": "wy",
+    "id": "123",
+    "user": {"name": "user1", "email": "a@a.com"},
+}
+
+
+@pytest.fixture
+def _hedge(app: App, mocker: MockerFixture):
+    """开启对冲，并让 /music/sync 的 p95 延迟为 0.05 秒"""
+    from nonebot_plugin_alisten.config import plugin_config
+    from nonebot_plugin_alisten.hedge import get_hedge_policy
+
+    mocker.patch.object(plugin_config, "alisten_hedge", True)
+    policy = get_hedge_policy("http://localhost:8080", "/music/sync")
+    policy.latencies.extend([0.05] * 20)
+    policy.budget.tokens = 1
+
+
+def slow_then_fast(slow: float):
+    """第一次请求很慢，之后的请求立即返回
+
+    被取消的请求不会记录在 respx 中，因此自行记录收到的请求
+    """
+    calls: list[httpx.Request] = []
+
+    async def side_effect(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) == 1:
+            await asyncio.sleep(slow)
+        return httpx.Response(status_code=200, json=CURRENT)
+
+    return side_effect, calls
+
+
+def test_hedge_delay():
+    """测试对冲等待时间为最近延迟的 p95"""
+    from nonebot_plugin_alisten.hedge import MIN_SAMPLES, HedgePolicy
+    from nonebot_plugin_alisten.retry import RetryBudget
+
+    policy = HedgePolicy(budget=RetryBudget(ratio=0.05, max_tokens=5, tokens=0))
+    for i in range(MIN_SAMPLES - 1):
+        policy.record(i / 100)
+    assert policy.delay is None
+
+    for i in range(MIN_SAMPLES - 1, 100):
+        policy.record(i / 100)
+    assert policy.delay == 0.94
+
+    # 只保留最近的样本
+    for _ in range(100):
+        policy.record(0.01)
+    assert policy.delay == 0.01
+
+
+@pytest.mark.usefixtures("_hedge")
+@respx.mock(assert_all_called=True)
+async def test_hedge_slow_response(app: App, respx_mock: respx.MockRouter):
+    """测试响应慢于 p95 时发送对冲请求，先返回的响应胜出"""
+    from nonebot_plugin_alisten.alisten_api import CurrentMusicResponse
+    from nonebot_plugin_alisten.hedge import get_hedge_policy
+
+    side_effect, calls = slow_then_fast(3)
+    respx_mock.post("http://localhost:8080/music/sync").mock(side_effect=side_effect)
+
+    start = time.monotonic()
+    result = await fake_alisten_api().music_sync()
+
+    assert isinstance(result, CurrentMusicResponse)
+    assert time.monotonic() - start < 1
+    assert len(calls) == 2
+    assert calls[0].content == calls[1].content
+
+    policy = get_hedge_policy("http://localhost:8080", "/music/sync")
+    assert policy.hedges == 1
+    assert policy.budget.tokens < 1
+
+
+@pytest.mark.usefixtures("_hedge")
+@respx.mock(assert_all_called=True)
+async def test_hedge_budget_exhausted(app: App, respx_mock: respx.MockRouter):
+    """测试对冲额度用完后只等待原请求"""
+    from nonebot_plugin_alisten.alisten_api import CurrentMusicResponse
+    from nonebot_plugin_alisten.hedge import get_hedge_policy
+
+    get_hedge_policy("http://localhost:8080", "/music/sync").budget.tokens = 0
+    side_effect, calls = slow_then_fast(0.3)
+    respx_mock.post("http://localhost:8080/music/sync").mock(side_effect=side_effect)
+
+    result = await fake_alisten_api().music_sync()
+
+    assert isinstance(result, CurrentMusicResponse)
+    assert len(calls) == 1
+
+
+@pytest.mark.usefixtures("_hedge")
+@respx.mock(assert_all_called=True)
+async def test_hedge_first_fails(app: App, respx_mock: respx.MockRouter):
+    """测试先完成的请求失败时等待另一个请求"""
+    from nonebot_plugin_alisten.alisten_api import CurrentMusicResponse
+
+    calls: list[httpx.Request] = []
+
+    async def side_effect(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) == 1:
+            await asyncio.sleep(0.1)
+            raise httpx.ConnectError("connection reset")
+        await asyncio.sleep(0.3)
+        return httpx.Response(status_code=200, json=CURRENT)
+
+    respx_mock.post("http://localhost:8080/music/sync").mock(side_effect=side_effect)
+
+    result = await fake_alisten_api().music_sync()
+
+    assert isinstance(result, CurrentMusicResponse)
+    assert len(calls) == 2
+
+
+@respx.mock(assert_all_called=True)
+async def test_hedge_disabled(app: App, respx_mock: respx.MockRouter):
+    """测试默认不发送对冲请求"""
+    from nonebot_plugin_alisten.hedge import _policies
+
+    side_effect, calls = slow_then_fast(0.1)
+    respx_mock.post("http://localhost:8080/music/sync").mock(side_effect=side_effect)
+
+    await fake_alisten_api().music_sync()
+
+    assert len(calls) == 1
+    assert not _policies
+
+
+@pytest.mark.usefixtures("_hedge")
+@respx.mock(assert_all_called=True)
+async def test_hedge_bulkhead_full(app: App, respx_mock: respx.MockRouter, mocker: MockerFixture):
+    """测试没有空闲的并发名额时不发送对冲请求，也不消耗额度"""
+    from nonebot_plugin_alisten.alisten_api import CurrentMusicResponse
+    from nonebot_plugin_alisten.bulkhead import get_bulkhead
+    from nonebot_plugin_alisten.config import plugin_config
+    from nonebot_plugin_alisten.hedge import get_hedge_policy
+
+    mocker.patch.object(plugin_config, "alisten_server_concurrency", 1)
+    side_effect, calls = slow_then_fast(0.3)
+    respx_mock.post("http://localhost:8080/music/sync").mock(side_effect=side_effect)
+
+    result = await fake_alisten_api().music_sync()
+
+    assert isinstance(result, CurrentMusicResponse)
+    assert len(calls) == 1
+    policy = get_hedge_policy("http://localhost:8080", "/music/sync")
+    assert policy.hedges == 0
+    assert policy.budget.tokens >= 1
+    assert get_bulkhead("http://localhost:8080").active == 0
+
+
+@pytest.mark.usefixtures("_hedge")
+@respx.mock(assert_all_called=True)
+async def test_hedge_bulkhead_released(app: App, respx_mock: respx.MockRouter, mocker: MockerFixture):
+    """测试对冲请求占用一个并发名额，结束后归还"""
+    from nonebot_plugin_alisten.bulkhead import get_bulkhead
+    from nonebot_plugin_alisten.config import plugin_config
+
+    mocker.patch.object(plugin_config, "alisten_server_concurrency", 2)
+    side_effect, calls = slow_then_fast(3)
+    respx_mock.post("http://localhost:8080/music/sync").mock(side_effect=side_effect)
+
+    await fake_alisten_api().music_sync()
+    await asyncio.sleep(0)
+
+    assert len(calls) == 2
+    assert get_bulkhead("http://localhost:8080").active == 0
@@ -0,0 +1,164 @@
+import httpx
+import pytest
+import respx
+from nonebot import get_adapter
+from nonebot.adapters.onebot.v11 import Adapter, Bot, Message
+from nonebug import App
+from pytest_mock import MockerFixture
+
+from tests.fake import fake_group_message_event_v11
+
+
+def test_token_bucket():
+    """测试令牌按速率恢复，且不超过容量"""
+    from nonebot_plugin_alisten.ratelimit import TokenBucketLimiter
+
+    limiter = TokenBucketLimiter(burst=2, rate=1.0)
+
+    limiter.consume("a", 0)
+    limiter.consume("a", 0)
+    assert limiter.retry_after("a", 0) == 1.0
+    assert limiter.retry_after("a", 0.5) == 0.5
+    assert limiter.retry_after("a", 1) == 0
+    assert limiter.retry_after("b", 0) == 0
+
+    # 闲置很久也只恢复到容量
+    limiter.consume("a", 100)
+    limiter.consume("a", 100)
+    assert limiter.retry_after("a", 100) == 1.0
+
+
+def test_token_bucket_eviction():
+    """测试淘汰闲置到已经恢复满令牌的桶"""
+    from nonebot_plugin_alisten.ratelimit import TokenBucketLimiter
+
+    limiter = TokenBucketLimiter(burst=2, rate=1.0)
+
+    limiter.consume("a", 0)
+    limiter.consume("b", 1)
+    limiter.consume("a", 1.5)
+    assert len(limiter) == 2
+
+    limiter.consume("c", 3.2)
+    assert len(limiter) == 2
+    limiter.consume("c", 10)
+    assert len(limiter) == 1
+
+    # 淘汰的桶与新建的桶没有区别
+    assert limiter.retry_after("a", 10) == 0
+
+
+def test_token_bucket_disabled():
+    """测试速率为 0 时不限制，也不保存桶"""
+    from nonebot_plugin_alisten.ratelimit import TokenBucketLimiter
+
+    limiter = TokenBucketLimiter(burst=5, rate=0)
+
+    for _ in range(10):
+        assert limiter.retry_after("a", 0) == 0
+        limiter.consume("a", 0)
+    assert len(limiter) == 0
+
+
+def test_acquire(mocker: MockerFixture):
+    """测试任一级别受限时不消耗其他级别的令牌"""
+    from nonebot_plugin_alisten.config import plugin_config
+    from nonebot_plugin_alisten.ratelimit import acquire, get_limiter
+
+    mocker.patch.object(plugin_config, "alisten_rate_user_burst", 1)
+    mocker.patch.object(plugin_config, "alisten_rate_user", 0.5)
+    mocker.patch.object(plugin_config, "alisten_rate_group_burst", 2)
+    mocker.patch.object(plugin_config, "alisten_rate_group", 0.1)
+    mocker.patch.object(plugin_config, "alisten_rate_server", 5.0)
+    mocker.patch("nonebot_plugin_alisten.ratelimit.time.monotonic", return_value=0)
+
+    assert acquire("1", "QQClient_10000", "http://localhost:8080") is None
+    assert acquire("1", "QQClient_10000", "http://localhost:8080") == ("user", 2.0)
+    assert acquire("2", "QQClient_10000", "http://localhost:8080") is None
+    assert acquire("3", "QQClient_10000", "http://localhost:8080") == ("group", 10.0)
+    assert acquire("3", "QQClient_20000", "http://localhost:8080") is None
+    assert len(get_limiter("server")) == 1
+
+
+@pytest.mark.usefixtures("_configs")
+@respx.mock(assert_all_called=True)
+async def test_rate_limit_reply(app: App, respx_mock: respx.MockRouter, mocker: MockerFixture):
+    """测试超出频率限制时提示等待时间，不请求服务器"""
+    from nonebot_plugin_alisten import alisten_cmd
+    from nonebot_plugin_alisten.config import plugin_config
+
+    mocker.patch.object(plugin_config, "alisten_rate_user", 0.2)
+    mocker.patch.object(plugin_config, "alisten_rate_user_burst", 1)
+    mocker.patch.object(plugin_config, "alisten_playlist_ttl", 0)
+    mocked_api = respx_mock.post("http://localhost:8080/music/playlist").mock(
+        return_value=httpx.Response(status_code=200, json={"playlist": []})
+    )
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/播放列表"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event, "播放列表为空", at_sender=True)
+        ctx.should_finished(alisten_cmd)
+
+        event = fake_group_message_event_v11(message=Message("/播放列表"))
+        ctx.receive_event(bot, event)
+        # 在依赖中结束时异常被包装在异常组中，NoneBug 无法识别为 finished
+        ctx.should_call_send(event, "你的操作太频繁了，请 5 秒后再试", at_sender=True)
+
+        # 其他用户不受影响
+        event = fake_group_message_event_v11(message=Message("/播放列表"), user_id=10000)
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event, "播放列表为空", at_sender=True)
+        ctx.should_finished(alisten_cmd)
+
+    assert mocked_api.call_count == 2
+
+
+@pytest.mark.usefixtures("_configs", "_no_playlist_cache")
+@respx.mock(assert_all_called=True)
+async def test_rate_limit_prompt(app: App, respx_mock: respx.MockRouter, mocker: MockerFixture):
+    """测试等待用户回复的命令只计一次频率限制"""
+    from nonebot_plugin_alisten import alisten_cmd
+    from nonebot_plugin_alisten.config import plugin_config
+
+    # 恢复得足够慢，提示的等待时间不受测试耗时的影响
+    mocker.patch.object(plugin_config, "alisten_rate_user", 0.01)
+    mocker.patch.object(plugin_config, "alisten_rate_user_burst", 1)
+    respx_mock.post("http://localhost:8080/music/playlist").mock(
+        return_value=httpx.Response(
+            status_code=200,
+            json={
+                "playlist": [
+                    {"id": "s1", "name": "测试歌曲1", "source": "wy", "user": {"name": "u", "email": ""}, "likes": 0}
+                ]
+            },
+        )
+    )
+    delete_mock = respx_mock.post("http://localhost:8080/music/delete").mock(
+        return_value=httpx.Response(status_code=200, json={"name": "测试歌曲1"})
+    )
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/删除音乐"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event, "你想删除哪首歌呢？\n\n1. 测试歌曲1")
+        ctx.should_rejected(alisten_cmd)
+
+        # 回复时依赖重新执行，不再消耗令牌
+        event = fake_group_message_event_v11(message=Message("1"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event, "已删除音乐：测试歌曲1", at_sender=True)
+        ctx.should_finished(alisten_cmd)
+
+        # 令牌已经用完
+        event = fake_group_message_event_v11(message=Message("/播放列表"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event, "你的操作太频繁了，请 100 秒后再试", at_sender=True)
+
+    assert delete_mock.call_count == 1
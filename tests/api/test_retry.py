@@ -0,0 +1,139 @@
+import httpx
+import pytest
+import respx
+from nonebot import get_adapter
+from nonebot.adapters.onebot.v11 import Adapter, Bot, Message
+from nonebug import App
+from pytest_mock import MockerFixture
+
+from tests.fake import fake_group_message_event_v11
+
+
+@pytest.fixture
+def _no_backoff(mocker: MockerFixture):
+    mocker.patch("nonebot_plugin_alisten.alisten_api.backoff", return_value=0)
+
+
+def test_backoff(mocker: MockerFixture):
+    """测试退避时间带上限且有抖动"""
+    from nonebot_plugin_alisten.config import plugin_config
+    from nonebot_plugin_alisten.retry import backoff
+
+    mocker.patch.object(plugin_config, "alisten_retry_backoff", 0.2)
+    mocker.patch.object(plugin_config, "alisten_retry_backoff_max", 1.0)
+    uniform = mocker.patch("nonebot_plugin_alisten.retry.random.uniform", side_effect=lambda a, b: b)
+
+    assert [backoff(attempt) for attempt in range(4)] == [0.2, 0.4, 0.8, 1.0]
+    assert uniform.call_args_list[0].args == (0, 0.2)
+
+
+def test_retry_budget():
+    """测试重试预算"""
+    from nonebot_plugin_alisten.retry import RetryBudget
+
+    budget = RetryBudget(ratio=0.5, max_tokens=2, tokens=1)
+
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+    for _ in range(10):
+        budget.deposit()
+    assert budget.tokens == 2
+
+
+@pytest.mark.usefixtures("_configs", "_no_backoff")
+@respx.mock(assert_all_called=True)
+async def test_retry_idempotent_read(app: App, respx_mock: respx.MockRouter):
+    """测试读取请求遇到网络错误和网关错误时重试"""
+    from nonebot_plugin_alisten import alisten_cmd
+
+    mocked_api = respx_mock.post("http://localhost:8080/music/playlist").mock(
+        side_effect=[
+            httpx.ConnectError("connection refused"),
+            httpx.Response(status_code=502, text="Bad Gateway"),
+            httpx.Response(status_code=200, json={"playlist": []}),
+        ]
+    )
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/alisten music playlist"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event=event, message="播放列表为空", at_sender=True)
+        ctx.should_finished(alisten_cmd)
+
+    assert mocked_api.call_count == 3
+
+
+@pytest.mark.usefixtures("_configs", "_no_backoff")
+@respx.mock(assert_all_called=True)
+async def test_retry_attempts_exhausted(app: App, respx_mock: respx.MockRouter):
+    """测试重试次数用完后返回错误"""
+    from nonebot_plugin_alisten import alisten_cmd
+
+    mocked_api = respx_mock.post("http://localhost:8080/music/sync").mock(
+        side_effect=httpx.ConnectError("connection refused")
+    )
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/alisten music current"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event=event, message="获取当前音乐请求失败，请稍后重试", at_sender=True)
+        ctx.should_finished(alisten_cmd)
+
+    assert mocked_api.call_count == 3
+
+
+@pytest.mark.usefixtures("_configs", "_no_backoff")
+@respx.mock(assert_all_called=True)
+async def test_no_retry_for_write(app: App, respx_mock: respx.MockRouter):
+    """测试写入请求不会重试"""
+    from nonebot_plugin_alisten import alisten_cmd
+
+    mocked_api = respx_mock.post("http://localhost:8080/music/pick").mock(
+        side_effect=httpx.ConnectError("connection refused")
+    )
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/music Sagitta luminis"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event=event, message="点歌请求失败，请稍后重试", at_sender=True)
+        ctx.should_finished(alisten_cmd)
+
+    assert mocked_api.call_count == 1
+
+
+@pytest.mark.usefixtures("_configs", "_no_backoff")
+@respx.mock(assert_all_called=True)
+async def test_retry_budget_exhausted(app: App, respx_mock: respx.MockRouter):
+    """测试服务器重试额度耗尽后不再重试"""
+    from nonebot_plugin_alisten import alisten_cmd
+    from nonebot_plugin_alisten.retry import get_retry_budget
+
+    get_retry_budget("http://localhost:8080").tokens = 1
+
+    mocked_api = respx_mock.post("http://localhost:8080/music/sync").mock(
+        side_effect=httpx.ConnectError("connection refused")
+    )
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/alisten music current"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event=event, message="获取当前音乐请求失败，请稍后重试", at_sender=True)
+        ctx.should_finished(alisten_cmd)
+
+    assert mocked_api.call_count == 2
@@ -0,0 +1,138 @@
+import asyncio
+
+import httpx
+import respx
+from nonebot import get_adapter
+from nonebot.adapters.onebot.v11 import Adapter, Bot, Message
+from nonebug import App
+from pytest_mock import MockerFixture
+from sqlalchemy import func, select
+
+from tests.fake import fake_alisten_api, fake_group_message_event_v11
+
+SEARCH = {
+    "list": [{"id": "1", "name": "青花瓷", "artist": "周杰伦"}],
+    "totalSize": 1,
+}
+
+
+async def count_rows() -> int:
+    from nonebot_plugin_orm import get_session
+
+    from nonebot_plugin_alisten.models import AlistenSearchResult
+
+    async with get_session() as session:
+        return await session.scalar(select(func.count()).select_from(AlistenSearchResult)) or 0
+
+
+@respx.mock(assert_all_called=True)
+async def test_search_persisted(app: App, respx_mock: respx.MockRouter):
+    """测试搜索结果写入数据库，重启后载入缓存"""
+    from nonebot_plugin_alisten.alisten_api import SearchMusicResponse, search_cache, search_store
+    from nonebot_plugin_alisten.backend import close_backend
+
+    mocked_api = respx_mock.post("http://localhost:8080/music/search").mock(
+        return_value=httpx.Response(status_code=200, json=SEARCH)
+    )
+
+    first = await fake_alisten_api().music_search("青花瓷", "wy")
+    assert isinstance(first, SearchMusicResponse)
+
+    # 写入在后台进行，不阻塞命令
+    assert len(search_store) == 1
+    assert await count_rows() == 0
+    assert await search_store.flush() == 1
+    assert len(search_store) == 0
+    assert await count_rows() == 1
+
+    # 模拟重启：丢弃内存中的缓存后从数据库载入
+    await close_backend()
+    assert await search_cache.get(("http://localhost:8080", "wy", "青花瓷", 10)) is None
+    assert await search_store.load() == 1
+
+    second = await fake_alisten_api(house_id="room456").music_search("青花瓷", "wy")
+    assert second == first
+    assert mocked_api.call_count == 1
+
+
+async def test_search_store_expiry_and_eviction(app: App, mocker: MockerFixture):
+    """测试过期及超出上限的搜索结果不会写入或载入"""
+    from nonebot_plugin_alisten.alisten_api import SearchMusicResponse, search_cache, search_store
+    from nonebot_plugin_alisten.backend import close_backend
+    from nonebot_plugin_alisten.config import plugin_config
+
+    mocker.patch.object(plugin_config, "alisten_search_persist_entries", 2)
+    clock = mocker.patch("nonebot_plugin_alisten.search_store.time.time", return_value=1000)
+    result = SearchMusicResponse.model_validate(SEARCH)
+
+    search_store.put(("a",), result, ttl=10)
+    search_store.put(("b",), result, ttl=30)
+    assert await search_store.flush() == 2
+    search_store.put(("c",), result, ttl=20)
+    search_store.put(("d",), result, ttl=0)
+    assert await search_store.flush() == 1
+    # 超出上限时淘汰最早过期的 a
+    assert await count_rows() == 2
+
+    clock.return_value = 1025
+    await close_backend()
+    assert await search_store.load() == 1
+    assert await search_cache.get(("b",)) == result
+    assert await search_cache.get(("a",)) is None
+    assert await search_cache.get(("c",)) is None
+
+    # 不持久化
+    mocker.patch.object(plugin_config, "alisten_search_persist_entries", 0)
+    search_store.put(("e",), result, ttl=10)
+    assert len(search_store) == 0
+    assert await search_store.load() == 0
+
+
+async def test_search_store_batch(app: App, mocker: MockerFixture):
+    """测试队列中的结果达到批量大小时立即写入"""
+    from nonebot_plugin_alisten.alisten_api import SearchMusicResponse, search_store
+    from nonebot_plugin_alisten.config import plugin_config
+
+    mocker.patch.object(plugin_config, "alisten_search_persist_interval", 60)
+    mocker.patch("nonebot_plugin_alisten.search_store.BATCH_SIZE", 3)
+    result = SearchMusicResponse.model_validate(SEARCH)
+
+    search_store.put(("a",), result, ttl=10)
+    search_store.put(("b",), result, ttl=10)
+    await asyncio.sleep(0.1)
+    assert await count_rows() == 0
+
+    search_store.put(("c",), result, ttl=10)
+    for _ in range(50):
+        await asyncio.sleep(0.01)
+        if await count_rows() == 3:
+            break
+    assert await count_rows() == 3
+    assert len(search_store) == 0
+
+    # 关闭时写入剩余的结果
+    search_store.put(("d",), result, ttl=10)
+    await search_store.close()
+    assert await count_rows() == 4
+
+
+async def test_cache_clear_persisted(app: App):
+    """测试清空缓存时同时清空数据库中的搜索结果"""
+    from nonebot_plugin_alisten import alisten_cmd
+    from nonebot_plugin_alisten.alisten_api import SearchMusicResponse, search_store
+
+    search_store.put(("a",), SearchMusicResponse.model_validate(SEARCH), ttl=10)
+    await search_store.flush()
+    search_store.put(("b",), SearchMusicResponse.model_validate(SEARCH), ttl=10)
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/alisten cache clear"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event, "已清空 0 条搜索结果缓存")
+        ctx.should_finished(alisten_cmd)
+
+    assert await count_rows() == 0
+    assert len(search_store) == 0
@@ -0,0 +1,125 @@
+import asyncio
+
+import httpx
+import pytest
+import respx
+from nonebug import App
+
+from tests.fake import fake_alisten_api
+
+PLAYLIST = {
+    "playlist": [
+        {
+            "id": "123",
+            "name": "Song 1",
+            "source": "wy",
+            "user": {"name": "user1", "email": "a@a.com"},
+            "likes": 5,
+        },
+    ]
+}
+
+
+def counting_server(delay: float, **kwargs):
+    """模拟服务器，记录同时处理的最大请求数"""
+    state = {"active": 0, "max_active": 0}
+
+    async def side_effect(request: httpx.Request) -> httpx.Response:
+        state["active"] += 1
+        state["max_active"] = max(state["max_active"], state["active"])
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            state["active"] -= 1
+        return httpx.Response(**kwargs)
+
+    return side_effect, state
+
+
+@pytest.mark.usefixtures("_no_playlist_cache")
+@respx.mock(assert_all_called=True)
+async def test_concurrent_reads_coalesced(app: App, respx_mock: respx.MockRouter):
+    """测试相同的并发读取请求只发送一次"""
+    from nonebot_plugin_alisten.alisten_api import PlaylistResponse
+    from nonebot_plugin_alisten.singleflight import _inflight
+
+    side_effect, state = counting_server(0.1, status_code=200, json=PLAYLIST)
+    mocked_api = respx_mock.post("http://localhost:8080/music/playlist").mock(side_effect=side_effect)
+
+    results = await asyncio.gather(*(fake_alisten_api().music_playlist() for _ in range(50)))
+
+    assert mocked_api.call_count == 1
+    assert state["max_active"] == 1
+    assert all(isinstance(result, PlaylistResponse) for result in results)
+    assert all(result is results[0] for result in results)
+    assert not _inflight
+
+    # 之前的请求完成后会重新请求
+    await fake_alisten_api().music_playlist()
+    assert mocked_api.call_count == 2
+
+
+@respx.mock(assert_all_called=True)
+async def test_different_reads_not_coalesced(app: App, respx_mock: respx.MockRouter):
+    """测试不同房间的读取请求不会合并"""
+    side_effect, _ = counting_server(0.1, status_code=200, json=PLAYLIST)
+    mocked_api = respx_mock.post("http://localhost:8080/music/playlist").mock(side_effect=side_effect)
+
+    await asyncio.gather(
+        fake_alisten_api(house_id="room1").music_playlist(),
+        fake_alisten_api(house_id="room1").music_playlist(),
+        fake_alisten_api(house_id="room2").music_playlist(),
+    )
+
+    assert mocked_api.call_count == 2
+
+
+@respx.mock(assert_all_called=True)
+async def test_writes_not_coalesced(app: App, respx_mock: respx.MockRouter):
+    """测试写入请求不会合并"""
+    side_effect, state = counting_server(0.1, status_code=200, json={"name": "Song 1", "likes": 6})
+    mocked_api = respx_mock.post("http://localhost:8080/music/good").mock(side_effect=side_effect)
+
+    await asyncio.gather(*(fake_alisten_api().music_good(1, "Song 1") for _ in range(5)))
+
+    assert mocked_api.call_count == 5
+    assert state["max_active"] == 5
+
+
+@respx.mock(assert_all_called=True)
+async def test_cancelled_caller(app: App, respx_mock: respx.MockRouter):
+    """测试某个调用者被取消不影响其他调用者"""
+    from nonebot_plugin_alisten.alisten_api import PlaylistResponse
+
+    side_effect, _ = counting_server(0.1, status_code=200, json=PLAYLIST)
+    mocked_api = respx_mock.post("http://localhost:8080/music/playlist").mock(side_effect=side_effect)
+
+    first = asyncio.create_task(fake_alisten_api().music_playlist())
+    second = asyncio.create_task(fake_alisten_api().music_playlist())
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert isinstance(await second, PlaylistResponse)
+    assert mocked_api.call_count == 1
+
+
+@pytest.mark.usefixtures("_no_playlist_cache")
+@respx.mock(assert_all_called=True)
+async def test_coalesced_deadlines(app: App, respx_mock: respx.MockRouter):
+    """测试合并的请求中每个调用者按自己的截止时间等待，不受其他调用者剩余时间的影响"""
+    import time
+
+    from nonebot_plugin_alisten.alisten_api import ErrorResponse, PlaylistResponse
+
+    side_effect, _ = counting_server(0.3, status_code=200, json=PLAYLIST)
+    mocked_api = respx_mock.post("http://localhost:8080/music/playlist").mock(side_effect=side_effect)
+
+    now = time.monotonic()
+    short, long = await asyncio.gather(
+        fake_alisten_api(deadline=now + 0.1).music_playlist(),
+        fake_alisten_api(deadline=now + 30).music_playlist(),
+    )
+
+    assert short == ErrorResponse(error="命令处理超时，请稍后重试")
+    assert isinstance(long, PlaylistResponse)
+    assert mocked_api.call_count == 1
@@ -0,0 +1,127 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+import respx
+from nonebot import get_adapter
+from nonebot.adapters.onebot.v11 import Adapter, Bot, Message
+from nonebug import App
+from pytest_mock import MockerFixture
+
+from tests.fake import fake_group_message_event_v11
+
+
+def delayed_response(delay: float, **kwargs):
+    async def side_effect(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(delay)
+        return httpx.Response(**kwargs)
+
+    return side_effect
+
+
+def test_endpoint_timeout():
+    """测试按端点获取超时时间"""
+    from nonebot_plugin_alisten.config import Config
+
+    config = Config(
+        alisten_timeout=5,
+        alisten_endpoint_timeout={"/music/search": 15, "/house/*": 2},
+    )
+
+    assert config.endpoint_timeout("/music/search") == 15
+    assert config.endpoint_timeout("/house/search") == 2
+    assert config.endpoint_timeout("/house/houseuser") == 2
+    assert config.endpoint_timeout("/music/sync") == 5
+
+
+@pytest.mark.usefixtures("_configs")
+@respx.mock(assert_all_called=False)
+async def test_endpoint_timeout_exceeded(app: App, respx_mock: respx.MockRouter, mocker: MockerFixture):
+    """测试请求超过端点超时时间"""
+    from nonebot_plugin_alisten import alisten_cmd
+    from nonebot_plugin_alisten.config import plugin_config
+
+    mocker.patch.object(plugin_config, "alisten_endpoint_timeout", {"/music/sync": 0.05})
+
+    respx_mock.post("http://localhost:8080/music/sync").mock(
+        side_effect=delayed_response(1, status_code=200, json={"error": "unreachable"})
+    )
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/alisten music current"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(
+            event=event,
+            message="获取当前音乐请求失败，服务器响应超时，请稍后重试",
+            at_sender=True,
+        )
+        ctx.should_finished(alisten_cmd)
+
+
+@pytest.mark.usefixtures("_configs")
+@respx.mock(assert_all_called=False)
+async def test_command_deadline(app: App, respx_mock: respx.MockRouter, mocker: MockerFixture):
+    """测试同一命令内的多个请求共享截止时间"""
+    from nonebot_plugin_alisten import alisten_cmd
+    from nonebot_plugin_alisten.config import plugin_config
+
+    # 端点超时时间远大于响应延迟，只有命令的截止时间会触发
+    mocker.patch.object(plugin_config, "alisten_timeout", 30)
+    mocker.patch.object(plugin_config, "alisten_command_timeout", 3)
+
+    respx_mock.post("http://localhost:8080/music/playlist").mock(
+        side_effect=delayed_response(
+            1,
+            status_code=200,
+            json={
+                "playlist": [
+                    {
+                        "id": "123",
+                        "name": "Song 1",
+                        "source": "wy",
+                        "user": {"name": "user1", "email": "a@a.com"},
+                        "likes": 5,
+                    },
+                ]
+            },
+        )
+    )
+    respx_mock.post("http://localhost:8080/music/good").mock(
+        side_effect=delayed_response(10, status_code=200, json={"name": "Song 1", "likes": 6})
+    )
+
+    start = time.monotonic()
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/alisten music good Song 1"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(
+            event=event,
+            message="点赞音乐请求失败，服务器响应超时，请稍后重试",
+            at_sender=True,
+        )
+        ctx.should_finished(alisten_cmd)
+
+    # 获取播放列表用去 1 秒，点赞只剩 2 秒
+    assert 2.5 < time.monotonic() - start < 5
+
+
+async def test_command_deadline_exhausted(app: App, mocker: MockerFixture):
+    """测试截止时间已过时不再发送请求"""
+    from nonebot_plugin_alisten.alisten_api import AlistenAPI, ErrorResponse
+    from nonebot_plugin_alisten.models import AlistenConfig
+
+    send = mocker.patch("nonebot_plugin_alisten.alisten_api.send")
+    config = AlistenConfig(server_url="http://localhost:8080", house_id="room123", house_password="")
+    api = AlistenAPI(config=config, user_session=mocker.MagicMock(), deadline=0)
+
+    result = await api.music_sync()
+
+    assert result == ErrorResponse(error="命令处理超时，请稍后重试")
+    send.assert_not_called()
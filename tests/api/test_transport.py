@@ -0,0 +1,125 @@
+import httpx
+import pytest
+import respx
+from nonebot import get_adapter
+from nonebot.adapters.onebot.v11 import Adapter, Bot, Message
+from nonebug import App
+from pytest_mock import MockerFixture
+
+from tests.fake import fake_alisten_api, fake_group_message_event_v11
+
+
+@pytest.mark.usefixtures("_configs", "_no_playlist_cache")
+@respx.mock(assert_all_called=True)
+async def test_session_reused(app: App, respx_mock: respx.MockRouter):
+    """测试同一服务器的请求共用一个会话"""
+    from nonebot_plugin_alisten import alisten_cmd
+    from nonebot_plugin_alisten.transport import _sessions
+
+    mocked_api = respx_mock.post("http://localhost:8080/music/playlist").mock(
+        return_value=httpx.Response(status_code=200, json={"playlist": []})
+    )
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        for _ in range(2):
+            event = fake_group_message_event_v11(message=Message("/alisten music playlist"))
+            ctx.receive_event(bot, event)
+            ctx.should_call_send(event=event, message="播放列表为空", at_sender=True)
+            ctx.should_finished(alisten_cmd)
+
+    assert mocked_api.call_count == 2
+    assert list(_sessions) == ["http://localhost:8080"]
+
+    from nonebot_plugin_alisten.transport import close_sessions
+
+    await close_sessions()
+    assert not _sessions
+
+
+@pytest.mark.usefixtures("_configs")
+@respx.mock(assert_all_called=True)
+async def test_session_not_supported(app: App, respx_mock: respx.MockRouter, mocker: MockerFixture):
+    """测试驱动器不支持会话时回退到单次请求"""
+    from nonebot_plugin_alisten import alisten_cmd, transport
+
+    original_get_session = transport.driver.get_session
+
+    def get_session(*args, **kwargs):
+        # 插件自己创建会话时不带参数，驱动器内部的单次请求仍然可以正常创建会话
+        if not args and not kwargs:
+            raise NotImplementedError
+        return original_get_session(*args, **kwargs)
+
+    mocker.patch.object(transport, "_session_supported", True)
+    mocker.patch.object(transport.driver, "get_session", side_effect=get_session)
+
+    mocked_api = respx_mock.post("http://localhost:8080/music/playlist").mock(
+        return_value=httpx.Response(status_code=200, json={"playlist": []})
+    )
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/alisten music playlist"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event=event, message="播放列表为空", at_sender=True)
+        ctx.should_finished(alisten_cmd)
+
+    assert mocked_api.call_count == 1
+    assert not transport._sessions
+    assert transport._session_supported is False
+
+
+@respx.mock(assert_all_called=True)
+async def test_http2_session(app: App, respx_mock: respx.MockRouter, mocker: MockerFixture):
+    """测试开启 HTTP/2 时使用 HTTP/2 会话"""
+    from nonebot.drivers import HTTPVersion
+
+    from nonebot_plugin_alisten import transport
+    from nonebot_plugin_alisten.config import plugin_config
+
+    mocker.patch.object(plugin_config, "alisten_http2", True)
+    get_session = mocker.spy(transport.driver, "get_session")
+    respx_mock.post("http://localhost:8080/music/playlist").mock(
+        return_value=httpx.Response(status_code=200, json={"playlist": []})
+    )
+
+    await fake_alisten_api().music_playlist()
+
+    get_session.assert_called_once_with(version=HTTPVersion.H2)
+    assert list(transport._sessions) == ["http://localhost:8080"]
+
+
+@pytest.mark.usefixtures("_no_playlist_cache")
+@respx.mock(assert_all_called=True)
+async def test_http2_not_supported(app: App, respx_mock: respx.MockRouter, mocker: MockerFixture):
+    """测试驱动器不支持 HTTP/2 时回退到 HTTP/1.1"""
+    from nonebot.drivers import HTTPVersion
+
+    from nonebot_plugin_alisten import transport
+    from nonebot_plugin_alisten.config import plugin_config
+
+    original_get_session = transport.driver.get_session
+
+    def get_session(*args, **kwargs):
+        if kwargs.get("version") == HTTPVersion.H2:
+            raise RuntimeError("Unsupported HTTP version: HTTP/2")
+        return original_get_session(*args, **kwargs)
+
+    mocker.patch.object(plugin_config, "alisten_http2", True)
+    mocker.patch.object(transport, "_http2_supported", True)
+    mocker.patch.object(transport.driver, "get_session", side_effect=get_session)
+    mocked_api = respx_mock.post("http://localhost:8080/music/playlist").mock(
+        return_value=httpx.Response(status_code=200, json={"playlist": []})
+    )
+
+    await fake_alisten_api().music_playlist()
+    await fake_alisten_api().music_playlist()
+
+    assert mocked_api.call_count == 2
+    assert transport._http2_supported is False
+    assert list(transport._sessions) == ["http://localhost:8080"]
@@ -0,0 +1,112 @@
+import pytest
+from nonebot import get_adapter
+from nonebot.adapters.onebot.v11 import Adapter, Bot, Message
+from nonebug import App
+from pytest_mock import MockerFixture
+from sqlalchemy import select
+
+from tests.fake import fake_group_message_event_v11
+
+
+async def add_config_elsewhere(session_id: str, bump: bool) -> None:
+    """模拟其他进程直接修改数据库"""
+    from nonebot_plugin_orm import get_session
+
+    from nonebot_plugin_alisten.config_index import bump_version
+    from nonebot_plugin_alisten.models import AlistenConfig
+
+    async with get_session() as session:
+        session.add(AlistenConfig(session_id=session_id, server_url="http://other:8080", house_id="other"))
+        if bump:
+            await bump_version(session)
+        await session.commit()
+
+
+@pytest.mark.usefixtures("_configs")
+async def test_config_index_no_query(app: App, mocker: MockerFixture):
+    """测试加载后读取配置不再查询数据库"""
+    from nonebot_plugin_alisten import config_index as config_index_module
+    from nonebot_plugin_alisten.config_index import config_index
+
+    config = await config_index.get("QQClient_10000")
+    assert config
+    assert config.house_id == "room123"
+
+    get_session = mocker.spy(config_index_module, "get_session")
+    assert await config_index.get("QQClient_10000") is config
+    assert await config_index.get("QQClient_20000") is None
+    get_session.assert_not_called()
+
+
+async def test_config_set_updates_index(app: App):
+    """测试设置和删除配置后立即更新索引与版本号"""
+    from nonebot_plugin_orm import get_session
+
+    from nonebot_plugin_alisten import alisten_cmd
+    from nonebot_plugin_alisten.config_index import config_index
+    from nonebot_plugin_alisten.models import AlistenConfigVersion
+
+    assert await config_index.get("QQClient_10000") is None
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/alisten config set http://example.com room123"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(
+            event,
+            "Alisten 配置已设置:\n服务器地址: http://example.com\n房间ID: room123\n房间密码: 未设置",
+        )
+        ctx.should_finished(alisten_cmd)
+
+    config = await config_index.get("QQClient_10000")
+    assert config
+    assert config.server_url == "http://example.com"
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/alisten config delete"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event, "Alisten 配置已删除")
+        ctx.should_finished(alisten_cmd)
+
+    assert await config_index.get("QQClient_10000") is None
+
+    async with get_session() as session:
+        assert await session.scalar(select(AlistenConfigVersion.version)) == 2
+
+
+async def test_config_index_version_check(app: App, mocker: MockerFixture):
+    """测试开启版本检查后发现其他进程的修改"""
+    from nonebot_plugin_alisten.config import plugin_config
+    from nonebot_plugin_alisten.config_index import config_index
+
+    monotonic = mocker.patch("nonebot_plugin_alisten.config_index.time.monotonic", return_value=100)
+    mocker.patch.object(plugin_config, "alisten_config_check_interval", 10)
+
+    assert await config_index.get("QQClient_20000") is None
+
+    # 未递增版本号的修改不会被发现
+    await add_config_elsewhere("QQClient_20000", bump=False)
+    monotonic.return_value = 110
+    assert await config_index.get("QQClient_20000") is None
+
+    await add_config_elsewhere("QQClient_30000", bump=True)
+    monotonic.return_value = 115
+    assert await config_index.get("QQClient_30000") is None
+    monotonic.return_value = 120
+    assert await config_index.get("QQClient_30000")
+    assert await config_index.get("QQClient_20000")
+
+
+async def test_config_index_without_version_check(app: App):
+    """测试默认不检查其他进程的修改"""
+    from nonebot_plugin_alisten.config_index import config_index
+
+    assert len(config_index) == 0
+    assert await config_index.get("QQClient_20000") is None
+    await add_config_elsewhere("QQClient_20000", bump=True)
+    assert await config_index.get("QQClient_20000") is None
@@ -16,10 +16,17 @@ sys.path.insert(0, str(HOME_DIR))
 
 def pytest_configure(config: pytest.Config) -> None:
     config.stash[NONEBOT_INIT_KWARGS] = {
-        "driver": "~httpx",
+        "driver": "~httpx+~websockets",
         "superusers": ["10"],
         "alembic_startup_check": False,
         "alconna_cache_message": False,
+        # 需要时在测试中开启，避免后台轮询发出未预期的请求
+        "alisten_poll_interval": 0,
+        "alisten_poll_stagger": 0,
+        # 开启轮询的测试不必先使用命令，需要暂停的测试单独设置
+        "alisten_poll_idle": 0,
+        # 需要时在测试中开启，避免每次投票都等待汇总窗口
+        "alisten_skip_window": 0,
     }
     # 如果不设置为 False，会运行插件的 on_startup 函数
     # 会导致 orm 的 init_orm 函数在 patch 之前被调用
@@ -117,10 +124,84 @@ async def _default_user(app: App):
         await session.execute(delete(User))
         await session.execute(delete(Bind))
 
-    from nonebot_plugin_alisten.models import AlistenConfig
+    from nonebot_plugin_alisten.models import AlistenConfig, AlistenConfigVersion, AlistenSearchResult
 
     async with get_session() as session, session.begin():
         await session.execute(delete(AlistenConfig))
+        await session.execute(delete(AlistenConfigVersion))
+        await session.execute(delete(AlistenSearchResult))
+
+
+@pytest.fixture(autouse=True)
+async def _reset_alisten_state(app: App):
+    """清理插件的进程内状态，避免测试之间互相影响"""
+    yield
+
+    from nonebot_plugin_alisten.alisten_api import (
+        _house_digests,
+        current_cache,
+        error_cache,
+        playlist_cache,
+        search_cache,
+        search_store,
+    )
+    from nonebot_plugin_alisten.announce import scheduler
+    from nonebot_plugin_alisten.backend import close_backend
+    from nonebot_plugin_alisten.breaker import _breakers
+    from nonebot_plugin_alisten.bulkhead import _bulkheads
+    from nonebot_plugin_alisten.compression import _stats
+    from nonebot_plugin_alisten.config_index import config_index
+    from nonebot_plugin_alisten.directory import close_directories, directory_cache
+    from nonebot_plugin_alisten.hedge import _policies
+    from nonebot_plugin_alisten.poller import close_pollers
+    from nonebot_plugin_alisten.ratelimit import _limiters
+    from nonebot_plugin_alisten.retry import _budgets
+    from nonebot_plugin_alisten.singleflight import _inflight
+    from nonebot_plugin_alisten.skipvote import _tails, _windows
+    from nonebot_plugin_alisten.transport import close_sessions
+
+    await close_directories()
+    close_pollers()
+    scheduler.close()
+    scheduler.sent = scheduler.failed = scheduler.dropped = 0
+    await close_sessions()
+    _budgets.clear()
+    _breakers.clear()
+    _bulkheads.clear()
+    _inflight.clear()
+    _stats.clear()
+    _policies.clear()
+    _limiters.clear()
+    _windows.clear()
+    _tails.clear()
+    current_cache.cancel_refreshes()
+    _house_digests.clear()
+    if search_store._task is not None:
+        search_store._task.cancel()
+        search_store._task = None
+    search_store._pending.clear()
+    for cache in (playlist_cache, current_cache, error_cache, search_cache, directory_cache):
+        cache._versions.clear()
+        cache.hits = cache.misses = 0
+    # 缓存的数据随后端一起丢弃
+    await close_backend()
+    config_index.clear()
+
+
+@pytest.fixture
+def _no_playlist_cache(app: App, mocker: MockerFixture):
+    """关闭播放列表缓存，使每次获取播放列表都发送请求"""
+    from nonebot_plugin_alisten.config import plugin_config
+
+    mocker.patch.object(plugin_config, "alisten_playlist_ttl", 0)
+
+
+@pytest.fixture
+def _polling(app: App, mocker: MockerFixture):
+    """开启后台轮询，间隔足够长，测试期间只轮询一次"""
+    from nonebot_plugin_alisten.config import plugin_config
+
+    mocker.patch.object(plugin_config, "alisten_poll_interval", 60)
 
 
 @pytest.fixture
@@ -1,5 +1,10 @@
+import asyncio
+import contextlib
+import time
 from datetime import UTC, datetime
-from typing import TYPE_CHECKING, Literal
+from fnmatch import fnmatchcase
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, Literal, cast
 
 if TYPE_CHECKING:
     from nonebot.adapters.onebot.v11 import GroupMessageEvent as GroupMessageEventV11
@@ -14,6 +19,8 @@ if TYPE_CHECKING:
         PrivateMessageEvent as PrivateMessageEventV12,
     )
 
+    from nonebot_plugin_alisten.alisten_api import AlistenAPI
+
 
 def fake_group_message_event_v11(**field) -> "GroupMessageEventV11":
     from nonebot.adapters.onebot.v11 import GroupMessageEvent, Message
@@ -141,3 +148,174 @@ def fake_channel_message_event_v12(**field) -> "ChannelMessageEventV12":
         to_me: bool = False
 
     return FakeEvent(**field)
+
+
+def fake_alisten_api(
+    server_url: str = "http://localhost:8080",
+    house_id: str = "room123",
+    house_password: str = "password123",
+    user_name: str = "nickname",
+    user_email: str = "nickname@example.com",
+    deadline: float | None = None,
+    background: bool = False,
+) -> "AlistenAPI":
+    from nonebot_plugin_alisten.alisten_api import AlistenAPI
+    from nonebot_plugin_alisten.models import AlistenConfig
+
+    config = AlistenConfig(
+        session_id="QQClient_10000",
+        server_url=server_url,
+        house_id=house_id,
+        house_password=house_password,
+    )
+    user_session = SimpleNamespace(user_name=user_name, user_email=user_email)
+    return AlistenAPI(config=config, user_session=cast("Any", user_session), deadline=deadline, background=background)
+
+
+class FakeRedisServer:
+    """只实现了插件用到的命令的 Redis 替身"""
+
+    def __init__(self, password: str | None = None) -> None:
+        self.password = password
+        self.data: dict[bytes, tuple[float, bytes]] = {}
+        """键 -> (过期时间, 值)"""
+        self.commands: list[list[bytes]] = []
+        self.delay = 0.0
+        """回复每条命令前等待的秒数"""
+        self._server: asyncio.Server | None = None
+        self._writers: set[asyncio.StreamWriter] = set()
+
+    @property
+    def url(self) -> str:
+        assert self._server
+        host, port = self._server.sockets[0].getsockname()[:2]
+        auth = f":{self.password}@" if self.password else ""
+        return f"redis://{auth}{host}:{port}/1"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close()
+            for writer in self._writers:
+                writer.close()
+            await self._server.wait_closed()
+
+    def _get(self, key: bytes) -> bytes | None:
+        entry = self.data.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            self.data.pop(key, None)
+            return None
+        return entry[1]
+
+    def _execute(self, args: list[bytes], authed: bool) -> bytes:
+        command = args[0].upper()
+        if command == b"AUTH":
+            return b"+OK\r\n" if args[-1].decode() == self.password else b"-WRONGPASS invalid password\r\n"
+        if not authed:
+            return b"-NOAUTH Authentication required.\r\n"
+        if command == b"SELECT":
+            return b"+OK\r\n"
+        if command == b"GET":
+            return bulk(self._get(args[1]))
+        if command == b"SET":
+            self.data[args[1]] = (time.monotonic() + int(args[4]) / 1000, args[2])
+            return b"+OK\r\n"
+        if command == b"DEL":
+            count = sum(self._get(key) is not None for key in args[1:])
+            for key in args[1:]:
+                self.data.pop(key, None)
+            return b":%d\r\n" % count
+        if command == b"SCAN":
+            pattern = args[3].decode()
+            keys = [key for key in list(self.data) if self._get(key) is not None and fnmatchcase(key.decode(), pattern)]
+            return b"*2\r\n" + bulk(b"0") + b"*%d\r\n" % len(keys) + b"".join(map(bulk, keys))
+        if command == b"STRLEN":
+            return b":%d\r\n" % len(self._get(args[1]) or b"")
+        return b"-ERR unknown command\r\n"
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        authed = self.password is None
+        self._writers.add(writer)
+        try:
+            while line := await reader.readline():
+                args = []
+                for _ in range(int(line[1:])):
+                    length = int((await reader.readline())[1:])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                self.commands.append(args)
+                reply = self._execute(args, authed)
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+                if args[0].upper() == b"AUTH" and reply.startswith(b"+"):
+                    authed = True
+                writer.write(reply)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+
+def bulk(value: bytes | None) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    return b"$%d\r\n%b\r\n" % (len(value), value)
+
+
+class FakePushServer:
+    """按脚本推送消息的 WebSocket 服务器
+
+    每个连接依次使用 scripts 中的一个脚本：消息会被序列化为 JSON 发送，数字表示等待的秒数。
+    脚本结束后关闭连接，脚本用完后的连接一直保持打开。
+    """
+
+    def __init__(self, scripts: list[list[dict[str, Any] | float]] | None = None, status: int | None = None) -> None:
+        self.scripts = scripts or []
+        self.status = status
+        """不为 None 时拒绝连接并返回该状态码"""
+        self.connections = 0
+        self.subscriptions: list[dict[str, Any]] = []
+        """每个连接收到的订阅消息"""
+        self.path: str | None = None
+        self._server: Any = None
+
+    @property
+    def url(self) -> str:
+        host, port = next(iter(self._server.sockets)).getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def start(self) -> None:
+        from websockets.asyncio.server import serve
+
+        self._server = await serve(self._handle, "127.0.0.1", 0, process_request=self._process_request)
+
+    async def stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    def _process_request(self, connection: Any, request: Any) -> Any:
+        self.path = request.path
+        if self.status is not None:
+            return connection.respond(self.status, "unsupported\n")
+        return None
+
+    async def _handle(self, websocket: Any) -> None:
+        import json
+
+        script = self.scripts[self.connections] if self.connections < len(self.scripts) else None
+        self.connections += 1
+        self.subscriptions.append(json.loads(await websocket.recv()))
+        if script is None:
+            await websocket.wait_closed()
+            return
+        for step in script:
+            if isinstance(step, dict):
+                await websocket.send(json.dumps(step))
+            else:
+                # 客户端断开时提前结束
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(websocket.wait_closed(), step)
+                    return
@@ -0,0 +1,148 @@
+import asyncio
+
+import httpx
+import pytest
+import respx
+from nonebot import get_adapter
+from nonebot.adapters.onebot.v11 import Adapter, Bot, Message
+from nonebug import App
+from pytest_mock import MockerFixture
+
+from tests.fake import fake_alisten_api, fake_group_message_event_v11
+
+
+def house(population: int = 0) -> dict:
+    return {
+        "createTime": 1755320090631,
+        "desc": "BHU 听歌房",
+        "enableStatus": True,
+        "id": "room123",
+        "name": "BHU 听歌房",
+        "needPwd": True,
+        "population": population,
+    }
+
+
+@pytest.mark.usefixtures("_configs")
+@respx.mock(assert_all_called=True)
+async def test_house_info_from_directory(app: App, respx_mock: respx.MockRouter):
+    """测试后台刷新期间查询房间信息不再请求服务器"""
+    from nonebot_plugin_alisten import alisten_cmd
+
+    mocked_api = respx_mock.get("http://localhost:8080/house/search").mock(
+        return_value=httpx.Response(status_code=200, json=[house()])
+    )
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        for _ in range(3):
+            event = fake_group_message_event_v11(message=Message("/alisten house info"))
+            ctx.receive_event(bot, event)
+            ctx.should_call_send(
+                event,
+                "当前房间信息:\n房间ID: room123\n房间名称: BHU 听歌房\n房间描述: BHU 听歌房\n当前人数: 0",
+            )
+            ctx.should_finished(alisten_cmd)
+
+    assert mocked_api.call_count == 1
+
+
+@respx.mock(assert_all_called=True)
+async def test_directory_skip_unchanged(app: App, respx_mock: respx.MockRouter, mocker: MockerFixture):
+    """测试房间列表未变化时跳过解析"""
+    from nonebot_plugin_alisten import directory as directory_module
+    from nonebot_plugin_alisten.directory import get_house_directory
+
+    respx_mock.get("http://localhost:8080/house/search").mock(
+        side_effect=[
+            httpx.Response(status_code=200, json=[house()]),
+            httpx.Response(status_code=200, json=[house()]),
+            httpx.Response(status_code=200, json=[house(population=3)]),
+        ]
+    )
+    decode = mocker.spy(directory_module, "decode")
+
+    directory = get_house_directory("http://localhost:8080")
+    api = fake_alisten_api()
+
+    assert await directory.refresh(api) is None
+    first = directory.houses
+    assert await directory.refresh(api) is None
+    assert directory.houses is first
+    assert decode.call_count == 1
+
+    assert await directory.refresh(api) is None
+    house_info = directory.get("room123")
+    assert house_info
+    assert house_info.population == 3
+    assert decode.call_count == 2
+
+
+@respx.mock(assert_all_called=True)
+async def test_directory_etag(app: App, respx_mock: respx.MockRouter):
+    """测试服务器返回 ETag 时使用条件请求"""
+    from nonebot_plugin_alisten.directory import get_house_directory
+
+    mocked_api = respx_mock.get("http://localhost:8080/house/search").mock(
+        side_effect=[
+            httpx.Response(status_code=200, json=[house()], headers={"ETag": '"v1"'}),
+            httpx.Response(status_code=304, headers={"ETag": '"v1"'}),
+        ]
+    )
+
+    directory = get_house_directory("http://localhost:8080")
+    api = fake_alisten_api()
+
+    assert await directory.refresh(api) is None
+    assert await directory.refresh(api) is None
+
+    assert "If-None-Match" not in mocked_api.calls[0].request.headers
+    assert mocked_api.calls[1].request.headers["If-None-Match"] == '"v1"'
+    assert directory.get("room123")
+    assert directory.etag == '"v1"'
+
+
+@respx.mock(assert_all_called=True)
+async def test_directory_background_refresh(app: App, respx_mock: respx.MockRouter, mocker: MockerFixture):
+    """测试后台定期刷新，无人查询后停止"""
+    from nonebot_plugin_alisten.config import plugin_config
+    from nonebot_plugin_alisten.directory import get_house_directory
+
+    mocker.patch.object(plugin_config, "alisten_house_refresh_interval", 0.1)
+    mocker.patch("nonebot_plugin_alisten.directory.IDLE_ROUNDS", 5)
+    mocked_api = respx_mock.get("http://localhost:8080/house/search").mock(
+        side_effect=[httpx.Response(status_code=200, json=[house(population=i)]) for i in range(20)]
+    )
+
+    directory = get_house_directory("http://localhost:8080")
+    assert await directory.ensure_loaded(fake_alisten_api()) is None
+    assert directory.refreshing
+
+    await asyncio.sleep(2)
+
+    assert not directory.refreshing
+    assert 2 <= mocked_api.call_count <= 8
+    house_info = directory.get("room123")
+    assert house_info
+    assert house_info.population == mocked_api.call_count - 1
+
+
+@respx.mock(assert_all_called=True)
+async def test_directory_refresh_disabled(app: App, respx_mock: respx.MockRouter, mocker: MockerFixture):
+    """测试刷新间隔为 0 时每次查询都重新获取"""
+    from nonebot_plugin_alisten.config import plugin_config
+    from nonebot_plugin_alisten.directory import get_house_directory
+
+    mocker.patch.object(plugin_config, "alisten_house_refresh_interval", 0)
+    mocked_api = respx_mock.get("http://localhost:8080/house/search").mock(
+        return_value=httpx.Response(status_code=200, json=[house()])
+    )
+
+    directory = get_house_directory("http://localhost:8080")
+    for _ in range(3):
+        assert await directory.ensure_loaded(fake_alisten_api()) is None
+
+    assert not directory.refreshing
+    assert mocked_api.call_count == 3
@@ -7,6 +7,7 @@ from inline_snapshot import snapshot
 from nonebot import get_adapter
 from nonebot.adapters.onebot.v11 import Adapter, Bot, Message
 from nonebug import App
+from pytest_mock import MockerFixture
 
 from tests.fake import fake_group_message_event_v11
 
@@ -96,3 +97,51 @@ async def test_music_current_failure(app: App, respx_mock: respx.MockRouter):
 
     last_request = mocked_api.calls.last.request
     assert json.loads(last_request.content) == snapshot({"houseId": "room123", "password": "password123"})
+
+
+@pytest.mark.usefixtures("_configs")
+@respx.mock(assert_all_called=True)
+async def test_music_current_stale(app: App, respx_mock: respx.MockRouter, mocker: MockerFixture):
+    """测试使用旧数据回复时显示数据的时长"""
+    from nonebot_plugin_alisten import alisten_cmd
+
+    clock = mocker.patch("nonebot_plugin_alisten.cache.time.time", return_value=100)
+    respx_mock.post("http://localhost:8080/music/sync").mock(
+        return_value=httpx.Response(
+            status_code=200,
+            json={
+                "name": "测试歌曲",
+                "source": "wy",
+                "id": "123456",
+                "user": {"name": "test_user", "email": "test@example.com"},
+            },
+        )
+    )
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/alisten music current"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(
+            event=event,
+            message="当前播放：测试歌曲\n来源：网易云音乐\n点歌者：test_user",
+            at_sender=True,
+        )
+        ctx.should_finished(alisten_cmd)
+
+    clock.return_value = 112.5
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/alisten music current"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(
+            event=event,
+            message="当前播放：测试歌曲\n来源：网易云音乐\n点歌者：test_user\n（13 秒前的数据，正在刷新）",
+            at_sender=True,
+        )
+        ctx.should_finished(alisten_cmd)
@@ -1,3 +1,4 @@
+import asyncio
 import json
 
 import httpx
@@ -7,8 +8,9 @@ from inline_snapshot import snapshot
 from nonebot import get_adapter
 from nonebot.adapters.onebot.v11 import Adapter, Bot, Message
 from nonebug import App
+from pytest_mock import MockerFixture
 
-from tests.fake import fake_group_message_event_v11
+from tests.fake import fake_alisten_api, fake_group_message_event_v11
 
 
 @pytest.mark.usefixtures("_configs")
@@ -112,3 +114,80 @@ async def test_music_skip_failure(app: App, respx_mock: respx.MockRouter):
     assert json.loads(last_request.content) == snapshot(
         {"houseId": "room123", "password": "password123", "user": {"name": "nickname", "email": "nickname@example.com"}}
     )
+
+
+@pytest.mark.usefixtures("_configs")
+@respx.mock(assert_all_called=True)
+async def test_music_skip_window(app: App, respx_mock: respx.MockRouter, mocker: MockerFixture):
+    """测试开启汇总时，只有一人投票的回复与不汇总时相同"""
+    from nonebot_plugin_alisten import alisten_cmd
+    from nonebot_plugin_alisten.config import plugin_config
+
+    mocker.patch.object(plugin_config, "alisten_skip_window", 0.01)
+    respx_mock.post("http://localhost:8080/music/skip/vote").mock(
+        side_effect=[
+            httpx.Response(status_code=200, json={"current_votes": 1, "required_votes": 2}),
+            httpx.Response(status_code=400, json={"error": "你已经投过票了"}),
+        ]
+    )
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/切歌"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event=event, message="投票跳过，当前票数：1/2", at_sender=True)
+        ctx.should_finished(alisten_cmd)
+
+        event = fake_group_message_event_v11(message=Message("/切歌"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event=event, message="你已经投过票了", at_sender=True)
+        ctx.should_finished(alisten_cmd)
+
+
+@respx.mock(assert_all_called=True)
+async def test_music_skip_aggregate(app: App, respx_mock: respx.MockRouter, mocker: MockerFixture):
+    """测试第一个投票立即回复，之后窗口内的投票依次提交，并汇总为一条回复"""
+    from nonebot_plugin_alisten.alisten_api import VoteSkipResponse
+    from nonebot_plugin_alisten.config import plugin_config
+    from nonebot_plugin_alisten.skipvote import SkipBatch, _tails, _windows, format_batch, vote
+
+    mocker.patch.object(plugin_config, "alisten_skip_window", 1)
+    in_flight = 0
+    max_in_flight = 0
+    votes = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, max_in_flight, votes
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        user = json.loads(request.content)["user"]["name"]
+        if user == "user3":
+            return httpx.Response(status_code=400, json={"error": "你已经投过票了"})
+        votes += 1
+        return httpx.Response(status_code=200, json={"current_votes": votes + 2, "required_votes": 10})
+
+    skip_mock = respx_mock.post("http://localhost:8080/music/skip/vote").mock(side_effect=handler)
+
+    first = await vote(fake_alisten_api(user_name="user0"))
+    # 不等待窗口结束
+    assert _windows
+    assert first == VoteSkipResponse(current_votes=3, required_votes=10)
+
+    results = await asyncio.gather(*(vote(fake_alisten_api(user_name=f"user{i}")) for i in range(1, 5)))
+    batch, *followers = results
+    assert isinstance(batch, SkipBatch)
+    assert followers == [None] * 3
+    assert skip_mock.call_count == 5
+    assert max_in_flight == 1
+    assert format_batch(batch) == "3 人投票跳过，当前票数：6/10\n1 人投票失败：你已经投过票了"
+    assert not _tails
+
+    # 窗口结束后的投票重新开始一个窗口，立即回复
+    result = await vote(fake_alisten_api(user_name="user5"))
+    assert result == VoteSkipResponse(current_votes=7, required_votes=10)
+    await asyncio.sleep(1.05)
+    assert not _windows
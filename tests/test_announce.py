@@ -0,0 +1,200 @@
+import asyncio
+
+import httpx
+import pytest
+import respx
+from nonebot import get_adapter
+from nonebot.adapters.onebot.v11 import Adapter, Bot, Message
+from nonebug import App
+from pytest_mock import MockerFixture
+
+from tests.fake import fake_group_message_event_v11
+
+CURRENT = {
+    "name": "测试歌曲",
+    "source": "wy",
+    "id": "123456",
+    "user": {"name": "test_user", "email": "test@example.com"},
+}
+NEXT = {
+    "name": "下一首",
+    "source": "qq",
+    "id": "654321",
+    "user": {"name": "other_user", "email": "other@example.com"},
+}
+
+
+def make_target(group_id: str, self_id: str = "test"):
+    from nonebot_plugin_alconna import Target
+
+    return Target(group_id, self_id=self_id, adapter="OneBot V11", scope="QQClient")
+
+
+async def wait_until(predicate) -> None:
+    for _ in range(200):
+        if predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("等待超时")
+
+
+@pytest.mark.usefixtures("_polling", "_configs")
+@respx.mock(assert_all_called=True)
+async def test_announce(app: App, respx_mock: respx.MockRouter):
+    """测试开启切歌通知后，当前音乐变化时发送通知"""
+    from nonebot_plugin_orm import get_session
+    from sqlalchemy import select
+
+    from nonebot_plugin_alisten import alisten_cmd
+    from nonebot_plugin_alisten.announce import scheduler
+    from nonebot_plugin_alisten.models import AlistenConfig
+    from nonebot_plugin_alisten.poller import get_poller
+
+    mocked_api = respx_mock.post("http://localhost:8080/music/sync").mock(
+        side_effect=[
+            httpx.Response(status_code=200, json=CURRENT),
+            httpx.Response(status_code=200, json=CURRENT),
+            httpx.Response(status_code=200, json=NEXT),
+        ]
+    )
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/alisten config announce 开启"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event, "切歌通知已开启")
+        ctx.should_finished(alisten_cmd)
+
+    async with get_session() as session:
+        config = await session.scalar(select(AlistenConfig))
+    assert config
+    assert config.announce_target
+    assert config.announce_target["id"] == "10000"
+
+    poller = get_poller(config)
+    assert poller
+    await wait_until(lambda: poller.current is not None)
+    # 第一次获取和音乐未变化时都不发送
+    await poller.poll()
+    assert scheduler.sent == 0
+    assert len(scheduler) == 0
+
+    async with app.test_api() as ctx:
+        adapter = get_adapter(Adapter)
+        ctx.create_bot(base=Bot, adapter=adapter)
+        ctx.should_call_api(
+            "send_msg",
+            {
+                "message_type": "group",
+                "group_id": 10000,
+                "message": Message("切歌啦，正在播放：下一首\n来源：QQ音乐\n点歌者：other_user"),
+            },
+            {"message_id": 1},
+        )
+
+        await poller.poll()
+        await wait_until(lambda: scheduler.sent == 1)
+
+    assert mocked_api.call_count == 3
+
+
+@pytest.mark.usefixtures("_configs")
+async def test_announce_switch(app: App):
+    """测试关闭切歌通知，以及没有后台轮询时的提示"""
+    from nonebot_plugin_alisten import alisten_cmd
+    from nonebot_plugin_alisten.config_index import config_index
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/alisten config announce on"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event, "切歌通知已开启，但未开启轮询或推送，暂时无法发现切歌")
+        ctx.should_finished(alisten_cmd)
+
+    config = await config_index.get("QQClient_10000")
+    assert config
+    assert config.announce_target
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/alisten config announce 关闭"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event, "切歌通知已关闭")
+        ctx.should_finished(alisten_cmd)
+
+        event = fake_group_message_event_v11(message=Message("/alisten config announce 也许"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event, "切歌通知只能设置为 '开启' 或 '关闭'")
+        ctx.should_finished(alisten_cmd)
+
+    config = await config_index.get("QQClient_10000")
+    assert config
+    assert config.announce_target is None
+
+
+async def test_scheduler(app: App, mocker: MockerFixture):
+    """测试按 Bot 分批发送，在窗口内分散发出，并丢弃被取代的通知"""
+    from nonebot_plugin_alisten.announce import Announcement, SendScheduler
+    from nonebot_plugin_alisten.config import plugin_config
+
+    mocker.patch.object(plugin_config, "alisten_announce_window", 0.2)
+    mocker.patch.object(plugin_config, "alisten_announce_interval", 0.0)
+
+    sent: list[tuple[str | None, str, str, float]] = []
+    loop = asyncio.get_running_loop()
+
+    async def send(self, announcement: Announcement) -> None:
+        target = announcement.target
+        sent.append((target.self_id, target.id, announcement.message, loop.time()))
+
+    mocker.patch.object(SendScheduler, "_send", send)
+
+    scheduler = SendScheduler()
+    start = loop.time()
+    for group_id in ("1", "2", "3", "4", "5"):
+        scheduler.submit(f"QQClient_{group_id}", Announcement(make_target(group_id, "bot1"), "第一首"))
+    scheduler.submit("QQClient_6", Announcement(make_target("6", "bot2"), "第一首"))
+    # 两个 Bot 各自发送第一条
+    await asyncio.sleep(0)
+    assert [(self_id, group_id) for self_id, group_id, *_ in sent] == [("bot1", "1"), ("bot2", "6")]
+
+    # 尚未发出的通知被取代，仍按原来的顺序发送
+    for group_id in ("3", "5"):
+        scheduler.submit(f"QQClient_{group_id}", Announcement(make_target(group_id, "bot1"), "第二首"))
+    assert scheduler.dropped == 2
+    assert len(scheduler) == 4
+
+    await wait_until(lambda: len(scheduler) == 0 and not scheduler._tasks)
+    scheduler.close()
+    bot1 = [(group_id, message) for self_id, group_id, message, _ in sent if self_id == "bot1"]
+    assert bot1 == [("1", "第一首"), ("2", "第一首"), ("3", "第二首"), ("4", "第一首"), ("5", "第二首")]
+    # 剩下的 4 条在窗口内均匀分散
+    last = max(sent_at for *_, sent_at in sent)
+    assert 0.15 < last - start < 0.4
+
+
+async def test_scheduler_failure(app: App, mocker: MockerFixture):
+    """测试发送失败时记录并继续发送下一条"""
+    from nonebot_plugin_alconna import UniMessage
+
+    from nonebot_plugin_alisten.announce import Announcement, SendScheduler
+    from nonebot_plugin_alisten.config import plugin_config
+
+    mocker.patch.object(plugin_config, "alisten_announce_window", 0.0)
+    mocker.patch.object(plugin_config, "alisten_announce_interval", 0.0)
+    send = mocker.patch.object(UniMessage, "send", side_effect=[RuntimeError("bot offline"), None])
+
+    scheduler = SendScheduler()
+    scheduler.submit("QQClient_1", Announcement(make_target("1"), "测试"))
+    scheduler.submit("QQClient_2", Announcement(make_target("2"), "测试"))
+    await wait_until(lambda: scheduler.sent + scheduler.failed == 2)
+
+    assert scheduler.failed == 1
+    assert scheduler.sent == 1
+    assert send.call_count == 2
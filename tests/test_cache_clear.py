@@ -0,0 +1,55 @@
+import pytest
+from nonebot import get_adapter
+from nonebot.adapters.onebot.v11 import Adapter, Bot, Message
+from nonebug import App
+
+from tests.fake import fake_group_message_event_v11
+
+
+@pytest.mark.usefixtures("_configs")
+async def test_cache_clear(app: App):
+    """测试清空搜索结果缓存，并在服务器状态中显示缓存统计"""
+    from nonebot_plugin_alisten import alisten_cmd
+    from nonebot_plugin_alisten.alisten_api import SearchMusicResponse, search_cache
+
+    await search_cache.set(("http://localhost:8080", "wy", "青花瓷", 10), SearchMusicResponse(totalSize=0), 60)
+    await search_cache.get(("http://localhost:8080", "wy", "青花瓷", 10))
+    await search_cache.get(("http://localhost:8080", "wy", "稻香", 10))
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/alisten status"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(
+            event,
+            "Alisten 服务器状态:\n"
+            "服务器地址: http://localhost:8080\n"
+            "熔断状态: 正常\n"
+            "连续失败: 0 次\n"
+            "最近错误率: 0%（0 次请求）\n\n"
+            "搜索缓存: 1 条，25 B，命中率 50%（1/2）",
+        )
+        ctx.should_finished(alisten_cmd)
+
+        event = fake_group_message_event_v11(message=Message("/alisten cache clear"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event, "已清空 1 条搜索结果缓存")
+        ctx.should_finished(alisten_cmd)
+
+    assert await search_cache.stats() == (0, 0)
+
+
+async def test_cache_clear_permission_denied(app: App):
+    """测试非超级用户无法清空缓存"""
+    from nonebot_plugin_alisten import alisten_cmd
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/alisten cache clear"), user_id=10000)
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event, "权限不足，仅限超级用户使用")
+        ctx.should_finished(alisten_cmd)
@@ -0,0 +1,394 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+import respx
+from nonebot import get_adapter
+from nonebot.adapters.onebot.v11 import Adapter, Bot, Message
+from nonebug import App
+from pytest_mock import MockerFixture
+
+from tests.fake import fake_group_message_event_v11
+
+CURRENT = {
+    "name": "测试歌曲",
+    "source": "wy",
+    "id": "123456",
+    "user": {"name": "test_user", "email": "test@example.com"},
+}
+
+
+def make_config(session_id: str, house_id: str = "room123", password: str = "password123"):
+    from nonebot_plugin_alisten.models import AlistenConfig
+
+    return AlistenConfig(
+        session_id=session_id, server_url="http://localhost:8080", house_id=house_id, house_password=password
+    )
+
+
+async def wait_polled(house_id: str = "room123") -> None:
+    from nonebot_plugin_alisten.poller import get_poller
+
+    for _ in range(100):
+        poller = get_poller(make_config("QQClient_10000", house_id=house_id))
+        if poller and (poller.updated_at is not None or poller.error is not None):
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("轮询未完成")
+
+
+@pytest.mark.usefixtures("_polling")
+@respx.mock(assert_all_called=True)
+async def test_poller_shared(app: App, respx_mock: respx.MockRouter):
+    """测试绑定同一房间的群组共享一个轮询"""
+    from nonebot_plugin_orm import get_session
+
+    from nonebot_plugin_alisten import alisten_cmd
+    from nonebot_plugin_alisten.config_index import config_index
+    from nonebot_plugin_alisten.poller import _pollers, get_poller
+
+    mocked_api = respx_mock.post("http://localhost:8080/music/sync").mock(
+        return_value=httpx.Response(status_code=200, json=CURRENT)
+    )
+
+    async with get_session() as session:
+        session.add(make_config("QQClient_10000"))
+        session.add(make_config("QQClient_20000"))
+        session.add(make_config("QQClient_30000", house_id="room456"))
+        await session.commit()
+
+    await config_index.load()
+    assert len(_pollers) == 2
+    poller = get_poller(make_config("QQClient_10000"))
+    assert poller
+    assert set(poller.sessions) == {"QQClient_10000", "QQClient_20000"}
+    await wait_polled()
+    await wait_polled(house_id="room456")
+    assert mocked_api.call_count == 2
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        for user_id in (10, 10000):
+            event = fake_group_message_event_v11(message=Message("/当前音乐"), user_id=user_id)
+            ctx.receive_event(bot, event)
+            ctx.should_call_send(
+                event=event,
+                message="当前播放：测试歌曲\n来源：网易云音乐\n点歌者：test_user",
+                at_sender=True,
+            )
+            ctx.should_finished(alisten_cmd)
+
+    assert mocked_api.call_count == 2
+
+
+@pytest.mark.usefixtures("_polling")
+async def test_poller_lifecycle(app: App, mocker: MockerFixture):
+    """测试第一个群组绑定时启动轮询，最后一个群组解除绑定时停止"""
+    from nonebot_plugin_alisten.config_index import config_index
+    from nonebot_plugin_alisten.poller import HousePoller, get_poller
+
+    poll = mocker.patch.object(HousePoller, "poll")
+
+    config_index.put(make_config("QQClient_10000"))
+    poller = get_poller(make_config("QQClient_10000"))
+    assert poller
+    assert poller.running
+    config_index.put(make_config("QQClient_20000"))
+    assert get_poller(make_config("QQClient_20000")) is poller
+    await asyncio.sleep(0)
+    assert poll.call_count == 1
+
+    config_index.remove("QQClient_10000")
+    assert poller.running
+    # 改为绑定其他房间
+    config_index.put(make_config("QQClient_20000", house_id="room456"))
+    assert get_poller(make_config("QQClient_20000")) is None
+    assert not poller.running
+    assert get_poller(make_config("QQClient_20000", house_id="room456"))
+
+    config_index.remove("QQClient_20000")
+    assert get_poller(make_config("QQClient_20000", house_id="room456")) is None
+
+
+@pytest.mark.usefixtures("_polling")
+@respx.mock(assert_all_called=True)
+async def test_poller_per_password(app: App, respx_mock: respx.MockRouter):
+    """测试房间密码不同的群组分别轮询，密码错误的群组读不到其他群组的结果"""
+    from nonebot_plugin_alisten.config_index import config_index
+    from nonebot_plugin_alisten.poller import get_poller
+
+    def sync(request: httpx.Request) -> httpx.Response:
+        if json.loads(request.content)["password"] != "password123":
+            return httpx.Response(status_code=403, json={"error": "密码错误"})
+        return httpx.Response(status_code=200, json=CURRENT)
+
+    respx_mock.post("http://localhost:8080/music/sync").mock(side_effect=sync)
+
+    config_index.put(make_config("QQClient_10000"))
+    config_index.put(make_config("QQClient_20000", password="wrong"))
+    poller = get_poller(make_config("QQClient_10000"))
+    wrong = get_poller(make_config("QQClient_20000", password="wrong"))
+    assert poller
+    assert wrong
+    assert wrong is not poller
+    await wait_polled()
+    for _ in range(100):
+        if wrong.error:
+            break
+        await asyncio.sleep(0.01)
+
+    assert poller.get()
+    assert poller.error is None
+    assert wrong.get() is None
+    assert wrong.error == "密码错误"
+
+    # 修改密码后改为共享正确密码的轮询
+    config_index.put(make_config("QQClient_20000"))
+    assert get_poller(make_config("QQClient_20000", password="wrong")) is None
+    assert not wrong.running
+    assert set(poller.sessions) == {"QQClient_10000", "QQClient_20000"}
+
+
+@pytest.mark.usefixtures("_polling")
+async def test_poller_stagger(app: App, mocker: MockerFixture):
+    """测试加载配置时各房间的第一次轮询随机分散开始"""
+    from nonebot_plugin_alisten.config import plugin_config
+    from nonebot_plugin_alisten.poller import HousePoller, sync_pollers
+
+    mocker.patch.object(plugin_config, "alisten_poll_stagger", 10)
+    start = mocker.patch.object(HousePoller, "start")
+
+    sync_pollers(make_config(f"QQClient_{i}", house_id=f"room{i}") for i in range(20))
+
+    delays = [call.args[0] for call in start.call_args_list]
+    assert len(delays) == 20
+    assert all(0 <= delay <= 10 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+@pytest.mark.usefixtures("_polling", "_configs")
+@respx.mock(assert_all_called=True)
+async def test_poller_started_on_load(app: App, respx_mock: respx.MockRouter):
+    """测试加载配置时启动轮询，删除配置后停止"""
+    from nonebot_plugin_alisten import alisten_cmd
+    from nonebot_plugin_alisten.config_index import config_index
+    from nonebot_plugin_alisten.poller import get_poller
+
+    mocked_api = respx_mock.post("http://localhost:8080/music/sync").mock(
+        return_value=httpx.Response(status_code=200, json=CURRENT)
+    )
+
+    await config_index.load()
+    await wait_polled()
+    assert mocked_api.call_count == 1
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/alisten config delete"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event, "Alisten 配置已删除")
+        ctx.should_finished(alisten_cmd)
+
+    assert get_poller(make_config("QQClient_10000")) is None
+
+
+@pytest.mark.usefixtures("_polling", "_configs")
+@respx.mock(assert_all_called=True)
+async def test_poller_stale(app: App, respx_mock: respx.MockRouter):
+    """测试轮询结果不够新时尽快轮询，并改为读取缓存"""
+    from nonebot_plugin_alisten import alisten_cmd
+    from nonebot_plugin_alisten.config_index import config_index
+    from nonebot_plugin_alisten.poller import get_poller
+
+    mocked_api = respx_mock.post("http://localhost:8080/music/sync").mock(
+        side_effect=[
+            httpx.Response(status_code=200, json=CURRENT),
+            httpx.Response(status_code=200, json={**CURRENT, "name": "新歌曲"}),
+        ]
+    )
+
+    await config_index.load()
+    await wait_polled()
+    poller = get_poller(make_config("QQClient_10000"))
+    assert poller
+    assert poller.updated_at
+    poller.updated_at -= 10
+    poller.interval = 90
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/当前音乐"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(
+            event=event,
+            message="当前播放：新歌曲\n来源：网易云音乐\n点歌者：test_user",
+            at_sender=True,
+        )
+        ctx.should_finished(alisten_cmd)
+
+    assert mocked_api.call_count == 2
+    assert poller.interval == 60
+
+
+@pytest.mark.usefixtures("_polling", "_configs")
+@respx.mock(assert_all_called=True)
+async def test_poller_invalidated_by_write(app: App, respx_mock: respx.MockRouter):
+    """测试写操作后不再使用之前的轮询结果，轮询失败时不使用"""
+    from nonebot_plugin_alisten.alisten_api import invalidate_house
+    from nonebot_plugin_alisten.config_index import config_index
+    from nonebot_plugin_alisten.poller import get_poller
+
+    respx_mock.post("http://localhost:8080/music/sync").mock(return_value=httpx.Response(status_code=200, json=CURRENT))
+
+    await config_index.load()
+    await wait_polled()
+    poller = get_poller(make_config("QQClient_10000"))
+    assert poller
+    result = poller.get()
+    assert result
+    assert result[0].name == "测试歌曲"
+
+    await invalidate_house("http://localhost:8080", "room123")
+    assert poller.get() is None
+
+    await poller.poll()
+    assert poller.get()
+
+
+@pytest.mark.usefixtures("_polling")
+@respx.mock(assert_all_called=True)
+async def test_poller_error(app: App, respx_mock: respx.MockRouter):
+    """测试轮询失败时记录错误并保留之前的结果"""
+    from nonebot_plugin_alisten.config_index import config_index
+    from nonebot_plugin_alisten.poller import get_poller
+
+    respx_mock.post("http://localhost:8080/music/sync").mock(
+        side_effect=[
+            httpx.Response(status_code=200, json=CURRENT),
+            httpx.Response(status_code=500, json={"error": "服务器错误"}),
+        ]
+    )
+
+    config_index.put(make_config("QQClient_10000"))
+    await wait_polled()
+    poller = get_poller(make_config("QQClient_10000"))
+    assert poller
+    assert poller.error is None
+
+    await poller.poll()
+    assert poller.error
+    assert poller.get()
+
+
+@respx.mock(assert_all_called=True)
+async def test_poller_backoff(app: App, respx_mock: respx.MockRouter, mocker: MockerFixture):
+    """测试当前音乐没有变化时延长轮询间隔，变化或修改房间后恢复"""
+    from nonebot_plugin_alisten.alisten_api import invalidate_house
+    from nonebot_plugin_alisten.config import plugin_config
+    from nonebot_plugin_alisten.config_index import config_index
+    from nonebot_plugin_alisten.poller import get_poller
+
+    mocker.patch.object(plugin_config, "alisten_poll_interval", 10)
+    mocker.patch.object(plugin_config, "alisten_poll_interval_max", 30)
+    changed = {**CURRENT, "id": "654321", "name": "下一首"}
+    respx_mock.post("http://localhost:8080/music/sync").mock(
+        side_effect=[httpx.Response(status_code=200, json=CURRENT)] * 4
+        + [
+            httpx.Response(status_code=500, json={"error": "服务器错误"}),
+            httpx.Response(status_code=200, json=changed),
+        ]
+    )
+
+    config_index.put(make_config("QQClient_10000"))
+    await wait_polled()
+    poller = get_poller(make_config("QQClient_10000"))
+    assert poller
+    assert poller.interval == 15
+
+    intervals = []
+    for _ in range(4):
+        await poller.poll()
+        intervals.append(poller.interval)
+    # 失败也视为没有变化
+    assert intervals == [22.5, 30, 30, 30]
+
+    await poller.poll()
+    assert poller.interval == 10
+
+    poller.interval = 30
+    poller.next_poll_at = time.monotonic() + 30
+    await invalidate_house("http://localhost:8080", "room123")
+    assert poller.interval == 10
+    assert poller.next_poll_at <= time.monotonic() + 10
+
+
+@pytest.mark.usefixtures("_configs")
+async def test_poller_idle(app: App, mocker: MockerFixture):
+    """测试长时间无人使用时暂停轮询，有人使用命令后恢复"""
+    from nonebot_plugin_alisten import alisten_cmd
+    from nonebot_plugin_alisten.config import plugin_config
+    from nonebot_plugin_alisten.config_index import config_index
+    from nonebot_plugin_alisten.poller import HousePoller, get_poller
+
+    mocker.patch.object(plugin_config, "alisten_poll_interval", 0.05)
+    mocker.patch.object(plugin_config, "alisten_poll_idle", 60)
+    poll = mocker.patch.object(HousePoller, "poll")
+
+    await config_index.load()
+    poller = get_poller(make_config("QQClient_10000"))
+    assert poller
+    # 启动后还没有群组使用命令，不轮询
+    await asyncio.sleep(0.1)
+    assert poller.idle
+    assert poll.call_count == 0
+
+    poller.touch()
+    for _ in range(100):
+        if poll.call_count:
+            break
+        await asyncio.sleep(0.01)
+    assert poll.call_count == 1
+
+    poller.active_at -= 120
+    assert poller.idle
+    await asyncio.sleep(0.2)
+    assert poll.call_count <= 2
+
+    # 开启了切歌通知的房间不暂停
+    poller.sessions["QQClient_10000"].announce_target = {"id": "10000"}
+    assert not poller.idle
+    poller.sessions["QQClient_10000"].announce_target = None
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/alisten status"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(
+            event,
+            "Alisten 服务器状态:\n"
+            "服务器地址: http://localhost:8080\n"
+            "熔断状态: 正常\n"
+            "连续失败: 0 次\n"
+            "最近错误率: 0%（0 次请求）\n"
+            "房间状态: 无人使用，已暂停轮询",
+        )
+        ctx.should_finished(alisten_cmd)
+
+    paused = poll.call_count
+    poller.touch()
+    assert not poller.idle
+    for _ in range(100):
+        if poll.call_count > paused:
+            break
+        await asyncio.sleep(0.01)
+    assert poll.call_count > paused
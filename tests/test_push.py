@@ -0,0 +1,151 @@
+import asyncio
+from collections.abc import AsyncIterator, Callable
+
+import httpx
+import pytest
+import respx
+from nonebug import App
+from pytest_mock import MockerFixture
+
+from tests.fake import FakePushServer, fake_alisten_api
+
+OLD = {"name": "旧歌曲", "source": "wy", "id": "1", "user": {"name": "user1", "email": "a@a.com"}}
+NEW = {"name": "新歌曲", "source": "qq", "id": "2", "user": {"name": "user2", "email": "b@b.com"}}
+PLAYLIST = {"playlist": [{"id": "2", "name": "新歌曲", "source": "qq", "user": NEW["user"], "likes": 1}]}
+
+
+@pytest.fixture
+async def push_server(app: App, mocker: MockerFixture) -> AsyncIterator[FakePushServer]:
+    """开启推送，轮询间隔足够长，只在连接时获取一次完整状态"""
+    from nonebot_plugin_alisten.config import plugin_config
+
+    mocker.patch.object(plugin_config, "alisten_push", True)
+    mocker.patch.object(plugin_config, "alisten_poll_interval", 60)
+    mocker.patch.object(plugin_config, "alisten_push_backoff_max", 0.01)
+    server = FakePushServer()
+    await server.start()
+    yield server
+
+    from nonebot_plugin_alisten.poller import close_pollers
+
+    close_pollers()
+    await server.stop()
+
+
+def bind(server_url: str):
+    from nonebot_plugin_alisten.config_index import config_index
+    from nonebot_plugin_alisten.models import AlistenConfig
+    from nonebot_plugin_alisten.poller import get_poller
+
+    config = AlistenConfig(
+        session_id="QQClient_10000", server_url=server_url, house_id="room123", house_password="password123"
+    )
+    config_index.put(config)
+    poller = get_poller(config)
+    assert poller
+    return poller
+
+
+async def wait_until(condition: Callable[[], object]) -> None:
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("等待超时")
+
+
+async def test_push(app: App, push_server: FakePushServer):
+    """测试推送的当前音乐与播放列表写入轮询结果与缓存"""
+    from nonebot_plugin_alisten.alisten_api import PlaylistResponse
+
+    push_server.scripts = [
+        [{"type": "ping"}, {"type": "music", "data": NEW}, {"type": "playlist", "data": PLAYLIST}, 10]
+    ]
+    with respx.mock(assert_all_called=True) as respx_mock:
+        sync = respx_mock.post(f"{push_server.url}/music/sync").mock(
+            return_value=httpx.Response(status_code=200, json=OLD)
+        )
+        poller = bind(push_server.url)
+        await wait_until(lambda: poller.current and poller.current.name == "新歌曲")
+
+        # 推送连接正常时结果总是最新的
+        assert poller.pushing
+        result = poller.get()
+        assert result
+        assert result[1] == 0
+        assert sync.call_count == 1
+
+        await wait_until(lambda: push_server.connections and len(push_server.subscriptions) == 1)
+        playlist = await fake_alisten_api(server_url=push_server.url).music_playlist()
+        assert playlist == PlaylistResponse.model_validate(PLAYLIST)
+
+    assert push_server.path == "/house/events"
+    assert push_server.subscriptions == [{"houseId": "room123", "password": "password123"}]
+    assert push_server.connections == 1
+
+
+async def test_push_reconnect(app: App, push_server: FakePushServer):
+    """测试连接断开后重连，并清除推送的播放列表"""
+    from nonebot_plugin_alisten.alisten_api import playlist_cache
+
+    push_server.scripts = [
+        [{"type": "playlist", "data": PLAYLIST}, {"type": "music", "data": OLD}],
+        [{"type": "music", "data": NEW}, 10],
+    ]
+    with respx.mock() as respx_mock:
+        respx_mock.post(f"{push_server.url}/music/sync").mock(return_value=httpx.Response(status_code=200, json=OLD))
+        poller = bind(push_server.url)
+        await wait_until(lambda: poller.current and poller.current.name == "新歌曲")
+
+    assert push_server.connections == 2
+    assert poller.pushing
+    assert await playlist_cache.get(poller.key) is None
+
+
+async def test_push_timeout(app: App, push_server: FakePushServer, mocker: MockerFixture):
+    """测试长时间没有收到消息时重新连接"""
+    from nonebot_plugin_alisten.config import plugin_config
+
+    mocker.patch.object(plugin_config, "alisten_push_timeout", 0.05)
+    push_server.scripts = [[10]]
+    with respx.mock() as respx_mock:
+        respx_mock.post(f"{push_server.url}/music/sync").mock(return_value=httpx.Response(status_code=200, json=OLD))
+        bind(push_server.url)
+        await wait_until(lambda: push_server.connections >= 2)
+
+
+async def test_push_fallback_polling(app: App, push_server: FakePushServer, mocker: MockerFixture):
+    """测试服务器不支持推送时在重连间隔内轮询"""
+    from nonebot_plugin_alisten.config import plugin_config
+
+    mocker.patch.object(plugin_config, "alisten_poll_interval", 0.01)
+    mocker.patch.object(plugin_config, "alisten_push_backoff_max", 0.05)
+    push_server.status = 404
+    with respx.mock() as respx_mock:
+        sync = respx_mock.post(f"{push_server.url}/music/sync").mock(
+            return_value=httpx.Response(status_code=200, json=OLD)
+        )
+        poller = bind(push_server.url)
+        await wait_until(lambda: sync.call_count >= 3)
+
+    assert not poller.pushing
+    result = poller.get()
+    assert result
+    assert result[0].name == "旧歌曲"
+
+
+async def test_push_unsupported_driver(app: App, push_server: FakePushServer, mocker: MockerFixture):
+    """测试驱动器不支持 WebSocket 时一直轮询"""
+    from nonebot_plugin_alisten.config import plugin_config
+
+    mocker.patch.object(plugin_config, "alisten_poll_interval", 0.01)
+    mocker.patch("nonebot_plugin_alisten.push.driver", object())
+    with respx.mock() as respx_mock:
+        sync = respx_mock.post(f"{push_server.url}/music/sync").mock(
+            return_value=httpx.Response(status_code=200, json=OLD)
+        )
+        poller = bind(push_server.url)
+        await wait_until(lambda: sync.call_count >= 3)
+
+    assert poller.running
+    assert push_server.connections == 0
@@ -0,0 +1,89 @@
+import pytest
+from nonebot import get_adapter
+from nonebot.adapters.onebot.v11 import Adapter, Bot, Message
+from nonebug import App
+from pytest_mock import MockerFixture
+
+from tests.fake import fake_group_message_event_v11
+
+
+@pytest.mark.usefixtures("_configs")
+async def test_status(app: App):
+    """测试查看服务器状态"""
+    from nonebot_plugin_alisten import alisten_cmd
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/alisten status"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(
+            event,
+            "Alisten 服务器状态:\n"
+            "服务器地址: http://localhost:8080\n"
+            "熔断状态: 正常\n"
+            "连续失败: 0 次\n"
+            "最近错误率: 0%（0 次请求）",
+        )
+        ctx.should_finished(alisten_cmd)
+
+
+@pytest.mark.usefixtures("_configs")
+async def test_status_breaker_open(app: App, mocker: MockerFixture):
+    """测试查看熔断中的服务器状态"""
+    from nonebot_plugin_alisten import alisten_cmd
+    from nonebot_plugin_alisten.breaker import CircuitBreaker, get_breaker
+    from nonebot_plugin_alisten.config import plugin_config
+
+    mocker.patch.object(plugin_config, "alisten_breaker_failures", 2)
+    mocker.patch.object(CircuitBreaker, "retry_after", new=mocker.PropertyMock(return_value=30))
+    breaker = get_breaker("http://localhost:8080")
+    breaker.record_success()
+    breaker.record_failure("/music/sync 请求超时")
+    breaker.record_failure("/music/sync 请求超时")
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/alisten status"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(
+            event,
+            "Alisten 服务器状态:\n"
+            "服务器地址: http://localhost:8080\n"
+            "熔断状态: 熔断中（30 秒后探测）\n"
+            "连续失败: 2 次\n"
+            "最近错误率: 67%（3 次请求）\n"
+            "最近错误: /music/sync 请求超时",
+        )
+        ctx.should_finished(alisten_cmd)
+
+
+async def test_status_no_config(app: App):
+    """测试未配置时查看服务器状态"""
+    from nonebot_plugin_alisten import alisten_cmd
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/alisten status"))
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event, "当前群组未配置 Alisten 服务")
+        ctx.should_finished(alisten_cmd)
+
+
+async def test_status_permission_denied(app: App):
+    """测试非超级用户无法查看服务器状态"""
+    from nonebot_plugin_alisten import alisten_cmd
+
+    async with app.test_matcher() as ctx:
+        adapter = get_adapter(Adapter)
+        bot = ctx.create_bot(base=Bot, adapter=adapter)
+
+        event = fake_group_message_event_v11(message=Message("/alisten status"), user_id=10000)
+        ctx.receive_event(bot, event)
+        ctx.should_call_send(event, "权限不足，仅限超级用户使用")
+        ctx.should_finished(alisten_cmd)